@@ -0,0 +1,119 @@
+"""Benchmark de ``AsyncDetector`` con varias cámaras concurrentes.
+
+Simula ``--cameras`` clientes asíncronos que piden la detección de un frame cada
+``--interval-ms`` milisegundos (o tan rápido como pueden, con 0) con un modelo sin red neuronal
+cuya inferencia tarda ``--infer-ms`` milisegundos por lote más ``--frame-ms`` por frame. Compara
+la detección frame a frame (``get_image_objects`` en un hilo, una llamada cada vez) con
+``AsyncDetector`` para cada tamaño máximo de lote de ``--batch-sizes``, y muestra el rendimiento,
+la latencia p50/p95 de cada petición y el tamaño medio de los lotes.
+
+Uso::
+
+    python benchmarks/async_detector.py [--cameras 8] [--requests 50] [--infer-ms 20]
+        [--frame-ms 2] [--interval-ms 0] [--batch-sizes 1 4 8 16] [--max-wait-ms 5]
+"""
+import argparse
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, List
+
+import numpy as np
+
+from simple_object_detection.utils.async_detector import AsyncDetector
+
+from synthetic import StubModel
+
+
+class LoadModel(StubModel):
+    """``StubModel`` cuya inferencia tarda ``delay`` segundos por lote y ``frame_delay`` por
+    frame."""
+    def __init__(self, boxes: int, delay: float, frame_delay: float):
+        self.frame_delay = frame_delay
+        super().__init__(boxes, delay)
+
+    def _get_outputs(self, images):
+        time.sleep(self.frame_delay * len(images))
+        return super()._get_outputs(images)
+
+
+async def load(detect: Callable[[np.ndarray], Awaitable], frames: List[List[np.ndarray]],
+               interval: float) -> List[float]:
+    """Ejecuta las peticiones de todas las cámaras de forma concurrente.
+
+    :param detect: función que realiza la detección de un frame.
+    :param frames: frames de cada cámara.
+    :param interval: segundos entre las peticiones de una cámara.
+    :return: latencia (segundos) de cada petición.
+    """
+    latencies = []
+
+    async def camera(camera_frames):
+        for frame in camera_frames:
+            start = time.perf_counter()
+            await detect(frame)
+            latencies.append(time.perf_counter() - start)
+            if interval:
+                await asyncio.sleep(interval)
+            else:
+                # Ceder el bucle para que las cámaras se intercalen.
+                await asyncio.sleep(0)
+
+    await asyncio.gather(*(camera(camera_frames) for camera_frames in frames))
+    return latencies
+
+
+def report(name: str, latencies: List[float], seconds: float, batch_size: float) -> None:
+    print(f'{name:>20} {len(latencies) / seconds:10.1f} {1000 * np.percentile(latencies, 50):9.2f} '
+          f'{1000 * np.percentile(latencies, 95):9.2f} {batch_size:11.2f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--cameras', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=50, help='peticiones por cámara')
+    parser.add_argument('--width', type=int, default=640)
+    parser.add_argument('--height', type=int, default=360)
+    parser.add_argument('--boxes', type=int, default=10)
+    parser.add_argument('--infer-ms', type=float, default=20.)
+    parser.add_argument('--frame-ms', type=float, default=2.)
+    parser.add_argument('--interval-ms', type=float, default=0.)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 4, 8, 16])
+    parser.add_argument('--max-wait-ms', type=float, default=5.)
+    args = parser.parse_args()
+
+    network = LoadModel(args.boxes, args.infer_ms / 1000, args.frame_ms / 1000)
+    rng = np.random.default_rng(0)
+    frames = [[rng.integers(0, 256, (args.height, args.width, 3), dtype=np.uint8)
+               for _ in range(args.requests)] for _ in range(args.cameras)]
+    interval = args.interval_ms / 1000
+    print(f'{args.cameras} cámaras con {args.requests} peticiones, inferencia de {args.infer_ms} '
+          f'ms por lote y {args.frame_ms} ms por frame')
+    print(f'{"modo":>20} {"frames/s":>10} {"p50 (ms)":>9} {"p95 (ms)":>9} {"lote medio":>11}')
+
+    loop = asyncio.new_event_loop()
+    try:
+        # Frame a frame: cada petición se procesa sola en un hilo.
+        with ThreadPoolExecutor(1) as executor:
+            def detect(frame):
+                return loop.run_in_executor(executor, network.get_image_objects, frame)
+
+            start = time.perf_counter()
+            latencies = loop.run_until_complete(load(detect, frames, interval))
+            report('frame a frame', latencies, time.perf_counter() - start, 1.)
+
+        for batch_size in args.batch_sizes:
+            async def run():
+                async with AsyncDetector(network, batch_size, args.max_wait_ms / 1000) as detector:
+                    return await load(detector.detect, frames, interval), detector.stats
+
+            start = time.perf_counter()
+            latencies, stats = loop.run_until_complete(run())
+            report(f'AsyncDetector ({batch_size})', latencies, time.perf_counter() - start,
+                   stats.mean_batch_size)
+    finally:
+        loop.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""Benchmark del formato binario de detecciones frente a pickle.
+
+Genera las detecciones sintéticas de una secuencia, las guarda con ``save_objects_detections``
+(pickle de ``List[List[Object]]``) y con ``save_detections`` (formato binario), y compara el
+tamaño de los archivos, el tiempo de carga y el tiempo de leer unos pocos frames.
+
+Uso::
+
+    python benchmarks/detections_file.py [--frames 50000] [--objects 20] [--read 10]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from simple_object_detection.detection_batch import DetectionBatch
+from simple_object_detection.utils.detections_file import save_detections, load_detections
+from simple_object_detection.utils.objects_detections import (save_objects_detections,
+                                                              load_objects_detections)
+
+
+def make_detections(num_frames: int, num_objects: int, seed: int = 0) -> DetectionBatch:
+    """Crea un ``DetectionBatch`` sintético con ``num_objects`` detecciones por frame."""
+    rng = np.random.default_rng(seed)
+    num_detections = num_frames * num_objects
+    offsets = np.arange(num_frames + 1, dtype=np.int64) * num_objects
+    return DetectionBatch(np.repeat(np.arange(num_frames, dtype=np.int32), num_objects),
+                          rng.integers(0, 1920, (num_detections, 4), dtype=np.int32),
+                          rng.random(num_detections, dtype=np.float32),
+                          rng.integers(0, 80, num_detections, dtype=np.int32),
+                          offsets)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--frames', type=int, default=50000)
+    parser.add_argument('--objects', type=int, default=20)
+    parser.add_argument('--read', type=int, default=10, help='frames leídos tras abrir')
+    args = parser.parse_args()
+
+    detections = make_detections(args.frames, args.objects)
+    frames_to_read = np.random.default_rng(1).integers(0, args.frames, args.read).tolist()
+    with tempfile.TemporaryDirectory() as folder:
+        pickle_file = os.path.join(folder, 'detections.pkl')
+        binary_file = os.path.join(folder, 'detections.sodd')
+        save_objects_detections(detections.to_objects(), pickle_file, pickle_version=4)
+        save_detections(detections, binary_file)
+
+        print(f'{args.frames} frames x {args.objects} objetos, leyendo {args.read} frames')
+        for name, file_path, loader in [('pickle', pickle_file, load_objects_detections),
+                                        ('binario (memmap)', binary_file, load_detections)]:
+            start = time.perf_counter()
+            loaded = loader(file_path)
+            opened = time.perf_counter()
+            for frame in frames_to_read:
+                objects = loaded[frame]
+                assert len(objects) == args.objects
+            read = time.perf_counter()
+            print(f'{name:>18}: {os.path.getsize(file_path) / 2 ** 20:8.1f} MiB, '
+                  f'abrir {1000 * (opened - start):9.2f} ms, '
+                  f'leer frames {1000 * (read - opened):7.2f} ms')
+            del loaded
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""Benchmark del filtrado de detecciones múltiples.
+
+Compara la implementación anterior de ``filter_objects_avoiding_duplicated`` (todos contra todos)
+con la actual basada en una rejilla uniforme, y con la variante que filtra todos los frames de un
+``DetectionBatch`` a la vez. Comprueba además que todas devuelven el mismo resultado.
+
+Uso::
+
+    python benchmarks/duplicated_filter.py [--frames 5] [--objects 10 100 1000]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from simple_object_detection.detection_batch import DetectionBatch
+from simple_object_detection.utils.objects_detections import (
+    filter_objects_avoiding_duplicated, filter_detections_avoiding_duplicated)
+
+
+def legacy_filter_objects_avoiding_duplicated(objects, max_distance=20):
+    """Copia de la implementación anterior."""
+    removed_objects_id = list()
+    for obj_id, obj_detection in enumerate(objects):
+        for candidate_id, candidate_detection in enumerate(objects):
+            if obj_id == candidate_id:
+                continue
+            if obj_id in removed_objects_id or candidate_id in removed_objects_id:
+                continue
+            p = np.array(obj_detection.center)
+            q = np.array(candidate_detection.center)
+            distance = np.linalg.norm(p - q)
+            if distance <= max_distance:
+                if obj_detection.score > candidate_detection.score:
+                    removed_objects_id.append(candidate_id)
+                else:
+                    removed_objects_id.append(obj_id)
+    return [obj for obj_id, obj in enumerate(objects) if obj_id not in removed_objects_id]
+
+
+def make_detections(num_frames: int, num_objects: int, seed: int = 0) -> DetectionBatch:
+    """Crea detecciones sintéticas en una imagen 1920x1080 con puntuaciones repetidas."""
+    rng = np.random.default_rng(seed)
+    num_detections = num_frames * num_objects
+    xywh = np.column_stack([rng.integers(0, 1920, num_detections),
+                            rng.integers(0, 1080, num_detections),
+                            rng.integers(10, 100, (num_detections, 2))]).astype(np.int32)
+    scores = rng.integers(0, 10, num_detections).astype(np.float32) / 10
+    return DetectionBatch(np.repeat(np.arange(num_frames, dtype=np.int32), num_objects),
+                          xywh, scores, np.zeros(num_detections, dtype=np.int32),
+                          np.arange(num_frames + 1, dtype=np.int64) * num_objects)
+
+
+def key(objects):
+    return [(obj.center, obj.score) for obj in objects]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--frames', type=int, default=5)
+    parser.add_argument('--objects', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--max-distance', type=int, default=20)
+    args = parser.parse_args()
+
+    for num_objects in args.objects:
+        detections = make_detections(args.frames, num_objects)
+        frames_objects = detections.to_objects()
+        timings = {}
+        results = {}
+        for name, function in [
+            ('anterior', lambda: [legacy_filter_objects_avoiding_duplicated(o, args.max_distance)
+                                  for o in frames_objects]),
+            ('rejilla', lambda: [filter_objects_avoiding_duplicated(o, args.max_distance)
+                                 for o in frames_objects]),
+            ('secuencia', lambda: filter_detections_avoiding_duplicated(detections,
+                                                                        args.max_distance)),
+        ]:
+            start = time.perf_counter()
+            results[name] = [key(objects) for objects in function()]
+            timings[name] = (time.perf_counter() - start) / args.frames
+        assert results['anterior'] == results['rejilla'] == results['secuencia'], \
+            'Los resultados del filtrado no coinciden.'
+        print(f'{num_objects:5d} objetos/frame: ' +
+              ', '.join(f'{name} {1000 * seconds:9.3f} ms/frame'
+                        for name, seconds in timings.items()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""Benchmark del tiempo de importación de los módulos del paquete (``python -X importtime``).
+
+Importa cada módulo en un intérprete nuevo, muestra su tiempo de importación acumulado y
+comprueba que no importa dependencias pesadas (OpenCV, PyTorch, torchvision, tqdm), que solo se
+deben importar al utilizarse. Termina con un código de error si algún módulo las importa, así que
+puede utilizarse como comprobación en la integración continua.
+
+Uso::
+
+    python benchmarks/import_time.py [--repeat 3]
+"""
+import argparse
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+# Dependencias que no deben importarse al importar el paquete.
+HEAVY_MODULES = ['cv2', 'torch', 'torchvision', 'tqdm']
+
+# Módulos que deben poder importarse sin las dependencias pesadas.
+LIGHT_MODULES = [
+    'simple_object_detection',
+    'simple_object_detection.utils',
+    'simple_object_detection.utils.video',
+    'simple_object_detection.models',
+    'simple_object_detection.detection_model',
+    'simple_object_detection.utils.detections_file',
+    'simple_object_detection.utils.objects_detections',
+]
+
+
+def import_time(module: str) -> Tuple[float, Dict[str, float]]:
+    """Importa un módulo en un intérprete nuevo con ``-X importtime``.
+
+    :param module: nombre del módulo.
+    :return: tiempo acumulado (segundos) de la importación del módulo y tiempo acumulado de cada
+    módulo importado.
+    """
+    process = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                             stderr=subprocess.PIPE, universal_newlines=True, check=True)
+    modules = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = int(cumulative) / 1e6
+    return modules[module], modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    failures: List[str] = []
+    print(f'{"módulo":>50} {"importación (ms)":>17}  dependencias pesadas')
+    for module in LIGHT_MODULES:
+        times = []
+        for _ in range(args.repeat):
+            seconds, modules = import_time(module)
+            times.append(seconds)
+        heavy = [name for name in HEAVY_MODULES if name in modules]
+        print(f'{module:>50} {1000 * min(times):17.1f}  {", ".join(heavy) or "-"}')
+        if heavy:
+            failures.append(module)
+    if failures:
+        print(f'\nMódulos que importan dependencias pesadas: {", ".join(failures)}')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
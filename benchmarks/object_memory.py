@@ -0,0 +1,92 @@
+"""Benchmark de memoria de las detecciones de una secuencia sintética.
+
+Construye una secuencia de un millón de detecciones (por defecto) y mide con ``tracemalloc`` la
+memoria que ocupan con la clase ``Object`` anterior (con ``__dict__`` y caja delimitadora
+calculada al crearla), con la clase ``Object`` actual y con un ``DetectionBatch``. También
+compara el tamaño de los archivos pickle.
+
+Uso::
+
+    python benchmarks/object_memory.py [--frames 20000] [--objects 50]
+"""
+import argparse
+import gc
+import pickle
+import random
+import tracemalloc
+
+from simple_object_detection.detection_batch import DetectionBatch
+from simple_object_detection.object import Object
+from simple_object_detection.typing import Point2D, BoundingBox
+
+
+class LegacyObject:
+    """Copia de la implementación anterior de ``Object``."""
+    def __init__(self, index, center, width, height, score, label, **kwargs):
+        self.index = index
+        self._center = center
+        self._bounding_box = self._create_bounding_box(center, width, height)
+        self.width = width
+        self.height = height
+        self.score = score
+        self.label = label
+        self.other_properties = kwargs
+
+    @staticmethod
+    def _create_bounding_box(center, width, height):
+        center_x, center_y = center
+        x_left, x_right = int(center_x - (width / 2)), int(center_x + (width / 2))
+        y_top, y_bottom = int(center_y - (height / 2)), int(center_y + (height / 2))
+        return BoundingBox(Point2D(x_left, y_top), Point2D(x_right, y_top),
+                           Point2D(x_right, y_bottom), Point2D(x_left, y_bottom))
+
+
+def make_sequence(object_cls, num_frames, num_objects, seed=0):
+    """Crea las detecciones sintéticas de una secuencia."""
+    rng = random.Random(seed)
+    return [[object_cls(index=index,
+                        center=Point2D(rng.randrange(1920), rng.randrange(1080)),
+                        width=rng.randrange(10, 200),
+                        height=rng.randrange(10, 200),
+                        score=rng.random(),
+                        label='car')
+             for index in range(num_objects)]
+            for _ in range(num_frames)]
+
+
+def measure(builder):
+    """Devuelve el resultado de ``builder`` y la memoria (bytes) que ocupa."""
+    gc.collect()
+    tracemalloc.start()
+    result = builder()
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--frames', type=int, default=20000)
+    parser.add_argument('--objects', type=int, default=50)
+    args = parser.parse_args()
+
+    num_detections = args.frames * args.objects
+    print(f'{args.frames} frames x {args.objects} objetos = {num_detections} detecciones')
+    builders = [
+        ('Object anterior', lambda: make_sequence(LegacyObject, args.frames, args.objects)),
+        ('Object (__slots__)', lambda: make_sequence(Object, args.frames, args.objects)),
+        ('DetectionBatch', lambda: DetectionBatch.from_objects(
+            make_sequence(Object, args.frames, args.objects))),
+    ]
+    for name, builder in builders:
+        detections, size = measure(builder)
+        pickled = len(pickle.dumps(detections, 4))
+        print(f'{name:>20}: {size / 2 ** 20:9.1f} MiB en memoria '
+              f'({size / num_detections:6.1f} B/detección), '
+              f'pickle {pickled / 2 ** 20:8.1f} MiB')
+        del detections
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""Benchmark de ``OpenCVDNNModel`` (ONNX con ``cv2.dnn``) frente al camino de PyTorch.
+
+Ejecuta el mismo modelo YOLOv5 con PyTorch (modelo local de TorchScript, o el de torch-hub con
+``--online``) y con ``cv2.dnn`` sobre los mismos frames de un vídeo sintético (o de ``--video``),
+y muestra el rendimiento de cada uno y la diferencia entre sus detecciones.
+
+Con ``--export`` se descargan los modelos de torch-hub y se exportan a ``--models-path`` antes de
+medir.
+
+Uso::
+
+    python benchmarks/opencv_dnn.py --models-path models [--model yolov5s] [--export]
+        [--frames 64] [--batch-size 8] [--threads 4] [--online] [--video video.mp4]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from simple_object_detection.models import yolo, opencv_dnn
+from simple_object_detection.utils.video import StreamSequence
+
+from synthetic import make_video
+
+
+def find_model(module, base_class, model_name: str):
+    """Busca la clase de ``module`` derivada de ``base_class`` para el modelo ``model_name``."""
+    for value in vars(module).values():
+        if isinstance(value, type) and issubclass(value, base_class) and \
+                value is not base_class and \
+                getattr(value, 'hub_name', getattr(value, 'model_name', None)) == model_name:
+            return value
+    raise SystemExit(f'No existe el modelo {model_name}.')
+
+
+def run(network, frames: np.ndarray, batch_size: int):
+    """Detecta los objetos de todos los frames y devuelve las detecciones y los frames/s."""
+    # Calentamiento.
+    network.get_images_detections(frames[:batch_size])
+    batches = []
+    start = time.perf_counter()
+    for index in range(0, len(frames), batch_size):
+        batches.append(network.get_images_detections(frames[index:index + batch_size]))
+    seconds = time.perf_counter() - start
+    return batches, len(frames) / seconds
+
+
+def compare(reference, other) -> str:
+    """Resume la diferencia entre dos listas de lotes de detecciones."""
+    count_reference = sum(batch.num_detections for batch in reference)
+    count_other = sum(batch.num_detections for batch in other)
+    differences = []
+    for batch_reference, batch_other in zip(reference, other):
+        for frame in range(len(batch_reference)):
+            xywh_reference, _, _ = batch_reference.frame_detections(frame)
+            xywh_other, _, _ = batch_other.frame_detections(frame)
+            if len(xywh_reference) == len(xywh_other) and len(xywh_reference):
+                differences.append(np.abs(xywh_reference - xywh_other).mean())
+    mean_difference = np.mean(differences) if differences else 0.
+    return (f'{count_other} detecciones (referencia {count_reference}), '
+            f'diferencia media de las cajas {mean_difference:.2f} px')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--models-path', required=True)
+    parser.add_argument('--model', default='yolov5s')
+    parser.add_argument('--export', action='store_true')
+    parser.add_argument('--online', action='store_true')
+    parser.add_argument('--video', default=None)
+    parser.add_argument('--frames', type=int, default=64)
+    parser.add_argument('--batch-size', type=int, default=8)
+    parser.add_argument('--threads', type=int, default=None)
+    args = parser.parse_args()
+
+    import cv2
+    import torch
+    if args.threads is not None:
+        torch.set_num_threads(args.threads)
+        cv2.setNumThreads(args.threads)
+
+    torch_class = find_model(yolo, yolo.YOLOv5Model, args.model)
+    dnn_class = find_model(opencv_dnn, opencv_dnn.OpenCVDNNModel, args.model)
+    if args.export:
+        print(f'Exportado {torch_class.export(args.models_path)}')
+        print(f'Exportado {dnn_class.export(args.models_path)}')
+    torch_class.models_path = args.models_path
+    dnn_class.models_path = args.models_path
+
+    with tempfile.TemporaryDirectory() as folder:
+        video = args.video or make_video(os.path.join(folder, 'video.avi'), args.frames)
+        sequence = StreamSequence(video)
+        frames = sequence.get_frames(0, min(args.frames, len(sequence)))
+        sequence.release()
+
+    networks = [('torch (TorchScript)', torch_class(use_local=True)),
+                ('cv2.dnn (ONNX)', dnn_class())]
+    if args.online:
+        networks.insert(0, ('torch (torch-hub)', torch_class()))
+    print(f'{len(frames)} frames, lotes de {args.batch_size}, modelo {args.model}')
+    reference = None
+    for name, network in networks:
+        batches, fps = run(network, frames, args.batch_size)
+        summary = compare(reference, batches) if reference is not None else 'referencia'
+        print(f'{name:>20}: {fps:8.2f} frames/s  {summary}')
+        if reference is None:
+            reference = batches
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""Benchmark de la decodificación en varios procesos de ``ParallelStreamSequence``.
+
+Compara la iteración y ``iter_batches`` de ``StreamSequence`` (un único decodificador) con las
+de ``ParallelStreamSequence`` para cada número de procesos de ``--workers``, sobre un vídeo
+sintético. Comprueba además que los frames obtenidos son los mismos.
+
+Uso::
+
+    python benchmarks/parallel_decoding.py [--frames 500] [--width 1280] [--height 720]
+        [--workers 1 2 4] [--chunk-size 16] [--ring-size 32]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from simple_object_detection.utils.video import ParallelStreamSequence, StreamSequence
+
+from synthetic import make_video
+
+
+def checksum(sequence: StreamSequence) -> int:
+    """Suma de una muestra de los píxeles de todos los frames de la secuencia."""
+    return sum(int(frame[::64, ::64].sum()) for frame in sequence)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--frames', type=int, default=500)
+    parser.add_argument('--width', type=int, default=1280)
+    parser.add_argument('--height', type=int, default=720)
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--chunk-size', type=int, default=16)
+    parser.add_argument('--ring-size', type=int, default=32)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        video = make_video(os.path.join(folder, 'video.avi'), args.frames, args.width,
+                           args.height)
+
+        def iterated(sequence):
+            for _ in sequence:
+                pass
+
+        def batches(sequence):
+            for _ in sequence.iter_batches(args.batch_size, reuse_buffer=True):
+                pass
+
+        sequences = [('StreamSequence', lambda: StreamSequence(video))]
+        for workers in args.workers:
+            sequences.append((f'Parallel ({workers} procesos)',
+                              lambda workers=workers: ParallelStreamSequence(
+                                  video, num_workers=workers, chunk_size=args.chunk_size,
+                                  ring_size=args.ring_size)))
+
+        print(f'{args.frames} frames de {args.width}x{args.height}, {os.cpu_count()} CPUs')
+        print(f'{"secuencia":>28} {"iteración":>12} {"iter_batches":>14}  frames/s')
+        reference = None
+        for name, create in sequences:
+            sequence = create()
+            rates = []
+            for function in (iterated, batches):
+                start = time.perf_counter()
+                function(sequence)
+                rates.append(len(sequence) / (time.perf_counter() - start))
+            total = checksum(sequence)
+            reference = total if reference is None else reference
+            mark = '' if total == reference else '  (frames distintos)'
+            print(f'{name:>28} {rates[0]:12.1f} {rates[1]:14.1f}{mark}')
+            sequence.release()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""Benchmark de ``generate_objects_detections`` secuencial frente al pipeline por etapas.
+
+Utiliza un vídeo sintético y un modelo sin red neuronal cuya inferencia se simula con una espera
+de ``--infer-ms`` milisegundos por lote, para comprobar que la decodificación y el postprocesado
+se solapan con la inferencia. Muestra también las estadísticas de cada etapa del pipeline.
+
+Uso::
+
+    python benchmarks/pipeline.py [--frames 300] [--batch-size 8] [--infer-ms 40]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from simple_object_detection.detection_model import DetectionModel
+from simple_object_detection.utils import Pipeline, generate_objects_detections
+from simple_object_detection.utils.video import StreamSequence
+
+from synthetic import make_video
+
+
+class SleepModel(DetectionModel):
+    """Modelo sin red neuronal que tarda ``delay`` segundos en cada lote y no detecta nada."""
+    def __init__(self, delay: float):
+        self.delay = delay
+        super().__init__()
+
+    def _load_local(self):
+        return self._load_online()
+
+    def _load_online(self):
+        return object()
+
+    def _get_outputs(self, images):
+        time.sleep(self.delay)
+        return [np.empty((0, 6), dtype=np.float32) for _ in images]
+
+    def _calculate_number_detections(self, output, *args, **kwargs):
+        return len(output)
+
+    def _calculate_object_position(self, object_output, object_id, image, *args, **kwargs):
+        raise NotImplementedError
+
+    def _calculate_score(self, object_output, object_id, *args, **kwargs):
+        raise NotImplementedError
+
+    def _calculate_label(self, object_output, object_id, *args, **kwargs):
+        raise NotImplementedError
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--frames', type=int, default=300)
+    parser.add_argument('--width', type=int, default=1280)
+    parser.add_argument('--height', type=int, default=720)
+    parser.add_argument('--batch-size', type=int, default=8)
+    parser.add_argument('--infer-ms', type=float, default=40.)
+    parser.add_argument('--queue-size', type=int, default=2)
+    args = parser.parse_args()
+
+    network = SleepModel(args.infer_ms / 1000)
+    with tempfile.TemporaryDirectory() as folder:
+        video = make_video(os.path.join(folder, 'video.avi'), args.frames, args.width,
+                           args.height)
+        print(f'{args.frames} frames de {args.width}x{args.height}, lotes de {args.batch_size}, '
+              f'inferencia de {args.infer_ms} ms por lote')
+        pipeline = Pipeline(args.queue_size)
+        for name, kwargs in [('secuencial', {}), ('pipeline', {'pipeline': pipeline})]:
+            sequence = StreamSequence(video)
+            start = time.perf_counter()
+            generate_objects_detections(network, sequence, args.batch_size, **kwargs)
+            seconds = time.perf_counter() - start
+            print(f'{name:>12}: {args.frames / seconds:8.1f} frames/s')
+            sequence.release()
+
+    stats = pipeline.stats
+    print(f'\nCuello de botella: {stats.bottleneck}')
+    print(f'{"etapa":>12} {"trabajo (s)":>12} {"espera entrada (s)":>19} '
+          f'{"espera salida (s)":>18} {"ocupación":>10}')
+    for stage in stats.stages:
+        print(f'{stage.name:>12} {stage.busy_time:12.3f} {stage.input_wait_time:19.3f} '
+              f'{stage.output_wait_time:18.3f} {stage.queue_occupancy:6.2f}/{stage.queue_size}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""Microbenchmark del postprocesado de las salidas de ``PyTorchHubModel``.
+
+Compara el coste por frame de convertir las salidas de la red (tensores xywh) en detecciones con
+el camino anterior, que crea un ``Object`` por caja con conversiones escalares, y con el camino
+vectorizado que mueve cada lote a NumPy una sola vez.
+
+Uso::
+
+    python benchmarks/postprocessing.py [--frames 100] [--boxes 50] [--repeat 5]
+"""
+import argparse
+import timeit
+
+import numpy as np
+import torch
+
+from simple_object_detection.detection_model import PyTorchHubModel
+
+
+class BenchmarkModel(PyTorchHubModel):
+    """Modelo sin red neuronal, solo se utiliza su postprocesado."""
+    size = 640
+
+    def _load_local(self):
+        return self._load_online()
+
+    def _load_online(self):
+        return object()
+
+
+def make_outputs(num_frames: int, num_boxes: int, seed: int = 0):
+    """Crea salidas sintéticas con el formato de ``torch_outputs.xywh``."""
+    generator = torch.Generator().manual_seed(seed)
+    outputs = []
+    for _ in range(num_frames):
+        xywh = torch.rand(num_boxes, 4, generator=generator) * 600
+        scores = torch.rand(num_boxes, 1, generator=generator)
+        classes = torch.randint(0, 80, (num_boxes, 1), generator=generator).float()
+        outputs.append(torch.cat([xywh, scores, classes], dim=1))
+    return outputs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--frames', type=int, default=100)
+    parser.add_argument('--boxes', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    model = BenchmarkModel()
+    outputs = make_outputs(args.frames, args.boxes)
+    images = [np.zeros((1, 1, 3), dtype=np.uint8)] * args.frames
+
+    def per_object():
+        return [model._get_objects(output, image) for image, output in zip(images, outputs)]
+
+    def vectorized():
+        return model._get_batch_detections(outputs, images)
+
+    def vectorized_objects():
+        return model._get_batch_detections(outputs, images).to_objects()
+
+    # Ambos caminos deben producir las mismas detecciones.
+    expected = [[(o.center, o.width, o.height, o.score, o.label) for o in objects]
+                for objects in per_object()]
+    obtained = [[(o.center, o.width, o.height, o.score, o.label) for o in objects]
+                for objects in vectorized_objects()]
+    assert expected == obtained, 'Los dos caminos de postprocesado no coinciden.'
+
+    print(f'{args.frames} frames, {args.boxes} cajas por frame')
+    for name, function in [('por objeto (anterior)', per_object),
+                           ('vectorizado', vectorized),
+                           ('vectorizado + Object', vectorized_objects)]:
+        seconds = min(timeit.repeat(function, number=1, repeat=args.repeat))
+        print(f'{name:>24}: {1000 * seconds / args.frames:8.4f} ms/frame')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""Comparación de precisión y latencia de los modos de inferencia de ``PyTorchHubModel``.
+
+Ejecuta un modelo YOLOv5 en float32 (referencia) y en cada modo de inferencia (bfloat16, int8
+dinámico, *channels last* e ``inference_mode``) sobre los mismos frames de un clip de
+referencia (``--video``, o un vídeo sintético). Muestra la latencia por lote y la coincidencia
+de las detecciones con las de la referencia: proporción de cajas emparejadas (misma clase e
+IoU >= ``--iou``) respecto al total de cajas de ambos.
+
+Uso::
+
+    python benchmarks/precision_modes.py [--model yolov5s] [--models-path models]
+        [--video clip.mp4] [--frames 32] [--batch-size 8] [--threads 4]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from simple_object_detection.models import yolo
+from simple_object_detection.utils.video import StreamSequence
+
+from synthetic import make_video
+
+MODES = [
+    ('float32', {}),
+    ('bfloat16', {'precision': 'bfloat16'}),
+    ('int8', {'precision': 'int8'}),
+    ('channels_last', {'channels_last': True}),
+    ('inference_mode', {'inference_mode': True}),
+    ('bfloat16+channels_last', {'precision': 'bfloat16', 'channels_last': True,
+                                'inference_mode': True}),
+]
+
+
+def iou_matrix(xywh_a: np.ndarray, xywh_b: np.ndarray) -> np.ndarray:
+    """IoU entre todas las cajas (centro, ancho, alto) de ``xywh_a`` y ``xywh_b``."""
+    def corners(xywh):
+        xywh = xywh.astype(np.float64)
+        return np.concatenate([xywh[:, :2] - xywh[:, 2:] / 2, xywh[:, :2] + xywh[:, 2:] / 2], 1)
+    a, b = corners(xywh_a)[:, None], corners(xywh_b)[None]
+    intersection = np.prod(np.clip(np.minimum(a[..., 2:], b[..., 2:]) -
+                                   np.maximum(a[..., :2], b[..., :2]), 0, None), axis=-1)
+    area_a = np.prod(a[..., 2:] - a[..., :2], axis=-1)
+    area_b = np.prod(b[..., 2:] - b[..., :2], axis=-1)
+    return intersection / np.maximum(area_a + area_b - intersection, 1e-9)
+
+
+def agreement(reference, other, iou_threshold: float) -> float:
+    """Proporción de cajas emparejadas entre dos lotes de detecciones (F1 respecto a la
+    referencia)."""
+    matched, total = 0, 0
+    for frame in range(len(reference)):
+        xywh_r, _, classes_r = reference.frame_detections(frame)
+        xywh_o, _, classes_o = other.frame_detections(frame)
+        total += len(xywh_r) + len(xywh_o)
+        if len(xywh_r) == 0 or len(xywh_o) == 0:
+            continue
+        ious = iou_matrix(xywh_r, xywh_o)
+        ious[classes_r[:, None] != classes_o[None]] = 0
+        # Emparejamiento voraz de mayor a menor IoU.
+        while True:
+            row, column = np.unravel_index(np.argmax(ious), ious.shape)
+            if ious[row, column] < iou_threshold:
+                break
+            matched += 1
+            ious[row, :] = 0
+            ious[:, column] = 0
+    return 2 * matched / total if total else 1.
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--model', default='yolov5s')
+    parser.add_argument('--models-path', default=None)
+    parser.add_argument('--video', default=None)
+    parser.add_argument('--frames', type=int, default=32)
+    parser.add_argument('--batch-size', type=int, default=8)
+    parser.add_argument('--threads', type=int, default=None)
+    parser.add_argument('--iou', type=float, default=0.5)
+    args = parser.parse_args()
+
+    import torch
+    if args.threads is not None:
+        torch.set_num_threads(args.threads)
+    model_class = next(value for value in vars(yolo).values()
+                       if isinstance(value, type) and issubclass(value, yolo.YOLOv5Model) and
+                       getattr(value, 'hub_name', None) == args.model)
+    if args.models_path is not None:
+        model_class.models_path = args.models_path
+
+    with tempfile.TemporaryDirectory() as folder:
+        video = args.video or make_video(os.path.join(folder, 'video.avi'), args.frames)
+        sequence = StreamSequence(video)
+        frames = sequence.get_frames(0, min(args.frames, len(sequence)))
+        sequence.release()
+
+    print(f'{len(frames)} frames, lotes de {args.batch_size}, modelo {args.model}')
+    print(f'{"modo":>24} {"ms/lote":>9} {"coincidencia":>13}')
+    reference = None
+    for name, options in MODES:
+        network = model_class(use_local=args.models_path is not None, **options)
+        # Calentamiento.
+        network.get_images_detections(frames[:args.batch_size])
+        batches, times = [], []
+        for index in range(0, len(frames), args.batch_size):
+            start = time.perf_counter()
+            batches.append(network.get_images_detections(frames[index:index + args.batch_size]))
+            times.append(time.perf_counter() - start)
+        if reference is None:
+            reference = batches
+        score = np.mean([agreement(batch_r, batch_o, args.iou)
+                         for batch_r, batch_o in zip(reference, batches)])
+        print(f'{name:>24} {1000 * np.median(times):9.1f} {score:13.3f}')
+
+
+if __name__ == '__main__':
+    main()
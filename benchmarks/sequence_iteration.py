@@ -0,0 +1,72 @@
+"""Benchmark de la lectura secuencial de ``StreamSequence``.
+
+Compara la lectura por índice (``sequence[i]``, que posiciona el stream en cada fallo de caché)
+con la iteración secuencial (``for frame in sequence``), con ``iter_batches`` y con el slicing
+(``sequence[a:b]``), sobre un vídeo sintético. También mide la iteración con un paso entre frames
+(``stride``), expresada en frames del vídeo original recorridos por segundo.
+
+Uso::
+
+    python benchmarks/sequence_iteration.py [--frames 500] [--width 1280] [--height 720]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from simple_object_detection.utils.video import StreamSequence
+
+from synthetic import make_video
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--frames', type=int, default=500)
+    parser.add_argument('--width', type=int, default=1280)
+    parser.add_argument('--height', type=int, default=720)
+    parser.add_argument('--cache-size', type=int, default=100)
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--stride', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        video = make_video(os.path.join(folder, 'video.avi'), args.frames, args.width,
+                           args.height)
+
+        def indexed(sequence):
+            for frame_id in range(len(sequence)):
+                sequence[frame_id]
+
+        def iterated(sequence):
+            for _ in sequence:
+                pass
+
+        def batches(sequence):
+            for _ in sequence.iter_batches(args.batch_size, reuse_buffer=True):
+                pass
+
+        def strided(sequence):
+            sequence.set_stride(args.stride)
+            for _ in sequence:
+                pass
+
+        def sliced(sequence):
+            for start in range(0, len(sequence), args.batch_size):
+                sequence[start:start + args.batch_size]
+
+        print(f'{args.frames} frames de {args.width}x{args.height}')
+        for name, function in [('por índice', indexed),
+                               ('iteración', iterated),
+                               (f'iter_batches({args.batch_size})', batches),
+                               (f'slicing [i:i+{args.batch_size}]', sliced),
+                               (f'stride {args.stride}', strided)]:
+            sequence = StreamSequence(video, cache_size=args.cache_size)
+            start = time.perf_counter()
+            function(sequence)
+            seconds = time.perf_counter() - start
+            print(f'{name:>18}: {args.frames / seconds:8.1f} frames/s')
+            sequence.release()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,272 @@
+"""Suite de benchmarks sin conexión para comparar el rendimiento entre versiones.
+
+Genera un vídeo sintético (``--width``, ``--height``, ``--frames``) y detecciones sintéticas, y
+utiliza un modelo sin red neuronal con cajas deterministas (``StubModel``), así que no necesita
+descargar modelos ni datos. Mide:
+
+- La lectura secuencial (iteración e ``iter_batches``) y aleatoria de ``StreamSequence``.
+- ``generate_detections`` de principio a fin, secuencial y con ``Pipeline``.
+- Cada función ``filter_objects_*`` (y ``filter_detections_avoiding_duplicated``).
+- Guardar y cargar detecciones en el formato binario y con pickle.
+
+Cada caso se repite ``--repeat`` veces y se guarda la mediana y el mínimo del tiempo, junto con el
+rendimiento (elementos por segundo), en un archivo JSON (``--output``) con la versión del código
+(``git describe``) y del entorno. Con ``--compare`` se comparan los resultados con los de otro
+archivo y se termina con un código de error si algún caso es más lento que ``--tolerance`` veces
+el anterior.
+
+Uso::
+
+    python benchmarks/suite.py [--output results.json] [--compare baseline.json]
+        [--frames 200] [--width 1280] [--height 720] [--repeat 5] [--only filter]
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, NamedTuple, Tuple
+
+import numpy as np
+
+from simple_object_detection.utils import Pipeline
+from simple_object_detection.utils.detections_file import load_detections, save_detections
+from simple_object_detection.utils.objects_detections import (
+    filter_detections_avoiding_duplicated, filter_objects_avoiding_duplicated,
+    filter_objects_by_classes, filter_objects_by_min_score, filter_objects_inside_mask_region,
+    generate_detections, load_objects_detections, save_objects_detections)
+from simple_object_detection.utils.video import StreamSequence
+
+from synthetic import StubModel, make_detections, make_video
+
+# Versión del formato del archivo de resultados.
+RESULTS_VERSION = 1
+
+
+class Case(NamedTuple):
+    """Caso de la suite."""
+    name: str
+    # Función que ejecuta el caso una vez.
+    function: Callable[[], object]
+    # Elementos procesados en cada ejecución y su unidad.
+    items: int
+    unit: str
+
+
+def measure(case: Case, repeat: int) -> Dict[str, float]:
+    """Ejecuta un caso ``repeat`` veces (después de una ejecución de calentamiento).
+
+    :param case: caso de la suite.
+    :param repeat: número de repeticiones.
+    :return: mediana y mínimo del tiempo (segundos) y rendimiento según la mediana.
+    """
+    case.function()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        case.function()
+        times.append(time.perf_counter() - start)
+    median = statistics.median(times)
+    return {'median': median, 'min': min(times), 'repeat': repeat, 'items': case.items,
+            'unit': case.unit, 'rate': case.items / median if median else float('inf')}
+
+
+def make_cases(video: str, folder: str, args: argparse.Namespace) -> List[Case]:
+    """Crea los casos de la suite.
+
+    :param video: vídeo sintético.
+    :param folder: carpeta temporal para los archivos de detecciones.
+    :param args: argumentos de la línea de comandos.
+    :return: casos de la suite.
+    """
+    cases = []
+    probe = StreamSequence(video)
+    num_frames = len(probe)
+    probe.release()
+
+    def on_sequence(function: Callable[[StreamSequence], object]) -> Callable[[], None]:
+        """Ejecuta ``function`` sobre una secuencia nueva del vídeo (con la caché vacía)."""
+        def run():
+            sequence = StreamSequence(video)
+            function(sequence)
+            sequence.release()
+        return run
+
+    # Lectura de la secuencia.
+    def sequential(sequence):
+        for _ in sequence:
+            pass
+
+    def batches(sequence):
+        for _ in sequence.iter_batches(args.batch_size, reuse_buffer=True):
+            pass
+
+    random_frames = np.random.default_rng(0).integers(0, num_frames, args.random_reads).tolist()
+
+    def random_access(sequence):
+        for frame in random_frames:
+            sequence[frame]
+
+    cases += [Case('sequence.iterate', on_sequence(sequential), num_frames, 'frames'),
+              Case('sequence.iter_batches', on_sequence(batches), num_frames, 'frames'),
+              Case('sequence.random_access', on_sequence(random_access), len(random_frames),
+                   'frames')]
+
+    # Detección de principio a fin.
+    network = StubModel(args.boxes)
+
+    def detections(**kwargs):
+        return on_sequence(lambda sequence: generate_detections(
+            network, sequence, args.batch_size, **kwargs))
+
+    cases += [Case('detections.serial', detections(), num_frames, 'frames'),
+              Case('detections.pipeline', detections(pipeline=Pipeline()), num_frames, 'frames')]
+
+    # Filtros.
+    batch = make_detections(args.filter_frames, args.objects, args.width, args.height)
+    frames_objects = batch.to_objects()
+    num_objects = batch.num_detections
+    classes = ['car', 'truck', 'bus']
+    mask = np.zeros((args.height, args.width, 3), dtype=np.uint8)
+    mask[args.height // 3:, :] = 255
+    cases += [
+        Case('filter.by_classes',
+             lambda: [filter_objects_by_classes(objects, classes) for objects in frames_objects],
+             num_objects, 'objects'),
+        Case('filter.by_min_score',
+             lambda: [filter_objects_by_min_score(objects, 0.5) for objects in frames_objects],
+             num_objects, 'objects'),
+        Case('filter.avoiding_duplicated',
+             lambda: [filter_objects_avoiding_duplicated(objects) for objects in frames_objects],
+             num_objects, 'objects'),
+        Case('filter.detections_avoiding_duplicated',
+             lambda: filter_detections_avoiding_duplicated(batch), num_objects, 'objects'),
+        Case('filter.inside_mask_region',
+             lambda: [filter_objects_inside_mask_region(objects, mask)
+                      for objects in frames_objects],
+             num_objects, 'objects'),
+    ]
+
+    # Serialización.
+    saved = make_detections(args.serialization_frames, args.objects, args.width, args.height)
+    binary_file = os.path.join(folder, 'detections.sodd')
+    pickle_file = os.path.join(folder, 'detections.pkl')
+    saved_objects = saved.to_objects()
+    save_detections(saved, binary_file)
+    save_objects_detections(saved_objects, pickle_file)
+
+    def load_binary():
+        # Cargar sin proyectar en memoria para medir la lectura completa.
+        load_detections(binary_file, mmap=False)
+
+    frames = len(saved)
+    cases += [
+        Case('serialization.save_binary', lambda: save_detections(saved, binary_file),
+             frames, 'frames'),
+        Case('serialization.load_binary', load_binary, frames, 'frames'),
+        Case('serialization.save_pickle',
+             lambda: save_objects_detections(saved_objects, pickle_file), frames, 'frames'),
+        Case('serialization.load_pickle', lambda: load_objects_detections(pickle_file),
+             frames, 'frames'),
+    ]
+    return [case for case in cases
+            if not args.only or any(pattern in case.name for pattern in args.only)]
+
+
+def environment() -> Dict[str, str]:
+    """Versión del código y del entorno en el que se ejecuta la suite.
+    """
+    try:
+        revision = subprocess.run(['git', 'describe', '--always', '--dirty'],
+                                  stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                  universal_newlines=True, check=True,
+                                  cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        revision = None
+    import cv2
+    return {'revision': revision, 'python': platform.python_version(),
+            'numpy': np.__version__, 'opencv': cv2.__version__,
+            'platform': platform.platform(), 'processor': platform.processor(),
+            'cpu_count': os.cpu_count()}
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict],
+            tolerance: float) -> List[Tuple[str, float]]:
+    """Compara la mediana de cada caso con la de los resultados anteriores.
+
+    :param results: resultados actuales.
+    :param baseline: resultados anteriores.
+    :param tolerance: cociente máximo admitido entre el tiempo actual y el anterior.
+    :return: casos más lentos que la tolerancia y su cociente.
+    """
+    regressions = []
+    print(f'\n{"caso":>40} {"anterior (ms)":>14} {"actual (ms)":>12} {"cociente":>9}')
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        ratio = result['median'] / baseline[name]['median']
+        mark = ' <' if ratio > tolerance else ''
+        print(f'{name:>40} {1000 * baseline[name]["median"]:14.2f} '
+              f'{1000 * result["median"]:12.2f} {ratio:9.2f}{mark}')
+        if ratio > tolerance:
+            regressions.append((name, ratio))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--output', default=None)
+    parser.add_argument('--compare', default=None)
+    parser.add_argument('--tolerance', type=float, default=1.2)
+    parser.add_argument('--frames', type=int, default=200)
+    parser.add_argument('--width', type=int, default=1280)
+    parser.add_argument('--height', type=int, default=720)
+    parser.add_argument('--batch-size', type=int, default=8)
+    parser.add_argument('--boxes', type=int, default=10, help='cajas por frame del modelo')
+    parser.add_argument('--random-reads', type=int, default=50)
+    parser.add_argument('--objects', type=int, default=50, help='objetos por frame (filtros)')
+    parser.add_argument('--filter-frames', type=int, default=200)
+    parser.add_argument('--serialization-frames', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--only', nargs='*', default=None,
+                        help='ejecutar solo los casos cuyo nombre contiene alguno de los textos')
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as folder:
+        video = make_video(os.path.join(folder, 'video.avi'), args.frames, args.width,
+                           args.height)
+        cases = make_cases(video, folder, args)
+        print(f'{"caso":>40} {"mediana (ms)":>13} {"mínimo (ms)":>12} {"rendimiento":>20}')
+        for case in cases:
+            result = measure(case, args.repeat)
+            results[case.name] = result
+            print(f'{case.name:>40} {1000 * result["median"]:13.2f} '
+                  f'{1000 * result["min"]:12.2f} {result["rate"]:12.1f} {case.unit}/s')
+
+    report = {'version': RESULTS_VERSION, 'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+              'environment': environment(),
+              'parameters': {name: value for name, value in vars(args).items()
+                             if name not in ('output', 'compare', 'tolerance', 'only')},
+              'results': results}
+    if args.output is not None:
+        with open(args.output, 'w') as output:
+            json.dump(report, output, indent=2)
+    if args.compare is not None:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)
+        if baseline.get('parameters') != report['parameters']:
+            print('\nAviso: los parámetros de los resultados anteriores son distintos.')
+        regressions = compare(results, baseline['results'], args.tolerance)
+        if regressions:
+            print(f'\nCasos más lentos que {args.tolerance}x: '
+                  f'{", ".join(name for name, _ in regressions)}')
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+"""Utilidades para generar datos sintéticos en los benchmarks: vídeos, detecciones y un modelo de
+detección sin red neuronal.
+"""
+import time
+
+import cv2
+import numpy as np
+
+from simple_object_detection.constants import COCO_NAMES
+from simple_object_detection.detection_batch import DetectionBatch
+from simple_object_detection.detection_model import DetectionModel
+from simple_object_detection.typing import Point2D, RelativeBoundingBox
+
+
+def make_video(file_output: str,
+               num_frames: int = 300,
+               width: int = 1280,
+               height: int = 720,
+               fps: float = 25.,
+               fourcc: str = 'MJPG',
+               seed: int = 0) -> str:
+    """Genera un vídeo sintético con rectángulos que se desplazan sobre un fondo con ruido.
+
+    :param file_output: archivo de salida del vídeo.
+    :param num_frames: número de frames.
+    :param width: ancho de los frames.
+    :param height: alto de los frames.
+    :param fps: frames por segundo.
+    :param fourcc: códec del vídeo.
+    :param seed: semilla para el fondo y los rectángulos.
+    :return: ruta al vídeo generado.
+    """
+    rng = np.random.default_rng(seed)
+    background = rng.integers(0, 64, (height, width, 3), dtype=np.uint8)
+    num_boxes = 8
+    positions = rng.integers(0, [width, height], (num_boxes, 2))
+    speeds = rng.integers(-8, 9, (num_boxes, 2))
+    colors = rng.integers(64, 256, (num_boxes, 3)).tolist()
+    writer = cv2.VideoWriter(file_output, cv2.VideoWriter_fourcc(*fourcc), fps, (width, height))
+    for frame_id in range(num_frames):
+        frame = background.copy()
+        for (x, y), (dx, dy), color in zip(positions, speeds, colors):
+            x, y = int((x + dx * frame_id) % width), int((y + dy * frame_id) % height)
+            cv2.rectangle(frame, (x, y), (x + width // 20, y + height // 20), color, -1)
+        writer.write(frame)
+    writer.release()
+    return file_output
+
+
+def make_detections(num_frames: int,
+                    num_objects: int,
+                    width: int = 1920,
+                    height: int = 1080,
+                    seed: int = 0) -> DetectionBatch:
+    """Crea un ``DetectionBatch`` sintético con ``num_objects`` detecciones por frame.
+
+    :param num_frames: número de frames.
+    :param num_objects: detecciones de cada frame.
+    :param width: ancho de la imagen donde se sitúan los centros.
+    :param height: alto de la imagen donde se sitúan los centros.
+    :param seed: semilla de las detecciones.
+    :return: detecciones sintéticas.
+    """
+    rng = np.random.default_rng(seed)
+    num_detections = num_frames * num_objects
+    xywh = np.column_stack([rng.integers(0, width, num_detections),
+                            rng.integers(0, height, num_detections),
+                            rng.integers(10, 200, (num_detections, 2))]).astype(np.int32)
+    return DetectionBatch(np.repeat(np.arange(num_frames, dtype=np.int32), num_objects),
+                          xywh,
+                          rng.random(num_detections, dtype=np.float32),
+                          rng.integers(0, len(COCO_NAMES), num_detections, dtype=np.int32),
+                          np.arange(num_frames + 1, dtype=np.int64) * num_objects)
+
+
+class StubModel(DetectionModel):
+    """Modelo sin red neuronal que devuelve ``boxes`` cajas deterministas por imagen.
+
+    Las cajas dependen solo del contenido de la imagen (de una muestra de sus píxeles), así que
+    el resultado no cambia con el tamaño de lote ni con el orden de las llamadas. Con ``delay``
+    se simula el tiempo de inferencia de cada lote.
+    """
+    def __init__(self, boxes: int = 10, delay: float = 0.):
+        self.boxes = boxes
+        self.delay = delay
+        super().__init__()
+
+    def _load_local(self):
+        return self._load_online()
+
+    def _load_online(self):
+        return object()
+
+    def _get_outputs(self, images):
+        if self.delay:
+            time.sleep(self.delay)
+        outputs = []
+        for image in images:
+            height, width = image.shape[:2]
+            rng = np.random.default_rng(int(image[::32, ::32].sum()))
+            output = np.empty((self.boxes, 6), dtype=np.float32)
+            output[:, 0] = rng.integers(0, width, self.boxes)
+            output[:, 1] = rng.integers(0, height, self.boxes)
+            output[:, 2:4] = rng.integers(10, 100, (self.boxes, 2))
+            output[:, 4] = rng.random(self.boxes)
+            output[:, 5] = rng.integers(0, len(self.class_names), self.boxes)
+            outputs.append(output)
+        return outputs
+
+    def _calculate_number_detections(self, output, *args, **kwargs):
+        return len(output)
+
+    def _calculate_object_position(self, object_output, object_id, image, *args, **kwargs):
+        x, y, width, height = (int(value) for value in object_output[:4])
+        return RelativeBoundingBox(Point2D(x, y), width, height)
+
+    def _calculate_score(self, object_output, object_id, *args, **kwargs):
+        return float(object_output[4])
+
+    def _calculate_label(self, object_output, object_id, *args, **kwargs):
+        return self.class_names[int(object_output[5])]
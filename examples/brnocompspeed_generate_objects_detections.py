@@ -4,54 +4,56 @@ import logging
 import os
 
 from simple_object_detection.models import YOLOv5s, YOLOv5m, YOLOv5l, YOLOv5x
-from simple_object_detection.utils import save_objects_detections, generate_objects_detections
-from simple_object_detection.utils.video import StreamSequence
+from simple_object_detection.utils import DetectionJob, run_detection_jobs
 
 logging.basicConfig(format='%(levelname)s:%(message)s', level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
-session_folder = os.path.abspath(os.getenv('BRNOCOMPSPEED_FOLDER'))
-cache_size = int(os.getenv('CACHE_SIZE', 100))
-batch_size = int(os.getenv('BATCH_SIZE', 100))
-
-sessions = [
-    ('session1_center', os.path.join(session_folder, 'session1_center')),
-    ('session1_left', os.path.join(session_folder, 'session1_left')),
-    ('session1_right', os.path.join(session_folder, 'session1_right')),
-    ('session2_center', os.path.join(session_folder, 'session2_center')),
-    ('session2_left', os.path.join(session_folder, 'session2_left')),
-    ('session2_right', os.path.join(session_folder, 'session2_right')),
-    ('session3_center', os.path.join(session_folder, 'session3_center')),
-    ('session3_left', os.path.join(session_folder, 'session3_left')),
-    ('session3_right', os.path.join(session_folder, 'session3_right')),
-    ('session4_center', os.path.join(session_folder, 'session4_center')),
-    ('session4_left', os.path.join(session_folder, 'session4_left')),
-    ('session4_right', os.path.join(session_folder, 'session4_right')),
-    ('session5_center', os.path.join(session_folder, 'session5_center')),
-    ('session5_left', os.path.join(session_folder, 'session5_left')),
-    ('session5_right', os.path.join(session_folder, 'session5_right')),
-    ('session6_center', os.path.join(session_folder, 'session6_center')),
-    ('session6_left', os.path.join(session_folder, 'session6_left')),
-    ('session6_right', os.path.join(session_folder, 'session6_right')),
-]
 networks = [YOLOv5s, YOLOv5m, YOLOv5l, YOLOv5x,]
 
-for network_cls in networks:
-    # Initialize network
-    network = network_cls()
-    for session in sessions:
-        session_name, session_path = session
-        # Variables.
-        video_file = os.path.join(session_path, 'video.mp4')
-        output_file = os.path.join(session_path, f'{network.__class__.__name__.lower()}.pkl')
-        # Logging.
-        logger.info(f'Generando las detecciones para {session_name}')
-        logger.info(f'Salida en el archivo {output_file}')
-        # Cargar secuencia y realizar detecciones.
-        logger.info(f'Cargando el video {video_file} con un tamaño de buffer de {cache_size}')
-        sequence = StreamSequence(video_file, cache_size=cache_size)
-        logger.info(f'Generando detecciones en lotes de tamaño {batch_size}')
-        objects_detections = generate_objects_detections(network, sequence, batch_size=batch_size,
-                                                         verbose=True)
-        save_objects_detections(objects_detections, output_file, pickle_version=4)
-        logger.info('Detección de objetos terminada.')
+if __name__ == '__main__':
+    # Las variables de entorno se leen solo en el proceso principal: los procesos del planificador
+    # importan de nuevo este módulo.
+    session_folder = os.path.abspath(os.getenv('BRNOCOMPSPEED_FOLDER'))
+    batch_size = os.getenv('BATCH_SIZE', 'auto')
+    batch_size = int(batch_size) if batch_size.isdigit() else batch_size
+    num_workers = int(os.getenv('NUM_WORKERS', 4))
+    torch_threads = int(os.getenv('TORCH_THREADS', 4))
+
+    sessions = [
+        ('session1_center', os.path.join(session_folder, 'session1_center')),
+        ('session1_left', os.path.join(session_folder, 'session1_left')),
+        ('session1_right', os.path.join(session_folder, 'session1_right')),
+        ('session2_center', os.path.join(session_folder, 'session2_center')),
+        ('session2_left', os.path.join(session_folder, 'session2_left')),
+        ('session2_right', os.path.join(session_folder, 'session2_right')),
+        ('session3_center', os.path.join(session_folder, 'session3_center')),
+        ('session3_left', os.path.join(session_folder, 'session3_left')),
+        ('session3_right', os.path.join(session_folder, 'session3_right')),
+        ('session4_center', os.path.join(session_folder, 'session4_center')),
+        ('session4_left', os.path.join(session_folder, 'session4_left')),
+        ('session4_right', os.path.join(session_folder, 'session4_right')),
+        ('session5_center', os.path.join(session_folder, 'session5_center')),
+        ('session5_left', os.path.join(session_folder, 'session5_left')),
+        ('session5_right', os.path.join(session_folder, 'session5_right')),
+        ('session6_center', os.path.join(session_folder, 'session6_center')),
+        ('session6_left', os.path.join(session_folder, 'session6_left')),
+        ('session6_right', os.path.join(session_folder, 'session6_right')),
+    ]
+
+    # Un trabajo por cada red y sesión. Los trabajos ya terminados se omiten y los interrumpidos
+    # continúan desde el último frame completado.
+    jobs = [DetectionJob(video_path=os.path.join(session_path, 'video.mp4'),
+                         model_class=network_cls,
+                         file_output=os.path.join(session_path,
+                                                  f'{network_cls.__name__.lower()}.sodd'),
+                         batch_size=batch_size)
+            for network_cls in networks
+            for _, session_path in sessions]
+    logger.info(f'Generando detecciones de {len(jobs)} trabajos con {num_workers} procesos y '
+                f'{torch_threads} hilos de PyTorch por proceso')
+    report = run_detection_jobs(jobs, num_workers=num_workers, torch_threads=torch_threads,
+                                verbose=True)
+    logger.info(f'Detección de objetos terminada.\n{report.summary()}')
+    for result in report.failed:
+        logger.error(f'Error en {result.job.file_output}:\n{result.error}')
@@ -0,0 +1,20 @@
+"""Export the YOLOv5 models to TorchScript to load them offline (``use_local=True``).
+"""
+import logging
+import os
+
+from simple_object_detection.models import YOLOv5s, YOLOv5m, YOLOv5l, YOLOv5x
+
+logging.basicConfig(format='%(levelname)s:%(message)s', level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+models_path = os.path.abspath(os.getenv('MODELS_PATH', 'models'))
+networks = [YOLOv5s, YOLOv5m, YOLOv5l, YOLOv5x,]
+
+for network_cls in networks:
+    # Descargar de torch-hub y serializar el modelo (una sola vez).
+    file_output = network_cls.export(models_path)
+    logger.info(f'Modelo {network_cls.__name__} exportado en {file_output}')
+    # Comprobar que se puede cargar en modo local.
+    network_cls.models_path = models_path
+    network_cls(use_local=True)
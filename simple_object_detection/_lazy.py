@@ -0,0 +1,30 @@
+import importlib
+from typing import Any, Callable, Dict, List, Tuple
+
+# Funciones ``__getattr__`` y ``__dir__`` de un paquete.
+LazyFunctions = Tuple[Callable[[str], Any], Callable[[], List[str]]]
+
+
+def lazy_exports(package: str, exports: Dict[str, str]) -> LazyFunctions:
+    """Crea las funciones ``__getattr__`` y ``__dir__`` de un paquete (PEP 562) que importan cada
+    nombre exportado desde su módulo la primera vez que se accede a él.
+
+    Así, importar el paquete no importa sus dependencias pesadas (OpenCV, PyTorch, tqdm) hasta que
+    se utiliza algo que las necesita.
+
+    :param package: nombre del paquete.
+    :param exports: módulo (ruta completa) de cada nombre exportado.
+    :return: funciones ``__getattr__`` y ``__dir__`` del paquete.
+    """
+    def __getattr__(name: str) -> Any:
+        if name not in exports:
+            raise AttributeError(f'module {package!r} has no attribute {name!r}')
+        value = getattr(importlib.import_module(exports[name]), name)
+        # Guardarlo en el paquete para no volver a pasar por ``__getattr__``.
+        setattr(importlib.import_module(package), name, value)
+        return value
+
+    def __dir__() -> List[str]:
+        return sorted(set(vars(importlib.import_module(package))) | set(exports))
+
+    return __getattr__, __dir__
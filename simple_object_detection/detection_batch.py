@@ -0,0 +1,332 @@
+from typing import List, Iterator, Sequence, Tuple, Union
+
+import numpy as np
+
+from simple_object_detection.constants import COCO_NAMES
+from simple_object_detection.exceptions import SimpleObjectDetectionException
+from simple_object_detection.object import Object
+from simple_object_detection.typing import Point2D
+
+
+# Detecciones de un frame: cajas (N, 4) en formato xywh, puntuaciones (N,) e índices de clase (N,).
+FrameDetections = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+
+class DetectionBatch:
+    """Detecciones de objetos de una secuencia de frames almacenadas por columnas.
+
+    En lugar de crear un ``Object`` por cada detección, todas las detecciones se guardan en unos
+    pocos arrays contiguos de NumPy:
+
+    - ``frames``: índice del frame de cada detección, con forma (N,).
+    - ``xywh``: centro (x, y), ancho y alto de cada detección, con forma (N, 4).
+    - ``scores``: puntuación de cada detección, con forma (N,).
+    - ``class_ids``: índice en ``class_names`` de la clase de cada detección, con forma (N,).
+    - ``offsets``: fila de la primera detección de cada frame, con forma (F + 1,). Las
+      detecciones del frame ``f`` son las filas ``offsets[f]:offsets[f + 1]``.
+
+    Para mantener la compatibilidad con ``List[List[Object]]``, se comporta como una secuencia
+    indexada por frame: ``batch[f]`` construye bajo demanda la lista de ``Object`` del frame.
+    """
+    def __init__(self,
+                 frames: np.ndarray,
+                 xywh: np.ndarray,
+                 scores: np.ndarray,
+                 class_ids: np.ndarray,
+                 offsets: np.ndarray,
+                 class_names: Sequence[str] = COCO_NAMES):
+        """
+
+        :param frames: índice del frame de cada detección.
+        :param xywh: centro, ancho y alto de cada detección.
+        :param scores: puntuación de cada detección.
+        :param class_ids: índice de la clase de cada detección.
+        :param offsets: fila de inicio de las detecciones de cada frame (más la fila final).
+        :param class_names: nombres de las clases.
+        """
+        num_detections = len(scores)
+        if xywh.shape != (num_detections, 4) or len(frames) != num_detections or \
+                len(class_ids) != num_detections:
+            raise SimpleObjectDetectionException('Las columnas de las detecciones deben tener la '
+                                                 'misma cantidad de filas.')
+        if len(offsets) == 0 or offsets[-1] != num_detections:
+            raise SimpleObjectDetectionException('Los offsets no se corresponden con las '
+                                                 'detecciones.')
+        self.frames = frames
+        self.xywh = xywh
+        self.scores = scores
+        self.class_ids = class_ids
+        self.offsets = offsets
+        self.class_names = list(class_names)
+
+    def __len__(self) -> int:
+        """Devuelve el número de frames.
+        """
+        return len(self.offsets) - 1
+
+    def __getitem__(self, item: Union[int, slice]) -> Union[List[Object], 'DetectionBatch']:
+        """Obtiene la lista de objetos del frame item-ésimo, o un nuevo ``DetectionBatch`` si
+        ``item`` es un slice contiguo de frames.
+        """
+        if isinstance(item, slice):
+            start, stop, step = item.indices(len(self))
+            if step != 1:
+                raise SimpleObjectDetectionException('Solo se admiten slices contiguos.')
+            return self._frames_range(start, max(start, stop))
+        return self.frame_objects(item)
+
+    def __iter__(self) -> Iterator[List[Object]]:
+        for frame in range(len(self)):
+            yield self.frame_objects(frame)
+
+    def __repr__(self) -> str:
+        return f'DetectionBatch<frames={len(self)}, detections={self.num_detections}>'
+
+    @property
+    def num_detections(self) -> int:
+        """Número total de detecciones en todos los frames.
+        """
+        return len(self.scores)
+
+    def frame_rows(self, frame: int) -> slice:
+        """Devuelve el rango de filas que ocupan las detecciones de un frame.
+
+        :param frame: índice del frame (admite índices negativos).
+        :return: slice de las filas del frame.
+        """
+        num_frames = len(self)
+        if frame < 0:
+            frame += num_frames
+        if not 0 <= frame < num_frames:
+            raise IndexError(f'El frame {frame} está fuera del intervalo [0, {num_frames}).')
+        return slice(int(self.offsets[frame]), int(self.offsets[frame + 1]))
+
+    def frame_detections(self, frame: int) -> FrameDetections:
+        """Devuelve las columnas (sin copiar) de las detecciones de un frame.
+
+        :param frame: índice del frame.
+        :return: cajas xywh, puntuaciones e índices de clase del frame.
+        """
+        rows = self.frame_rows(frame)
+        return self.xywh[rows], self.scores[rows], self.class_ids[rows]
+
+    def frame_objects(self, frame: int) -> List[Object]:
+        """Construye los objetos de la clase ``Object`` detectados en un frame.
+
+        :param frame: índice del frame.
+        :return: lista de objetos del frame.
+        """
+        xywh, scores, class_ids = self.frame_detections(frame)
+        return [Object(index=index,
+                       center=Point2D(x, y),
+                       width=width,
+                       height=height,
+                       score=score,
+                       label=self.class_names[class_id])
+                for index, ((x, y, width, height), score, class_id)
+                in enumerate(zip(xywh.tolist(), scores.tolist(), class_ids.tolist()))]
+
+    def to_objects(self) -> List[List[Object]]:
+        """Convierte todas las detecciones al formato ``List[List[Object]]``.
+
+        :return: lista de objetos detectados indexada por frame.
+        """
+        return list(self)
+
+    def select(self, rows: np.ndarray) -> 'DetectionBatch':
+        """Crea un ``DetectionBatch`` con los mismos frames pero solo con las filas seleccionadas.
+
+        :param rows: máscara booleana con las filas (detecciones) que se conservan.
+        :return: detecciones seleccionadas.
+        """
+        frames = self.frames[rows]
+        offsets = np.zeros(len(self) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(frames, minlength=len(self)), out=offsets[1:])
+        return DetectionBatch(frames, self.xywh[rows], self.scores[rows], self.class_ids[rows],
+                              offsets, self.class_names)
+
+    def spread(self, positions: Sequence[int], num_frames: int) -> 'DetectionBatch':
+        """Crea un ``DetectionBatch`` de ``num_frames`` frames donde el frame i-ésimo pasa a la
+        posición ``positions[i]`` y el resto de frames quedan vacíos.
+
+        Se utiliza para devolver las detecciones de una secuencia submuestreada con los números de
+        frame originales.
+
+        :param positions: nueva posición (creciente) de cada frame.
+        :param num_frames: número de frames del resultado.
+        :return: detecciones con los frames recolocados.
+        """
+        positions = np.asarray(positions, dtype=np.int64)
+        if len(positions) != len(self):
+            raise SimpleObjectDetectionException('Debe indicarse una posición para cada frame.')
+        counts = np.zeros(num_frames, dtype=np.int64)
+        counts[positions] = np.diff(self.offsets)
+        offsets = np.zeros(num_frames + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        return DetectionBatch(positions[self.frames].astype(np.int32), self.xywh, self.scores,
+                              self.class_ids, offsets, self.class_names)
+
+    def take(self, indices: Sequence[int]) -> 'DetectionBatch':
+        """Crea un ``DetectionBatch`` donde el frame i-ésimo tiene las detecciones del frame
+        ``indices[i]``. Un mismo frame puede repetirse.
+
+        :param indices: índice del frame de origen de cada frame del resultado.
+        :return: detecciones de los frames indicados.
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        counts = np.diff(self.offsets)[indices]
+        offsets = np.zeros(len(indices) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        # Fila de origen de cada detección: inicio del frame de origen más su posición en él.
+        rows = np.repeat(self.offsets[indices] - offsets[:-1], counts) + np.arange(offsets[-1])
+        return DetectionBatch(np.repeat(np.arange(len(indices), dtype=np.int32), counts),
+                              self.xywh[rows], self.scores[rows], self.class_ids[rows],
+                              offsets, self.class_names)
+
+    def relabel(self, class_names: Sequence[str]) -> 'DetectionBatch':
+        """Referencia los índices de clase de las detecciones a otros nombres de clases.
+
+        :param class_names: nombres de las clases, que deben incluir todos los del lote.
+        :return: las mismas detecciones con los índices de clase en ``class_names``.
+        """
+        class_names = list(class_names)
+        if class_names == self.class_names:
+            return self
+        class_ids = {name: class_id for class_id, name in enumerate(class_names)}
+        missing = [name for name in self.class_names if name not in class_ids]
+        if missing:
+            raise SimpleObjectDetectionException(f'Las clases {missing} no están entre los '
+                                                 f'nombres de las clases.')
+        mapping = np.array([class_ids[name] for name in self.class_names], dtype=np.int32)
+        return DetectionBatch(self.frames, self.xywh, self.scores,
+                              mapping[self.class_ids] if len(mapping) else self.class_ids,
+                              self.offsets, class_names)
+
+    def _frames_range(self, start: int, stop: int) -> 'DetectionBatch':
+        """Crea un ``DetectionBatch`` con los frames del intervalo [start, stop).
+        """
+        row_start, row_stop = int(self.offsets[start]), int(self.offsets[stop])
+        return DetectionBatch(self.frames[row_start:row_stop] - start,
+                              self.xywh[row_start:row_stop],
+                              self.scores[row_start:row_stop],
+                              self.class_ids[row_start:row_stop],
+                              self.offsets[start:stop + 1] - row_start,
+                              self.class_names)
+
+    @classmethod
+    def empty(cls, num_frames: int = 0, class_names: Sequence[str] = COCO_NAMES
+              ) -> 'DetectionBatch':
+        """Crea un ``DetectionBatch`` sin detecciones.
+
+        :param num_frames: número de frames (todos vacíos).
+        :param class_names: nombres de las clases.
+        :return: detecciones vacías.
+        """
+        return cls(np.empty(0, dtype=np.int32),
+                   np.empty((0, 4), dtype=np.int32),
+                   np.empty(0, dtype=np.float32),
+                   np.empty(0, dtype=np.int32),
+                   np.zeros(num_frames + 1, dtype=np.int64),
+                   class_names)
+
+    @classmethod
+    def from_frames(cls,
+                    frames_detections: Sequence[FrameDetections],
+                    class_names: Sequence[str] = COCO_NAMES) -> 'DetectionBatch':
+        """Crea un ``DetectionBatch`` a partir de las columnas de las detecciones de cada frame.
+
+        :param frames_detections: cajas xywh, puntuaciones e índices de clase de cada frame.
+        :param class_names: nombres de las clases.
+        :return: detecciones de los frames.
+        """
+        if len(frames_detections) == 0:
+            return cls.empty(0, class_names)
+        counts = np.array([len(scores) for _, scores, _ in frames_detections], dtype=np.int64)
+        offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        frames = np.repeat(np.arange(len(counts), dtype=np.int32), counts)
+        xywh = np.concatenate([np.asarray(xywh, dtype=np.int32).reshape(-1, 4)
+                               for xywh, _, _ in frames_detections])
+        scores = np.concatenate([np.asarray(scores, dtype=np.float32)
+                                 for _, scores, _ in frames_detections])
+        class_ids = np.concatenate([np.asarray(class_ids, dtype=np.int32)
+                                    for _, _, class_ids in frames_detections])
+        return cls(frames, xywh, scores, class_ids, offsets, class_names)
+
+    @classmethod
+    def from_objects(cls,
+                     objects_detections: Sequence[Sequence[Object]],
+                     class_names: Sequence[str] = COCO_NAMES) -> 'DetectionBatch':
+        """Crea un ``DetectionBatch`` a partir de las detecciones en formato
+        ``List[List[Object]]``.
+
+        Las etiquetas que no estén en ``class_names`` se añaden al final de los nombres de las
+        clases.
+
+        :param objects_detections: lista de objetos detectados indexada por frame.
+        :param class_names: nombres de las clases.
+        :return: detecciones de los frames.
+        """
+        class_names = list(class_names)
+        class_ids = {name: class_id for class_id, name in enumerate(class_names)}
+        frames_detections = []
+        for objects in objects_detections:
+            xywh = [(obj.center[0], obj.center[1], obj.width, obj.height) for obj in objects]
+            scores = [obj.score for obj in objects]
+            labels = []
+            for obj in objects:
+                if obj.label not in class_ids:
+                    class_ids[obj.label] = len(class_names)
+                    class_names.append(obj.label)
+                labels.append(class_ids[obj.label])
+            frames_detections.append((xywh, scores, labels))
+        return cls.from_frames(frames_detections, class_names)
+
+    @classmethod
+    def concatenate(cls, batches: Sequence['DetectionBatch']) -> 'DetectionBatch':
+        """Concatena varios ``DetectionBatch`` uno tras otro en el eje de los frames.
+
+        Si los nombres de las clases no coinciden (por ejemplo, por etiquetas que el modelo no
+        declaraba), se unen con ``merge_class_names`` y se actualizan los índices de clase.
+
+        :param batches: lotes de detecciones ordenados.
+        :return: detecciones de todos los frames.
+        """
+        if len(batches) == 0:
+            return cls.empty()
+        class_names = batches[0].class_names
+        if any(batch.class_names != class_names for batch in batches):
+            class_names = merge_class_names(*(batch.class_names for batch in batches))
+            batches = [batch.relabel(class_names) for batch in batches]
+        frames_shift = np.cumsum([0] + [len(batch) for batch in batches])
+        rows_shift = np.cumsum([0] + [batch.num_detections for batch in batches])
+        frames = np.concatenate([batch.frames + frames_shift[i]
+                                 for i, batch in enumerate(batches)]).astype(np.int32)
+        offsets = np.concatenate([batches[0].offsets[:1]] +
+                                 [batch.offsets[1:] + rows_shift[i]
+                                  for i, batch in enumerate(batches)]).astype(np.int64)
+        return cls(frames,
+                   np.concatenate([batch.xywh for batch in batches]),
+                   np.concatenate([batch.scores for batch in batches]),
+                   np.concatenate([batch.class_ids for batch in batches]),
+                   offsets,
+                   class_names)
+
+
+def merge_class_names(*class_names: Sequence[str]) -> List[str]:
+    """Une varias listas de nombres de clases conservando el orden.
+
+    Los nombres de la primera lista mantienen su índice y los que no aparecen en ella se añaden
+    al final, en el orden en el que aparecen.
+
+    :param class_names: listas de nombres de clases.
+    :return: nombres de todas las clases.
+    """
+    merged = list(class_names[0]) if class_names else []
+    known = set(merged)
+    for names in class_names[1:]:
+        for name in names:
+            if name not in known:
+                known.add(name)
+                merged.append(name)
+    return merged
@@ -1,12 +1,31 @@
 import tempfile
 from abc import ABC, abstractmethod
-from typing import AnyStr, List, Any
+from contextlib import ExitStack
+from typing import AnyStr, ContextManager, List, Any, Dict, Optional, Union
 
-import cv2
+import numpy as np
 
 from simple_object_detection.constants import COCO_NAMES
+from simple_object_detection.detection_batch import DetectionBatch, FrameDetections
+from simple_object_detection.exceptions import SimpleObjectDetectionException
 from simple_object_detection.object import Object
 from simple_object_detection.typing import Image, RelativeBoundingBox, Point2D
+from simple_object_detection.utils.mask import MaskRegion
+from simple_object_detection.utils.profiling import (BATCH_STAGE, INFERENCE_STAGE, MASK_STAGE,
+                                                     OBJECTS_STAGE, POSTPROCESS_STAGE,
+                                                     StageProfiler)
+
+
+class _TemporalFolder:
+    """Descriptor de la carpeta temporal, que se crea la primera vez que se accede a ella.
+    """
+    def __init__(self):
+        self._path = None
+
+    def __get__(self, instance, owner) -> AnyStr:
+        if self._path is None:
+            self._path = tempfile.mkdtemp()
+        return self._path
 
 
 class DetectionModel(ABC):
@@ -16,7 +35,11 @@ class DetectionModel(ABC):
     # Carpeta donde se almacenan los modelos locales.
     models_path: str = None
     # Carpeta temporal donde se almacenan los archivos descargados.
-    temporal_folder: AnyStr = tempfile.mkdtemp()
+    temporal_folder: AnyStr = _TemporalFolder()
+    # Nombres de las clases que puede detectar el modelo.
+    class_names: List[str] = COCO_NAMES
+    # Medidor del tiempo de las etapas de la detección. Si es None, no se mide.
+    profiler: Optional[StageProfiler] = None
 
     def __init__(self, use_local: bool = False):
         """
@@ -41,6 +64,69 @@ class DetectionModel(ABC):
         """
         return self._get_outputs(images)
 
+    def get_images_detections(self,
+                              images: List[Image],
+                              mask: Union[Image, MaskRegion] = None,
+                              in_place: bool = False) -> DetectionBatch:
+        """Realiza las detecciones en una lista de imágenes y las devuelve almacenadas por
+        columnas, indexadas por la imagen.
+
+        :param images: lista de imágenes o array contiguo de forma (N, alto, ancho, 3).
+        :param mask: máscara para aplicar la zona donde se realizará la detección en la secuencia.
+        Si es un ``MaskRegion``, la red solo procesa el rectángulo de la máscara.
+        :param in_place: si aplicar la máscara directamente sobre las imágenes (que se modifican).
+        :return: detecciones de los objetos en cada imagen.
+        """
+        with self.profile(BATCH_STAGE, len(images)):
+            # Aplica la máscara a las imágenes.
+            images = self.preprocess(images, mask, in_place)
+            # Extrae la salida de la red neuronal.
+            outputs = self.infer(images)
+            # Extrae las detecciones de todas las imágenes.
+            return self.postprocess(outputs, images, mask)
+
+    def preprocess(self,
+                   images: List[Image],
+                   mask: Union[Image, MaskRegion] = None,
+                   in_place: bool = False) -> List[Image]:
+        """Primera etapa de ``get_images_detections``: aplica la máscara a las imágenes.
+
+        :param images: lista de imágenes o array contiguo de forma (N, alto, ancho, 3).
+        :param mask: máscara para aplicar la zona donde se realizará la detección. Si es un
+        ``MaskRegion``, se devuelven los recortes de las imágenes a su rectángulo.
+        :param in_place: si aplicar la máscara directamente sobre las imágenes (que se modifican).
+        :return: imágenes que se pasan a la red neuronal.
+        """
+        with self.profile(MASK_STAGE, len(images)):
+            return self._apply_mask(images, mask, in_place)
+
+    def infer(self, images: List[Image]) -> List[Any]:
+        """Segunda etapa de ``get_images_detections``: ejecuta la red neuronal.
+
+        :param images: imágenes devueltas por ``preprocess``.
+        :return: salidas de la red neuronal para cada imagen (ninguna si no hay imágenes).
+        """
+        with self.profile(INFERENCE_STAGE, len(images)):
+            return self._get_outputs(images) if len(images) else []
+
+    def postprocess(self,
+                    outputs: List[Any],
+                    images: List[Image],
+                    mask: Union[Image, MaskRegion] = None) -> DetectionBatch:
+        """Última etapa de ``get_images_detections``: crea las detecciones a partir de las salidas
+        de la red neuronal, en las coordenadas de las imágenes completas.
+
+        :param outputs: salidas devueltas por ``infer``.
+        :param images: imágenes devueltas por ``preprocess``.
+        :param mask: máscara pasada a ``preprocess``.
+        :return: detecciones de los objetos en cada imagen.
+        """
+        with self.profile(POSTPROCESS_STAGE, len(images)):
+            detections = self._restore_mask(self._outputs_detections(outputs, images), mask)
+        if self.profiler is not None:
+            self.profiler.count_boxes(detections.num_detections)
+        return detections
+
     def get_images_objects(self, images: List[Image], mask: Image = None) -> List[List[Object]]:
         """Realiza las detecciones en una lista de imágenes y devuelve las detecciones de los
         objetos obtenidas indexadas por la imagen.
@@ -49,13 +135,11 @@ class DetectionModel(ABC):
         :param mask: máscara para aplicar la zona donde se realizará la detección en la secuencia.
         :return: lista de objetos en cada imagen.
         """
-        # Aplica la máscara a las imágenes.
-        if mask is not None:
-            images = [cv2.bitwise_and(image, mask) for image in images]
-        # Extrae la salida de la red neuronal.
-        outputs = self._get_outputs(images)
-        # Extrae la lista de objetos de esa imagen y los devuelve.
-        return [self._get_objects(output, image) for image, output in zip(images, outputs)]
+        if self._creates_objects():
+            return self._get_images_objects(images, mask)
+        detections = self.get_images_detections(images, mask)
+        with self.profile(OBJECTS_STAGE, len(images)):
+            return detections.to_objects()
 
     def get_image_objects(self, image: Image, mask: Image = None) -> List[Object]:
         """Devuelve todos los objetos que se extraen de la salida de la predicción de la red
@@ -67,6 +151,64 @@ class DetectionModel(ABC):
         """
         return self.get_images_objects([image], mask)[0]
 
+    def profile(self, stage: str, num_frames: int = 0) -> ContextManager:
+        """Contexto que mide una etapa con ``profiler`` (o no hace nada si no hay ``profiler``).
+
+        La etapa ``batch`` mide el lote completo.
+
+        :param stage: nombre de la etapa.
+        :param num_frames: número de frames que procesa la etapa.
+        :return: contexto de la medición.
+        """
+        if self.profiler is None:
+            return ExitStack()
+        if stage == BATCH_STAGE:
+            return self.profiler.batch(num_frames)
+        return self.profiler.stage(stage, num_frames)
+
+    def _creates_objects(self) -> bool:
+        """Comprueba si el modelo sobrescribe la creación de los objetos (``_get_object`` o
+        ``_get_objects``), en cuyo caso los objetos se crean uno a uno con esos métodos.
+        """
+        model_class = type(self)
+        return model_class._get_object is not DetectionModel._get_object or \
+            model_class._get_objects is not DetectionModel._get_objects
+
+    def _get_images_objects(self,
+                            images: List[Image],
+                            mask: Union[Image, MaskRegion] = None) -> List[List[Object]]:
+        """Realiza las detecciones creando los objetos de cada imagen con ``_get_objects``.
+
+        :param images: lista de imágenes.
+        :param mask: máscara para aplicar la zona donde se realizará la detección.
+        :return: lista de objetos en cada imagen.
+        """
+        # Los objetos se crean sobre las imágenes completas, no sobre el recorte de la máscara.
+        if isinstance(mask, MaskRegion):
+            mask = mask.to_image()
+        with self.profile(BATCH_STAGE, len(images)):
+            images = self.preprocess(images, mask)
+            outputs = self.infer(images)
+            with self.profile(OBJECTS_STAGE, len(images)):
+                return [self._get_objects(output, image)
+                        for image, output in zip(images, outputs)]
+
+    def _outputs_detections(self, outputs: List[Any], images: List[Image]) -> DetectionBatch:
+        """Crea las detecciones por columnas de un lote de salidas de la red neuronal.
+
+        Si el modelo sobrescribe la creación de los objetos, las detecciones se obtienen de los
+        objetos de ``_get_objects``. Si no, con ``_get_batch_detections``.
+
+        :param outputs: salidas de la red neuronal para cada imagen.
+        :param images: imágenes donde fueron detectados los objetos.
+        :return: detecciones de los objetos en cada imagen.
+        """
+        if self._creates_objects():
+            return DetectionBatch.from_objects([self._get_objects(output, image)
+                                                for image, output in zip(images, outputs)],
+                                               self.class_names)
+        return self._get_batch_detections(outputs, images)
+
     def _get_object(self, object_id: int, object_output: Any, image: Image) -> Object:
         """Crea el objeto de la clase ``Object`` con la información pasada por parámetra del output
         de la red neuronal.
@@ -97,6 +239,102 @@ class DetectionModel(ABC):
         return [self._get_object(object_id, object_output, image)
                 for object_id, object_output in enumerate(output)]
 
+    def _apply_mask(self,
+                    images: List[Image],
+                    mask: Union[Image, MaskRegion] = None,
+                    in_place: bool = False) -> List[Image]:
+        """Aplica la máscara a las imágenes.
+
+        :param images: lista de imágenes.
+        :param mask: máscara con la zona donde se realizará la detección. Si es None, se devuelven
+        las imágenes sin modificar. Si es un ``MaskRegion``, se devuelven los recortes de las
+        imágenes a su rectángulo.
+        :param in_place: si aplicar la máscara directamente sobre las imágenes.
+        :return: lista de imágenes con la máscara aplicada.
+        """
+        if mask is None:
+            return images
+        if isinstance(mask, MaskRegion):
+            return mask.apply(images, in_place)
+        import cv2
+        if in_place:
+            return [cv2.bitwise_and(image, mask, dst=image) for image in images]
+        return [cv2.bitwise_and(image, mask) for image in images]
+
+    @staticmethod
+    def _restore_mask(detections: DetectionBatch,
+                      mask: Union[Image, MaskRegion] = None) -> DetectionBatch:
+        """Lleva las detecciones a las coordenadas de las imágenes completas si se obtuvieron en
+        los recortes de un ``MaskRegion``.
+
+        :param detections: detecciones de las imágenes devueltas por ``_apply_mask``.
+        :param mask: máscara aplicada a las imágenes.
+        :return: detecciones en coordenadas de las imágenes completas.
+        """
+        if isinstance(mask, MaskRegion):
+            return mask.restore(detections)
+        return detections
+
+    def _get_batch_detections(self, outputs: List[Any], images: List[Image]) -> DetectionBatch:
+        """Crea las detecciones por columnas de un lote de salidas de la red neuronal.
+
+        Por defecto extrae las detecciones de cada salida con ``_get_detections``. Los modelos
+        pueden sobrescribirlo para procesar el lote completo de una vez.
+
+        :param outputs: salidas de la red neuronal para cada imagen.
+        :param images: imágenes donde fueron detectados los objetos.
+        :return: detecciones de los objetos en cada imagen.
+        """
+        # Nombres de las clases del lote, con las etiquetas que el modelo no declara al final.
+        class_names = list(self.class_names)
+        return DetectionBatch.from_frames(
+            [self._get_detections(output, image, class_names)
+             for image, output in zip(images, outputs)],
+            class_names
+        )
+
+    def _get_detections(self,
+                        output: Any,
+                        image: Image,
+                        class_names: List[str] = None) -> FrameDetections:
+        """Extrae las columnas de las detecciones del ``output`` de la red neuronal.
+
+        :param output: salida de la red neuronal.
+        :param image: imagen donde fueron detectados los objetos.
+        :param class_names: nombres de las clases de los índices. Las etiquetas que no están entre
+        los nombres de las clases del modelo se añaden al final de esta lista.
+        :return: cajas xywh, puntuaciones e índices de clase de las detecciones.
+        """
+        class_ids = self._class_ids()
+        if class_names is None:
+            class_names = list(self.class_names)
+        xywh, scores, labels = [], [], []
+        for object_id, object_output in enumerate(output):
+            center, width, height = self._calculate_object_position(object_output, object_id,
+                                                                    image)
+            label = self._calculate_label(object_output, object_id)
+            class_id = class_ids.get(label)
+            if class_id is None:
+                if label not in class_names:
+                    class_names.append(label)
+                class_id = class_names.index(label)
+            xywh.append((center[0], center[1], width, height))
+            scores.append(self._calculate_score(object_output, object_id))
+            labels.append(class_id)
+        return (np.array(xywh, dtype=np.int32).reshape(-1, 4),
+                np.array(scores, dtype=np.float32),
+                np.array(labels, dtype=np.int32))
+
+    def _class_ids(self) -> Dict[str, int]:
+        """Diccionario con el índice de cada nombre de clase del modelo.
+
+        :return: diccionario nombre de la clase -> índice.
+        """
+        if getattr(self, '_class_ids_cache', None) is None:
+            self._class_ids_cache = {name: class_id
+                                     for class_id, name in enumerate(self.class_names)}
+        return self._class_ids_cache
+
     @abstractmethod
     def _load_local(self) -> Any:
         """Método que debe ser implementado para cargar la red de manera offline. Es decir, con
@@ -181,14 +419,56 @@ class DetectionModel(ABC):
         """
 
 
-class PyTorchHubModel(DetectionModel, ABC):
-    """Clase abstracta para los modelos extraídos de torch-hub.
+class XYWHOutputsMixin:
+    """Cálculo de los objetos a partir de salidas con una fila (centro x, centro y, ancho, alto,
+    puntuación, índice de clase) por detección, en píxeles de la imagen original.
+
+    Es el formato de salida de ``PyTorchHubModel`` y de ``OpenCVDNNModel``. Se combina con
+    ``DetectionModel``, delante de ella en las clases base.
     """
-    size: int
+    class_names: List[str]
 
-    def _get_outputs(self, images: List[Image]) -> List[Any]:
-        torch_outputs = self.model(images, size=self.size)
-        return [xywh for xywh in torch_outputs.xywh]
+    def _get_batch_detections(self, outputs: List[Any], images: List[Image]) -> DetectionBatch:
+        """Crea las detecciones de todo el lote de una vez.
+
+        Las salidas de todas las imágenes se concatenan con ``_concatenate_outputs`` y se
+        convierten las coordenadas, puntuaciones e índices de clase de todas las cajas en una sola
+        operación vectorizada. Si el modelo sobrescribe algún método ``_calculate_*``, las
+        detecciones se extraen objeto a objeto con esos métodos.
+
+        :param outputs: salidas (N, 6) de cada imagen.
+        :param images: imágenes donde fueron detectados los objetos.
+        :return: detecciones de los objetos en cada imagen.
+        """
+        if self._overrides_calculations():
+            return super()._get_batch_detections(outputs, images)
+        counts = np.array([len(output) for output in outputs], dtype=np.int64)
+        offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        if offsets[-1] == 0:
+            return DetectionBatch.empty(len(outputs), self.class_names)
+        detections = self._concatenate_outputs(outputs)
+        # Misma conversión que int() y float() sobre cada elemento (truncado hacia cero).
+        return DetectionBatch(np.repeat(np.arange(len(counts), dtype=np.int32), counts),
+                              detections[:, :4].astype(np.int32),
+                              detections[:, 4].astype(np.float32),
+                              detections[:, 5].astype(np.int32),
+                              offsets,
+                              self.class_names)
+
+    def _concatenate_outputs(self, outputs: List[Any]) -> np.ndarray:
+        """Concatena las salidas de todas las imágenes en un único array (N, 6).
+        """
+        return np.concatenate(outputs)
+
+    def _overrides_calculations(self) -> bool:
+        """Comprueba si el modelo sobrescribe el cálculo de la posición, la puntuación o la
+        etiqueta de los objetos, que la conversión vectorizada no utiliza.
+        """
+        model_class = type(self)
+        return any(getattr(model_class, name) is not getattr(XYWHOutputsMixin, name)
+                   for name in ('_calculate_object_position', '_calculate_score',
+                                '_calculate_label'))
 
     def _calculate_number_detections(self, output: Any, *args, **kwargs) -> int:
         return len(output)
@@ -206,4 +486,102 @@ class PyTorchHubModel(DetectionModel, ABC):
         return float(object_output[4])
 
     def _calculate_label(self, object_output: Any, object_id: int, *args, **kwargs) -> str:
-        return COCO_NAMES[int(object_output[5])]
+        return self.class_names[int(object_output[5])]
+
+
+class PyTorchHubModel(XYWHOutputsMixin, DetectionModel, ABC):
+    """Clase abstracta para los modelos extraídos de torch-hub.
+
+    La inferencia admite varios modos, que se eligen al construir el modelo:
+
+    - ``precision='bfloat16'``: ejecuta la red en bfloat16 (con autocast en los modelos de
+      torch-hub, que requiere PyTorch 1.10 o posterior, y convirtiendo los pesos en los modelos
+      locales de TorchScript).
+    - ``precision='int8'``: cuantización dinámica a int8 de las capas lineales. Solo en los
+      modelos de torch-hub: la cuantización dinámica no modifica los modelos de TorchScript.
+    - ``channels_last``: pesos en formato de memoria *channels last* (NHWC).
+    - ``inference_mode``: ejecuta la red dentro de ``torch.inference_mode``.
+    """
+    size: int
+    # Precisiones de inferencia disponibles.
+    precisions = ('float32', 'bfloat16', 'int8')
+
+    def __init__(self,
+                 use_local: bool = False,
+                 precision: str = 'float32',
+                 channels_last: bool = False,
+                 inference_mode: bool = False):
+        """
+
+        :param use_local: si usar el modelo local. Por defecto usa el modelo online.
+        :param precision: precisión de la inferencia: 'float32', 'bfloat16' o 'int8'.
+        :param channels_last: si utilizar el formato de memoria *channels last*.
+        :param inference_mode: si ejecutar la red dentro de ``torch.inference_mode``.
+        """
+        if precision not in self.precisions:
+            raise SimpleObjectDetectionException(f'La precisión {precision} no está entre las '
+                                                 f'disponibles {self.precisions}.')
+        self.precision = precision
+        self.channels_last = channels_last
+        self.inference_mode = inference_mode
+        super().__init__(use_local=use_local)
+        self._prepare_model()
+
+    def _prepare_model(self) -> None:
+        """Aplica al modelo cargado el formato de memoria y la precisión elegidos.
+        """
+        if self.precision == 'float32' and not self.channels_last:
+            return
+        import torch
+        # Los modelos locales (``TorchScriptDetector``) envuelven la red en ``network``.
+        is_script = hasattr(self.model, 'network')
+        if self.precision == 'int8' and is_script:
+            raise SimpleObjectDetectionException('La precisión int8 no está disponible en los '
+                                                 'modelos locales de TorchScript.')
+        if self.precision == 'bfloat16' and not is_script and not hasattr(torch, 'autocast'):
+            raise SimpleObjectDetectionException(f'La precisión bfloat16 requiere torch.autocast '
+                                                 f'(PyTorch 1.10 o posterior), PyTorch '
+                                                 f'{torch.__version__} no lo incluye.')
+        network = self.model.network if is_script else self.model
+        if self.channels_last:
+            network = network.to(memory_format=torch.channels_last)
+        if self.precision == 'int8':
+            network = torch.quantization.quantize_dynamic(network, {torch.nn.Linear},
+                                                          dtype=torch.qint8)
+        elif self.precision == 'bfloat16' and is_script:
+            # Los modelos de TorchScript no admiten autocast, se convierten los pesos.
+            network = network.to(torch.bfloat16)
+            self.model.dtype = torch.bfloat16
+        if is_script:
+            self.model.network = network
+        else:
+            self.model = network
+
+    def _inference_context(self) -> ContextManager:
+        """Contexto en el que se ejecuta la red según el modo de inferencia.
+        """
+        context = ExitStack()
+        if not self.inference_mode and self.precision != 'bfloat16':
+            return context
+        import torch
+        if self.inference_mode:
+            # ``torch.inference_mode`` no existe en versiones anteriores a PyTorch 1.9.
+            context.enter_context(getattr(torch, 'inference_mode', torch.no_grad)())
+        if self.precision == 'bfloat16' and not hasattr(self.model, 'network'):
+            parameter = next(self.model.parameters(), None)
+            device_type = parameter.device.type if parameter is not None else 'cpu'
+            context.enter_context(torch.autocast(device_type, dtype=torch.bfloat16))
+        return context
+
+    def _get_outputs(self, images: List[Image]) -> List[Any]:
+        # Un lote contiguo (N, alto, ancho, 3) se pasa como lista de vistas, sin copiar.
+        with self._inference_context():
+            torch_outputs = self.model(list(images), size=self.size)
+        return [xywh for xywh in torch_outputs.xywh]
+
+    def _concatenate_outputs(self, outputs: List[Any]) -> np.ndarray:
+        """Concatena los tensores de todas las imágenes y los mueve a NumPy con una única
+        sincronización con el dispositivo.
+        """
+        import torch
+        return torch.cat(list(outputs)).detach().float().cpu().numpy()
@@ -1,2 +1,11 @@
-from simple_object_detection.models.yolo import YOLOv5s, YOLOv5m, YOLOv5l, YOLOv5x
-from simple_object_detection.models.yolo import YOLOv5s6, YOLOv5m6, YOLOv5l6, YOLOv5x6
+from simple_object_detection._lazy import lazy_exports
+
+# Los modelos se importan la primera vez que se utilizan, y PyTorch solo al cargar un modelo.
+_EXPORTS = {name: 'simple_object_detection.models.yolo'
+            for name in ['YOLOv5s', 'YOLOv5m', 'YOLOv5l', 'YOLOv5x',
+                         'YOLOv5s6', 'YOLOv5m6', 'YOLOv5l6', 'YOLOv5x6']}
+_EXPORTS.update({name: 'simple_object_detection.models.opencv_dnn'
+                 for name in ['OpenCVDNNModel', 'YOLOv5sOpenCV', 'YOLOv5mOpenCV',
+                              'YOLOv5lOpenCV', 'YOLOv5xOpenCV']})
+__all__ = list(_EXPORTS)
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
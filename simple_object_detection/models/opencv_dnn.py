@@ -0,0 +1,215 @@
+import json
+import os
+from typing import Any, List, Tuple
+
+import cv2
+import numpy as np
+
+from simple_object_detection.detection_model import DetectionModel, XYWHOutputsMixin
+from simple_object_detection.exceptions import SimpleObjectDetectionException
+from simple_object_detection.typing import Image
+from simple_object_detection.utils.image import letterbox
+
+
+# Extensión del modelo exportado y de su archivo de metadatos (distinta de la de los metadatos
+# del modelo de TorchScript, que se guardan en la misma carpeta con el mismo nombre).
+MODEL_EXTENSION = '.onnx'
+METADATA_EXTENSION = '.onnx.json'
+
+# Desplazamiento de las cajas de cada clase para aplicar la supresión de no máximos por clase con
+# una sola llamada (las cajas de clases distintas nunca se solapan).
+_CLASS_OFFSET = 8192
+
+
+class OpenCVDNNModel(XYWHOutputsMixin, DetectionModel):
+    """Clase base de los modelos YOLO exportados a ONNX que se ejecutan con ``cv2.dnn``.
+
+    Está pensada para la inferencia en CPU sin PyTorch. Solo admite el modo local: el modelo
+    ``<models_path>/<model_name>.onnx`` y sus metadatos ``<model_name>.onnx.json`` (nombres de las
+    clases y tamaño de entrada) se crean una sola vez con ``export``.
+
+    Las imágenes se redimensionan con ``letterbox``, y el filtrado por puntuación y la supresión de
+    no máximos se aplican de forma vectorizada. Las coordenadas se devuelven igual que en
+    ``PyTorchHubModel``: centro, ancho y alto en píxeles de la imagen original, truncados.
+    """
+    # Nombre del modelo (del archivo exportado y del repositorio de torch-hub).
+    model_name: str
+    # Tamaño de entrada de la red.
+    size: int
+    # Puntuación mínima de las detecciones.
+    confidence_threshold: float = 0.25
+    # IoU a partir del cual se suprimen las cajas solapadas de la misma clase.
+    iou_threshold: float = 0.45
+    # Máximo de detecciones por imagen.
+    max_detections: int = 1000
+
+    def __init__(self, use_local: bool = True):
+        """
+
+        :param use_local: debe ser True, el modelo solo puede cargarse de archivos locales.
+        """
+        super().__init__(use_local=use_local)
+
+    def _load_local(self) -> Any:
+        file_path = self.local_model_path()
+        metadata_path = _metadata_path(file_path)
+        if not os.path.isfile(file_path) or not os.path.isfile(metadata_path):
+            raise SimpleObjectDetectionException(f'No se encuentra el modelo {file_path} o sus '
+                                                 f'metadatos {metadata_path}.')
+        with open(metadata_path) as metadata_file:
+            metadata = json.load(metadata_file)
+        self.class_names = metadata['class_names']
+        self.size = metadata['size']
+        network = cv2.dnn.readNetFromONNX(file_path)
+        network.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
+        network.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
+        return network
+
+    def _load_online(self) -> Any:
+        raise NotImplementedError(f'{self.__class__.__name__} can only be used with local files. '
+                                  f'Export the model with {self.__class__.__name__}.export().')
+
+    @classmethod
+    def local_model_path(cls, models_path: str = None) -> str:
+        """Ruta del modelo exportado.
+
+        :param models_path: carpeta de los modelos locales. Por defecto, ``models_path``.
+        :return: ruta del archivo ``.onnx``.
+        """
+        return os.path.join(models_path or cls.models_path, f'{cls.model_name}{MODEL_EXTENSION}')
+
+    @classmethod
+    def export(cls, models_path: str = None) -> str:
+        """Descarga el modelo YOLOv5 de torch-hub y lo exporta a ONNX para ``cv2.dnn``.
+
+        :param models_path: carpeta donde guardar el modelo. Por defecto, ``models_path``.
+        :return: ruta del modelo exportado.
+        """
+        import torch
+        file_output = cls.local_model_path(models_path)
+        os.makedirs(os.path.dirname(file_output) or '.', exist_ok=True)
+        hub_model = torch.hub.load('ultralytics/yolov5', cls.model_name)
+        network = hub_model.model
+        # Las versiones recientes de YOLOv5 envuelven la red en un ``DetectMultiBackend``.
+        if type(network).__name__ == 'DetectMultiBackend':
+            network = network.model
+        names = hub_model.names
+        class_names = [names[key] for key in sorted(names)] if isinstance(names, dict) else names
+        export_onnx(network, file_output, class_names, cls.size)
+        return file_output
+
+    def _get_outputs(self, images: List[Image]) -> List[Any]:
+        """Ejecuta la red y devuelve, por cada imagen, un array (N, 6) con centro (x, y), ancho,
+        alto, puntuación e índice de clase de cada detección en píxeles de la imagen original.
+        """
+        if len(images) == 0:
+            return []
+        letterboxed = np.empty((len(images), self.size, self.size, 3), dtype=np.uint8)
+        transforms = []
+        for index, image in enumerate(images):
+            letterboxed[index], ratio, padding = letterbox(image, (self.size, self.size))
+            transforms.append((ratio, padding))
+        # Las imágenes ya están en RGB, el orden de canales que espera la red.
+        blob = cv2.dnn.blobFromImages(letterboxed, 1 / 255, (self.size, self.size), swapRB=False)
+        self.model.setInput(blob)
+        predictions = self.model.forward()
+        if predictions.shape[0] != len(images):
+            # Modelo exportado con un tamaño de lote fijo: se ejecuta imagen a imagen.
+            predictions = []
+            for index in range(len(images)):
+                self.model.setInput(blob[index:index + 1])
+                predictions.append(self.model.forward()[0])
+        return [self._postprocess(prediction, ratio, padding, image.shape[:2])
+                for prediction, (ratio, padding), image in zip(predictions, transforms, images)]
+
+    def _postprocess(self, prediction: np.ndarray, ratio: float, padding: Tuple[int, int],
+                     image_shape: Tuple[int, int]) -> np.ndarray:
+        """Filtra las predicciones de una imagen por puntuación, aplica la supresión de no máximos
+        por clase y deshace el ``letterbox``.
+
+        :param prediction: predicciones (cajas, 5 + clases) de la red en formato xywh.
+        :param ratio: factor de escala aplicado a la imagen.
+        :param padding: desplazamiento (x, y) de la imagen dentro de la entrada de la red.
+        :param image_shape: alto y ancho de la imagen original.
+        :return: array (N, 6) con centro, ancho, alto, puntuación e índice de clase.
+        """
+        prediction = prediction[prediction[:, 4] > self.confidence_threshold]
+        # Puntuación de cada clase = confianza del objeto * probabilidad de la clase.
+        class_scores = prediction[:, 5:] * prediction[:, 4:5]
+        class_ids = class_scores.argmax(axis=1)
+        scores = class_scores[np.arange(len(class_ids)), class_ids]
+        keep = scores > self.confidence_threshold
+        prediction, scores, class_ids = prediction[keep], scores[keep], class_ids[keep]
+        # Cajas (esquina superior izquierda, ancho, alto) desplazadas por clase.
+        boxes = prediction[:, :4].copy()
+        boxes[:, :2] -= boxes[:, 2:] / 2
+        shifted = boxes.copy()
+        shifted[:, :2] += class_ids[:, None] * _CLASS_OFFSET
+        keep = cv2.dnn.NMSBoxes(shifted.tolist(), scores.tolist(), self.confidence_threshold,
+                                self.iou_threshold, top_k=self.max_detections)
+        keep = np.asarray(keep, dtype=np.int64).reshape(-1)
+        boxes, scores, class_ids = boxes[keep], scores[keep], class_ids[keep]
+        # Deshacer el letterbox y limitar las cajas a la imagen.
+        x1 = ((boxes[:, 0] - padding[0]) / ratio).clip(0, image_shape[1])
+        y1 = ((boxes[:, 1] - padding[1]) / ratio).clip(0, image_shape[0])
+        x2 = ((boxes[:, 0] + boxes[:, 2] - padding[0]) / ratio).clip(0, image_shape[1])
+        y2 = ((boxes[:, 1] + boxes[:, 3] - padding[1]) / ratio).clip(0, image_shape[0])
+        return np.stack([(x1 + x2) / 2, (y1 + y2) / 2, x2 - x1, y2 - y1, scores, class_ids],
+                        axis=1).astype(np.float32)
+
+
+def export_onnx(network, file_output: str, class_names: List[str], size: int) -> None:
+    """Exporta a ONNX una red de detección, con el tamaño de lote variable, junto con un archivo
+    JSON de metadatos (nombres de las clases y tamaño de entrada).
+
+    :param network: red de PyTorch que recibe un tensor (N, 3, alto, ancho) con valores en
+    [0, 1] y devuelve las predicciones (N, cajas, 5 + clases) en formato xywh (o una tupla cuyo
+    primer elemento son las predicciones).
+    :param file_output: archivo del modelo exportado (``.onnx``).
+    :param class_names: nombres de las clases.
+    :param size: tamaño de entrada de la red.
+    :return: None.
+    """
+    import inspect
+    import torch
+    from simple_object_detection.models.torchscript import _FirstOutput
+    network = _FirstOutput(network).eval()
+    example = torch.zeros(1, 3, size, size, device=next(network.parameters()).device)
+    options = {}
+    # Las versiones recientes de PyTorch exportan por defecto con ``torch.export``; se utiliza el
+    # exportador basado en TorchScript, igual que en las versiones anteriores.
+    if 'dynamo' in inspect.signature(torch.onnx.export).parameters:
+        options['dynamo'] = False
+    with torch.no_grad():
+        torch.onnx.export(network, example, file_output, opset_version=12,
+                          input_names=['images'], output_names=['output'],
+                          dynamic_axes={'images': {0: 'batch'}, 'output': {0: 'batch'}},
+                          **options)
+    with open(_metadata_path(file_output), 'w') as metadata:
+        json.dump({'class_names': list(class_names), 'size': size}, metadata)
+
+
+def _metadata_path(file_path: str) -> str:
+    """Ruta del archivo de metadatos de un modelo exportado.
+    """
+    return f'{os.path.splitext(file_path)[0]}{METADATA_EXTENSION}'
+
+
+class YOLOv5sOpenCV(OpenCVDNNModel):
+    size = 640
+    model_name = 'yolov5s'
+
+
+class YOLOv5mOpenCV(OpenCVDNNModel):
+    size = 640
+    model_name = 'yolov5m'
+
+
+class YOLOv5lOpenCV(OpenCVDNNModel):
+    size = 640
+    model_name = 'yolov5l'
+
+
+class YOLOv5xOpenCV(OpenCVDNNModel):
+    size = 640
+    model_name = 'yolov5x'
@@ -0,0 +1,202 @@
+import json
+import os
+from typing import List, NamedTuple, Sequence, Tuple
+
+import numpy as np
+import torch
+import torchvision
+
+from simple_object_detection.exceptions import SimpleObjectDetectionException
+from simple_object_detection.typing import Image
+from simple_object_detection.utils.image import letterbox
+
+
+# Extensión del archivo de metadatos del modelo serializado.
+METADATA_EXTENSION = '.json'
+
+
+class _FirstOutput(torch.nn.Module):
+    """Envuelve una red que devuelve una tupla para exportar únicamente su primera salida."""
+    def __init__(self, network: torch.nn.Module):
+        super().__init__()
+        self.network = network
+
+    def forward(self, images: torch.Tensor) -> torch.Tensor:
+        outputs = self.network(images)
+        return outputs[0] if isinstance(outputs, (list, tuple)) else outputs
+
+
+class TorchScriptOutputs(NamedTuple):
+    """Salidas de ``TorchScriptDetector`` con el mismo formato que las de torch-hub."""
+    # Por cada imagen, tensor (N, 6) con centro (x, y), ancho, alto, puntuación e índice de
+    # clase de cada detección, en píxeles de la imagen original.
+    xywh: List[torch.Tensor]
+
+
+class TorchScriptDetector:
+    """Detector que ejecuta una red YOLOv5 serializada con TorchScript.
+
+    Reproduce el preprocesado y el postprocesado de torch-hub (``AutoShape``): redimensiona las
+    imágenes con ``letterbox``, ejecuta la red, aplica la supresión de no máximos y devuelve las
+    cajas en coordenadas de las imágenes originales.
+    """
+    def __init__(self,
+                 network: torch.jit.ScriptModule,
+                 class_names: Sequence[str],
+                 size: int,
+                 stride: int = 32,
+                 confidence_threshold: float = 0.25,
+                 iou_threshold: float = 0.45,
+                 max_detections: int = 1000):
+        """
+
+        :param network: red serializada. Recibe un tensor (N, 3, alto, ancho) con valores en
+        [0, 1] y devuelve las predicciones (N, cajas, 5 + clases) en formato xywh.
+        :param class_names: nombres de las clases.
+        :param size: tamaño de entrada de la red.
+        :param stride: paso máximo de la red.
+        :param confidence_threshold: puntuación mínima de las detecciones.
+        :param iou_threshold: IoU a partir del cual se suprimen las cajas solapadas.
+        :param max_detections: máximo de detecciones por imagen.
+        """
+        self.network = network
+        self.class_names = list(class_names)
+        self.size = size
+        self.stride = stride
+        self.confidence_threshold = confidence_threshold
+        self.iou_threshold = iou_threshold
+        self.max_detections = max_detections
+        # Tipo de los datos de entrada de la red.
+        self.dtype = torch.float32
+
+    @property
+    def device(self) -> torch.device:
+        """Dispositivo donde están los parámetros de la red.
+        """
+        parameter = next(self.network.parameters(), None)
+        return parameter.device if parameter is not None else torch.device('cpu')
+
+    @torch.no_grad()
+    def __call__(self, images: List[Image], size: int = None) -> TorchScriptOutputs:
+        """Detecta los objetos de una lista de imágenes.
+
+        La red serializada solo admite el tamaño de entrada con el que se exportó, así que todas
+        las imágenes se redimensionan con ``letterbox`` a un cuadrado de ese tamaño.
+
+        :param images: imágenes (RGB).
+        :param size: tamaño de entrada de la red. Debe ser el del modelo exportado.
+        :return: detecciones de cada imagen.
+        """
+        if size is not None and size != self.size:
+            raise SimpleObjectDetectionException(f'El modelo se exportó con un tamaño de entrada '
+                                                 f'de {self.size}, no de {size}.')
+        batch = np.empty((len(images), self.size, self.size, 3), dtype=np.uint8)
+        transforms = []
+        for index, image in enumerate(images):
+            batch[index], ratio, padding = letterbox(image, (self.size, self.size))
+            transforms.append((ratio, padding))
+        tensor = torch.from_numpy(batch).to(self.device).permute(0, 3, 1, 2).to(self.dtype) / 255
+        predictions = self.network(tensor).float()
+        return TorchScriptOutputs([self._postprocess(prediction, ratio, padding, image.shape[:2])
+                                   for prediction, (ratio, padding), image
+                                   in zip(predictions, transforms, images)])
+
+    def _postprocess(self, prediction: torch.Tensor, ratio: float, padding: Tuple[int, int],
+                     image_shape: Tuple[int, int]) -> torch.Tensor:
+        """Aplica la supresión de no máximos a las predicciones de una imagen y devuelve las cajas
+        en coordenadas de la imagen original.
+
+        :param prediction: predicciones (cajas, 5 + clases) de la red.
+        :param ratio: factor de escala aplicado a la imagen.
+        :param padding: desplazamiento (x, y) de la imagen dentro de la entrada de la red.
+        :param image_shape: alto y ancho de la imagen original.
+        :return: tensor (N, 6) con centro, ancho, alto, puntuación e índice de clase.
+        """
+        prediction = prediction[prediction[:, 4] > self.confidence_threshold]
+        # Puntuación de cada clase = confianza del objeto * probabilidad de la clase.
+        scores, class_ids = (prediction[:, 5:] * prediction[:, 4:5]).max(1)
+        keep = scores > self.confidence_threshold
+        prediction, scores, class_ids = prediction[keep], scores[keep], class_ids[keep]
+        xyxy = torch.cat([prediction[:, :2] - prediction[:, 2:4] / 2,
+                          prediction[:, :2] + prediction[:, 2:4] / 2], dim=1)
+        keep = torchvision.ops.batched_nms(xyxy, scores, class_ids, self.iou_threshold)
+        keep = keep[:self.max_detections]
+        xyxy, scores, class_ids = xyxy[keep], scores[keep], class_ids[keep]
+        # Deshacer el letterbox y limitar las cajas a la imagen.
+        xyxy[:, [0, 2]] = ((xyxy[:, [0, 2]] - padding[0]) / ratio).clamp(0, image_shape[1])
+        xyxy[:, [1, 3]] = ((xyxy[:, [1, 3]] - padding[1]) / ratio).clamp(0, image_shape[0])
+        return torch.cat([(xyxy[:, :2] + xyxy[:, 2:]) / 2,
+                          xyxy[:, 2:] - xyxy[:, :2],
+                          scores[:, None],
+                          class_ids[:, None].float()], dim=1)
+
+
+def export_torchscript(network: torch.nn.Module,
+                       file_output: str,
+                       class_names: Sequence[str],
+                       size: int,
+                       stride: int = 32) -> None:
+    """Serializa una red de detección con TorchScript junto con un archivo JSON de metadatos
+    (nombres de las clases, tamaño de entrada y paso de la red).
+
+    :param network: red que recibe un tensor (N, 3, alto, ancho) con valores en [0, 1] y devuelve
+    las predicciones (N, cajas, 5 + clases) en formato xywh (o una tupla cuyo primer elemento son
+    las predicciones).
+    :param file_output: archivo del modelo serializado (``.torchscript``).
+    :param class_names: nombres de las clases.
+    :param size: tamaño de entrada de la red.
+    :param stride: paso máximo de la red.
+    :return: None.
+    """
+    network = _FirstOutput(network).eval()
+    example = torch.zeros(1, 3, size, size, device=next(network.parameters()).device)
+    with torch.no_grad():
+        traced = torch.jit.trace(network, example, strict=False)
+    traced.save(file_output)
+    with open(_metadata_path(file_output), 'w') as metadata:
+        json.dump({'class_names': list(class_names), 'size': size, 'stride': stride}, metadata)
+
+
+def export_hub_model(hub_model, file_output: str, size: int) -> None:
+    """Serializa con TorchScript un modelo YOLOv5 cargado de torch-hub.
+
+    :param hub_model: modelo devuelto por ``torch.hub.load('ultralytics/yolov5', ...)``.
+    :param file_output: archivo del modelo serializado (``.torchscript``).
+    :param size: tamaño de entrada de la red.
+    :return: None.
+    """
+    network = hub_model.model
+    # Las versiones recientes de YOLOv5 envuelven la red en un ``DetectMultiBackend``.
+    if type(network).__name__ == 'DetectMultiBackend':
+        network = network.model
+    names = hub_model.names
+    class_names = [names[key] for key in sorted(names)] if isinstance(names, dict) else names
+    stride = int(max(hub_model.stride)) if hasattr(hub_model.stride, '__len__') \
+        else int(hub_model.stride)
+    export_torchscript(network, file_output, class_names, size, stride)
+
+
+def load_torchscript(file_path: str, device: str = None) -> TorchScriptDetector:
+    """Carga un modelo exportado con ``export_torchscript``.
+
+    :param file_path: archivo del modelo serializado (``.torchscript``).
+    :param device: dispositivo donde cargar el modelo. Por defecto, la GPU si está disponible.
+    :return: detector.
+    """
+    metadata_path = _metadata_path(file_path)
+    if not os.path.isfile(file_path) or not os.path.isfile(metadata_path):
+        raise SimpleObjectDetectionException(f'No se encuentra el modelo serializado {file_path} '
+                                             f'o sus metadatos {metadata_path}.')
+    if device is None:
+        device = 'cuda' if torch.cuda.is_available() else 'cpu'
+    network = torch.jit.load(file_path, map_location=device).eval()
+    with open(metadata_path) as metadata_file:
+        metadata = json.load(metadata_file)
+    return TorchScriptDetector(network, metadata['class_names'], metadata['size'],
+                               metadata.get('stride', 32))
+
+
+def _metadata_path(file_path: str) -> str:
+    """Ruta del archivo de metadatos de un modelo serializado.
+    """
+    return f'{os.path.splitext(file_path)[0]}{METADATA_EXTENSION}'
@@ -1,84 +1,93 @@
-import torch
+import os
+
 from typing import Any
 
 from simple_object_detection.detection_model import PyTorchHubModel
 
+# Extensión del modelo serializado (``simple_object_detection.models.torchscript``).
+MODEL_EXTENSION = '.torchscript'
 
-class YOLOv5s(PyTorchHubModel):
-    size = 640
-
-    def _load_local(self) -> Any:
-        raise NotImplementedError('YOLOv5s is not implemented for use with local files.')
-
-    def _load_online(self) -> Any:
-        return torch.hub.load('ultralytics/yolov5', 'yolov5s')
 
+class YOLOv5Model(PyTorchHubModel):
+    """Clase base de los modelos YOLOv5 de torch-hub.
 
-class YOLOv5m(PyTorchHubModel):
-    size = 640
+    En modo online se cargan con ``torch.hub``. En modo local se carga el modelo serializado con
+    TorchScript ``<models_path>/<hub_name>.torchscript`` (y sus metadatos
+    ``<hub_name>.json``), que se crea una sola vez con ``export``.
+    """
+    # Nombre del modelo en el repositorio de torch-hub.
+    hub_name: str
 
     def _load_local(self) -> Any:
-        raise NotImplementedError('YOLOv5m is not implemented for use with local files.')
+        from simple_object_detection.models.torchscript import load_torchscript
+        detector = load_torchscript(self.local_model_path())
+        self.class_names = detector.class_names
+        return detector
 
     def _load_online(self) -> Any:
-        return torch.hub.load('ultralytics/yolov5', 'yolov5m')
-
-
-class YOLOv5l(PyTorchHubModel):
+        import torch
+        return torch.hub.load('ultralytics/yolov5', self.hub_name)
+
+    @classmethod
+    def local_model_path(cls, models_path: str = None) -> str:
+        """Ruta del modelo serializado.
+
+        :param models_path: carpeta de los modelos locales. Por defecto, ``models_path``.
+        :return: ruta del archivo ``.torchscript``.
+        """
+        return os.path.join(models_path or cls.models_path, f'{cls.hub_name}{MODEL_EXTENSION}')
+
+    @classmethod
+    def export(cls, models_path: str = None) -> str:
+        """Descarga el modelo de torch-hub y lo serializa para poder cargarlo en modo local.
+
+        :param models_path: carpeta donde guardar el modelo. Por defecto, ``models_path``.
+        :return: ruta del modelo serializado.
+        """
+        import torch
+        from simple_object_detection.models.torchscript import export_hub_model
+        file_output = cls.local_model_path(models_path)
+        os.makedirs(os.path.dirname(file_output) or '.', exist_ok=True)
+        export_hub_model(torch.hub.load('ultralytics/yolov5', cls.hub_name), file_output,
+                         cls.size)
+        return file_output
+
+
+class YOLOv5s(YOLOv5Model):
     size = 640
+    hub_name = 'yolov5s'
 
-    def _load_local(self) -> Any:
-        raise NotImplementedError('YOLOv5l is not implemented for use with local files.')
 
-    def _load_online(self) -> Any:
-        return torch.hub.load('ultralytics/yolov5', 'yolov5l')
+class YOLOv5m(YOLOv5Model):
+    size = 640
+    hub_name = 'yolov5m'
 
 
-class YOLOv5x(PyTorchHubModel):
+class YOLOv5l(YOLOv5Model):
     size = 640
+    hub_name = 'yolov5l'
 
-    def _load_local(self) -> Any:
-        raise NotImplementedError('YOLOv5s is not implemented for use with local files.')
 
-    def _load_online(self) -> Any:
-        return torch.hub.load('ultralytics/yolov5', 'yolov5x')
+class YOLOv5x(YOLOv5Model):
+    size = 640
+    hub_name = 'yolov5x'
 
 
-class YOLOv5s6(PyTorchHubModel):
+class YOLOv5s6(YOLOv5Model):
     size = 1280
+    hub_name = 'yolov5s6'
 
-    def _load_local(self) -> Any:
-        raise NotImplementedError('YOLOv5s is not implemented for use with local files.')
 
-    def _load_online(self) -> Any:
-        return torch.hub.load('ultralytics/yolov5', 'yolov5s6')
-
-
-class YOLOv5m6(PyTorchHubModel):
+class YOLOv5m6(YOLOv5Model):
     size = 1280
-
-    def _load_local(self) -> Any:
-        raise NotImplementedError('YOLOv5s is not implemented for use with local files.')
-
-    def _load_online(self) -> Any:
-        return torch.hub.load('ultralytics/yolov5', 'yolov5m6')
+    hub_name = 'yolov5m6'
 
 
-class YOLOv5l6(PyTorchHubModel):
+class YOLOv5l6(YOLOv5Model):
     size = 1280
+    hub_name = 'yolov5l6'
 
-    def _load_local(self) -> Any:
-        raise NotImplementedError('YOLOv5s is not implemented for use with local files.')
 
-    def _load_online(self) -> Any:
-        return torch.hub.load('ultralytics/yolov5', 'yolov5l6')
-
-
-class YOLOv5x6(PyTorchHubModel):
+class YOLOv5x6(YOLOv5Model):
     size = 1280
-
-    def _load_local(self) -> Any:
-        raise NotImplementedError('YOLOv5s is not implemented for use with local files.')
-
-    def _load_online(self) -> Any:
-        return torch.hub.load('ultralytics/yolov5', 'yolov5x6')
+    hub_name = 'yolov5x6'
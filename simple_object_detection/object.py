@@ -1,7 +1,19 @@
+from typing import Any, Dict, Optional
+
 from simple_object_detection.typing import Point2D, BoundingBox
 
 
 class Object:
+    """Objeto detectado en una imagen.
+
+    Utiliza ``__slots__`` para reducir la memoria ocupada por cada instancia, ya que una secuencia
+    de vídeo puede tener millones de detecciones. La caja delimitadora se calcula bajo demanda a
+    partir del centro, el ancho y el alto, y el diccionario de otras propiedades solo se crea si
+    se utiliza.
+    """
+    __slots__ = ('index', '_center', 'width', 'height', 'score', 'label', '_bounding_box',
+                 '_other_properties')
+
     def __init__(self,
                  index: int,
                  center: Point2D,
@@ -22,12 +34,12 @@ class Object:
         """
         self.index = index
         self._center = center
-        self._bounding_box = self._create_bounding_box(center, width, height)
+        self._bounding_box: Optional[BoundingBox] = None
         self.width = width
         self.height = height
         self.score = score
         self.label = label
-        self.other_properties = kwargs
+        self._other_properties: Optional[Dict[str, Any]] = kwargs or None
 
     @property
     def center(self) -> Point2D:
@@ -42,14 +54,33 @@ class Object:
         """Devuelve los 4 puntos de la caja delimitadora en el orden de las agujas del reloj
         comenzando en la esquina superior izquierda.
 
+        Si no se ha establecido una caja delimitadora, se calcula a partir del centro, el ancho y
+        el alto del objeto.
+
         :return: puntos de las esquinas de la caja delimitadora.
         """
+        if self._bounding_box is None:
+            return self._create_bounding_box(self._center, self.width, self.height)
         return self._bounding_box
 
     @bounding_box.setter
     def bounding_box(self, new_bounding_box: BoundingBox) -> None:
         self._bounding_box = new_bounding_box
 
+    @property
+    def other_properties(self) -> Dict[str, Any]:
+        """Otras propiedades e información del objeto.
+
+        :return: diccionario con las propiedades.
+        """
+        if self._other_properties is None:
+            self._other_properties = dict()
+        return self._other_properties
+
+    @other_properties.setter
+    def other_properties(self, new_other_properties: Dict[str, Any]) -> None:
+        self._other_properties = new_other_properties or None
+
     @staticmethod
     def _create_bounding_box(center: Point2D, width: int, height: int) -> BoundingBox:
         """Calcula los puntos de la caja delimitadora dado el centro, ancho y alto.
@@ -71,9 +102,37 @@ class Object:
             Point2D(x_left, y_bottom)
         )
 
+    def __getstate__(self) -> tuple:
+        return (self.index, self._center, self.width, self.height, self.score, self.label,
+                self._bounding_box, self._other_properties)
+
+    def __setstate__(self, state) -> None:
+        """Restaura el objeto al deserializarlo.
+
+        Admite tanto el estado actual (una tupla) como el diccionario ``__dict__`` de los archivos
+        guardados con las versiones anteriores de la clase.
+
+        :param state: estado serializado del objeto.
+        :return: None.
+        """
+        if isinstance(state, dict):
+            self.index = state['index']
+            self._center = state['_center']
+            self.width = state['width']
+            self.height = state['height']
+            self.score = state['score']
+            self.label = state['label']
+            self._other_properties = state.get('other_properties') or None
+            # Solo se conserva la caja si difiere de la que se calcula bajo demanda.
+            bounding_box = state.get('_bounding_box')
+            computed = self._create_bounding_box(self._center, self.width, self.height)
+            self._bounding_box = None if bounding_box == computed else bounding_box
+        else:
+            (self.index, self._center, self.width, self.height, self.score, self.label,
+             self._bounding_box, self._other_properties) = state
+
     def __str__(self):
         return f'ObjectDetected<center={self.center}, class={self.label}, score={self.score}>'
 
     def __repr__(self):
         return self.__str__()
-
@@ -1,11 +1,44 @@
-from simple_object_detection.utils.image import load_image, draw_bounding_boxes
-from simple_object_detection.utils.video import StreamSequence, StreamSequenceWriter
-from simple_object_detection.utils.objects_detections import (generate_objects_detections,
-                                                              save_objects_detections,
-                                                              load_objects_detections,
-                                                              filter_objects_by_classes,
-                                                              filter_objects_by_min_score,
-                                                              filter_objects_avoiding_duplicated,
-                                                              filter_objects_inside_mask_region)
-
+from simple_object_detection._lazy import lazy_exports
 
+# Los nombres se importan desde su módulo la primera vez que se utilizan, para que importar
+# ``simple_object_detection.utils`` no importe OpenCV, PyTorch ni tqdm.
+_EXPORTS = {
+    'load_image': 'simple_object_detection.utils.image',
+    'draw_bounding_boxes': 'simple_object_detection.utils.image',
+    'MaskRegion': 'simple_object_detection.utils.mask',
+    'MotionGate': 'simple_object_detection.utils.motion',
+    'StreamSequence': 'simple_object_detection.utils.video.sequence',
+    'StreamSequenceWriter': 'simple_object_detection.utils.video.sequence',
+    'generate_detections': 'simple_object_detection.utils.objects_detections',
+    'generate_objects_detections': 'simple_object_detection.utils.objects_detections',
+    'generate_objects_detections_to_file': 'simple_object_detection.utils.objects_detections',
+    'save_objects_detections': 'simple_object_detection.utils.objects_detections',
+    'load_objects_detections': 'simple_object_detection.utils.objects_detections',
+    'filter_objects_by_classes': 'simple_object_detection.utils.objects_detections',
+    'filter_objects_by_min_score': 'simple_object_detection.utils.objects_detections',
+    'filter_objects_avoiding_duplicated': 'simple_object_detection.utils.objects_detections',
+    'filter_detections_avoiding_duplicated': 'simple_object_detection.utils.objects_detections',
+    'filter_objects_inside_mask_region': 'simple_object_detection.utils.objects_detections',
+    'save_detections': 'simple_object_detection.utils.detections_file',
+    'load_detections': 'simple_object_detection.utils.detections_file',
+    'convert_objects_detections': 'simple_object_detection.utils.detections_file',
+    'DetectionsWriter': 'simple_object_detection.utils.detections_file',
+    'DetectionsCache': 'simple_object_detection.utils.detections_cache',
+    'DetectionsCacheStats': 'simple_object_detection.utils.detections_cache',
+    'BatchSizeTuner': 'simple_object_detection.utils.batch_size',
+    'BatchSizeTrial': 'simple_object_detection.utils.batch_size',
+    'StageProfiler': 'simple_object_detection.utils.profiling',
+    'ProfileStats': 'simple_object_detection.utils.profiling',
+    'StageLatency': 'simple_object_detection.utils.profiling',
+    'AsyncDetector': 'simple_object_detection.utils.async_detector',
+    'AsyncDetectorStats': 'simple_object_detection.utils.async_detector',
+    'Pipeline': 'simple_object_detection.utils.pipeline',
+    'PipelineStats': 'simple_object_detection.utils.pipeline',
+    'StageStats': 'simple_object_detection.utils.pipeline',
+    'DetectionJob': 'simple_object_detection.utils.scheduler',
+    'JobResult': 'simple_object_detection.utils.scheduler',
+    'SchedulerReport': 'simple_object_detection.utils.scheduler',
+    'run_detection_jobs': 'simple_object_detection.utils.scheduler',
+}
+__all__ = list(_EXPORTS)
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
@@ -0,0 +1,176 @@
+import asyncio
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import List, NamedTuple, Optional, Tuple, Union
+
+from simple_object_detection.detection_model import DetectionModel
+from simple_object_detection.exceptions import SimpleObjectDetectionException
+from simple_object_detection.object import Object
+from simple_object_detection.typing import Image
+from simple_object_detection.utils.mask import MaskRegion
+
+
+class AsyncDetectorStats(NamedTuple):
+    """Contadores de un ``AsyncDetector``."""
+    # Frames recibidos con ``detect``.
+    requests: int
+    # Lotes enviados al modelo.
+    batches: int
+    # Lotes enviados por alcanzar el tamaño máximo (el resto, por agotar el tiempo de espera).
+    full_batches: int
+
+    @property
+    def mean_batch_size(self) -> float:
+        return self.requests / self.batches if self.batches else 0.
+
+
+# Petición pendiente: frame, futuro del llamante e instante de llegada (reloj del bucle).
+_Request = Tuple[Image, asyncio.Future, float]
+
+
+class AsyncDetector:
+    """Agrupa en lotes las detecciones pedidas de forma concurrente desde asyncio.
+
+    Cada llamada a ``await detect(frame)`` añade el frame a una cola. Los frames pendientes se
+    envían juntos al modelo (``get_images_objects``) cuando se reúnen ``max_batch_size`` o cuando
+    el más antiguo lleva ``max_wait`` segundos esperando, y cada llamada recibe los objetos de su
+    frame. La inferencia se ejecuta fuera del bucle de eventos, en ``executor`` (por defecto, un
+    único hilo propio, ya que los modelos no admiten llamadas concurrentes), y los lotes se
+    procesan de uno en uno: mientras se procesa un lote se acumulan las peticiones del siguiente.
+
+    Se utiliza como contexto asíncrono o llamando a ``close`` al terminar::
+
+        async with AsyncDetector(network, max_batch_size=8, max_wait=0.01) as detector:
+            objects = await detector.detect(frame)
+    """
+    def __init__(self,
+                 network: DetectionModel,
+                 max_batch_size: int = 8,
+                 max_wait: float = 0.005,
+                 mask: Union[Image, MaskRegion] = None,
+                 executor: Optional[Executor] = None):
+        """
+
+        :param network: red utilizada para la detección de objetos.
+        :param max_batch_size: número máximo de frames de cada lote.
+        :param max_wait: tiempo máximo (segundos) que un frame espera a que se complete su lote.
+        :param mask: máscara para aplicar la zona donde se realizará la detección.
+        :param executor: ejecutor donde se realiza la inferencia. Si es None, se crea un hilo
+        propio que se detiene con ``close``.
+        """
+        if max_batch_size < 1:
+            raise SimpleObjectDetectionException('El tamaño máximo de lote debe ser mayor que 0.')
+        if max_wait < 0:
+            raise SimpleObjectDetectionException('El tiempo de espera no puede ser negativo.')
+        self.network = network
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.mask = mask
+        self._executor = executor
+        self._own_executor = executor is None
+        self._pending: List[_Request] = []
+        self._worker: Optional[asyncio.Future] = None
+        # Se crean al empezar, dentro del bucle de eventos.
+        self._arrived: Optional[asyncio.Event] = None
+        self._full: Optional[asyncio.Event] = None
+        self._closed = False
+        self._requests = 0
+        self._batches = 0
+        self._full_batches = 0
+
+    async def __aenter__(self) -> 'AsyncDetector':
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    @property
+    def stats(self) -> AsyncDetectorStats:
+        """Contadores de frames recibidos y de lotes enviados al modelo.
+        """
+        return AsyncDetectorStats(self._requests, self._batches, self._full_batches)
+
+    async def detect(self, frame: Image) -> List[Object]:
+        """Realiza las detecciones de un frame junto con las de otras llamadas concurrentes.
+
+        :param frame: imagen en la que detectar los objetos.
+        :return: lista de objetos del frame.
+        """
+        if self._closed:
+            raise SimpleObjectDetectionException('El detector está cerrado.')
+        loop = asyncio.get_event_loop()
+        if self._worker is None:
+            self._arrived = asyncio.Event()
+            self._full = asyncio.Event()
+            self._worker = loop.create_task(self._run())
+        future = loop.create_future()
+        self._pending.append((frame, future, loop.time()))
+        self._requests += 1
+        self._arrived.set()
+        if len(self._pending) >= self.max_batch_size:
+            self._full.set()
+        return await future
+
+    async def close(self) -> None:
+        """Procesa las peticiones pendientes y detiene el detector.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        if self._worker is not None:
+            # Sin esperar a completar los lotes: ya no llegarán más peticiones.
+            self._arrived.set()
+            self._full.set()
+            await self._worker
+        if self._own_executor and self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    async def _run(self) -> None:
+        """Bucle que forma los lotes y los envía al modelo.
+        """
+        loop = asyncio.get_event_loop()
+        while True:
+            if not self._pending:
+                if self._closed:
+                    return
+                self._arrived.clear()
+                await self._arrived.wait()
+                continue
+            # Esperar a completar el lote hasta que venza el plazo del frame más antiguo.
+            timeout = self._pending[0][2] + self.max_wait - loop.time()
+            if len(self._pending) < self.max_batch_size and timeout > 0 and not self._closed:
+                try:
+                    await asyncio.wait_for(self._full.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+            batch = self._pending[:self.max_batch_size]
+            self._pending = self._pending[self.max_batch_size:]
+            if len(self._pending) < self.max_batch_size and not self._closed:
+                self._full.clear()
+            await self._process(batch)
+
+    async def _process(self, batch: List[_Request]) -> None:
+        """Realiza las detecciones de un lote y resuelve el futuro de cada petición.
+        """
+        # Las peticiones canceladas por el llamante no se procesan.
+        batch = [request for request in batch if not request[1].done()]
+        if not batch:
+            return
+        self._batches += 1
+        self._full_batches += len(batch) == self.max_batch_size
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(1, thread_name_prefix='AsyncDetector')
+        frames = [frame for frame, _, _ in batch]
+        loop = asyncio.get_event_loop()
+        try:
+            frames_objects = await loop.run_in_executor(self._executor,
+                                                        self.network.get_images_objects,
+                                                        frames, self.mask)
+        except Exception as exception:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(exception)
+            return
+        for (_, future, _), objects in zip(batch, frames_objects):
+            if not future.done():
+                future.set_result(objects)
@@ -0,0 +1,208 @@
+import os
+import threading
+import time
+from typing import List, NamedTuple, Optional, Sequence, TYPE_CHECKING, Union
+
+from simple_object_detection.detection_model import DetectionModel
+from simple_object_detection.exceptions import SimpleObjectDetectionException
+from simple_object_detection.typing import Image
+from simple_object_detection.utils.mask import MaskRegion
+
+if TYPE_CHECKING:
+    from simple_object_detection.utils.video.sequence import StreamSequence
+
+
+# Valor de ``batch_size`` que activa el ajuste automático del tamaño del lote.
+AUTO_BATCH_SIZE = 'auto'
+
+
+class BatchSizeTrial(NamedTuple):
+    """Resultado de probar un tamaño de lote."""
+    batch_size: int
+    # Frames procesados por segundo (sin contar la decodificación).
+    frames_per_second: float
+    # Memoria máxima (bytes) del proceso durante la prueba, o None si no puede medirse.
+    peak_memory: Optional[int]
+
+
+def process_memory() -> Optional[int]:
+    """Memoria residente (bytes) del proceso.
+
+    :return: memoria residente, o None si no puede medirse en el sistema.
+    """
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def available_memory() -> Optional[int]:
+    """Memoria (bytes) disponible en el sistema.
+
+    :return: memoria disponible, o None si no puede medirse en el sistema.
+    """
+    try:
+        with open('/proc/meminfo') as meminfo:
+            for line in meminfo:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+class _PeakMemorySampler:
+    """Muestrea en un hilo la memoria del proceso para obtener su máximo durante un bloque."""
+    # Intervalo (segundos) entre muestras.
+    _INTERVAL = 0.005
+
+    def __init__(self):
+        self.peak = process_memory()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def __enter__(self) -> '_PeakMemorySampler':
+        if self.peak is not None:
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        self._update()
+
+    def _sample(self) -> None:
+        while not self._stop.wait(self._INTERVAL):
+            self._update()
+
+    def _update(self) -> None:
+        memory = process_memory()
+        if memory is not None and self.peak is not None:
+            self.peak = max(self.peak, memory)
+
+
+class BatchSizeTuner:
+    """Elige el tamaño de lote de la detección probando unos pocos lotes.
+
+    Prueba tamaños de lote crecientes (``candidates``) sobre los primeros frames de la secuencia,
+    midiendo los frames procesados por segundo (tras un lote sin medir) y la memoria máxima del
+    proceso. Deja de probar cuando la memoria estimada del siguiente tamaño supera ``max_memory``
+    o cuando el rendimiento deja de mejorar, y elige el tamaño con mayor rendimiento.
+
+    Durante la ejecución, ``memory_pressure`` indica si la memoria del proceso ha superado el
+    límite, para reducir el tamaño del lote.
+
+    La memoria se mide como la memoria residente del proceso (en Linux). En otros sistemas el
+    tamaño se elige solo por el rendimiento.
+    """
+    def __init__(self,
+                 max_memory: int = None,
+                 candidates: Sequence[int] = (1, 2, 4, 8, 16, 32, 64),
+                 trial_batches: int = 2,
+                 min_improvement: float = 0.05):
+        """
+
+        :param max_memory: memoria máxima (bytes) del proceso. Por defecto, la memoria actual del
+        proceso más el 70% de la memoria disponible en el sistema.
+        :param candidates: tamaños de lote que se prueban, en orden creciente.
+        :param trial_batches: lotes que se procesan con cada tamaño.
+        :param min_improvement: mejora relativa mínima del rendimiento para seguir probando
+        tamaños mayores.
+        """
+        if not candidates or any(size < 1 for size in candidates):
+            raise SimpleObjectDetectionException('Los tamaños de lote deben ser mayores que 0.')
+        if max_memory is None:
+            current, available = process_memory(), available_memory()
+            if current is not None and available is not None:
+                max_memory = current + int(0.7 * available)
+        self.max_memory = max_memory
+        self.candidates = sorted(candidates)
+        self.trial_batches = trial_batches
+        self.min_improvement = min_improvement
+        self.trials: List[BatchSizeTrial] = []
+        # Memoria del proceso la última vez que se detectó una situación de presión.
+        self._pressure_memory = 0
+
+    def tune(self,
+             network: DetectionModel,
+             sequence: 'StreamSequence',
+             mask: Union[Image, MaskRegion] = None,
+             start: int = 0) -> int:
+        """Prueba los tamaños de lote y devuelve el elegido.
+
+        :param network: red utilizada para la detección de objetos.
+        :param sequence: secuencia de vídeo de donde se extraen los frames de prueba.
+        :param mask: máscara para aplicar la zona donde se realizará la detección.
+        :param start: índice del primer frame de prueba.
+        :return: tamaño de lote elegido.
+        """
+        self.trials = []
+        available_frames = len(sequence) - start
+        if available_frames <= 0:
+            return self.candidates[0]
+        for batch_size in self.candidates:
+            if batch_size > max(available_frames, 1) and self.trials:
+                break
+            if self._exceeds_memory(batch_size):
+                break
+            frames = sequence.get_frames(start, start + min(batch_size, available_frames))
+            # Lote sin medir para no atribuir al tamaño la preparación del modelo (reserva de
+            # memoria, elección de algoritmos, compilación) ni la de un tamaño de entrada nuevo.
+            network.get_images_detections(frames, mask)
+            with _PeakMemorySampler() as sampler:
+                elapsed = time.perf_counter()
+                for _ in range(self.trial_batches):
+                    network.get_images_detections(frames, mask)
+                elapsed = time.perf_counter() - elapsed
+            trial = BatchSizeTrial(batch_size, self.trial_batches * len(frames) / elapsed,
+                                   sampler.peak)
+            del frames
+            best = max(self.trials, key=lambda previous: previous.frames_per_second,
+                       default=None)
+            self.trials.append(trial)
+            if trial.peak_memory is not None and self.max_memory is not None and \
+                    trial.peak_memory > self.max_memory:
+                break
+            if best is not None and \
+                    trial.frames_per_second < best.frames_per_second * (1 + self.min_improvement):
+                break
+        return self.best_batch_size
+
+    @property
+    def best_batch_size(self) -> int:
+        """Tamaño de lote con mayor rendimiento entre los probados que no superan el límite de
+        memoria.
+        """
+        valid = [trial for trial in self.trials
+                 if trial.peak_memory is None or self.max_memory is None or
+                 trial.peak_memory <= self.max_memory]
+        if not valid:
+            return self.candidates[0]
+        return max(valid, key=lambda trial: trial.frames_per_second).batch_size
+
+    def memory_pressure(self) -> bool:
+        """Comprueba si la memoria del proceso supera el límite.
+
+        Como el proceso no siempre devuelve al sistema la memoria liberada, tras detectar una
+        situación de presión solo se vuelve a indicar si la memoria sigue creciendo.
+        """
+        memory = process_memory()
+        if memory is None or self.max_memory is None or memory <= self.max_memory or \
+                memory <= self._pressure_memory:
+            return False
+        self._pressure_memory = memory
+        return True
+
+    def _exceeds_memory(self, batch_size: int) -> bool:
+        """Estima, a partir de las pruebas anteriores, si un tamaño de lote superaría el límite de
+        memoria (suponiendo que la memoria crece linealmente con el tamaño del lote).
+        """
+        measured = [trial for trial in self.trials if trial.peak_memory is not None]
+        if self.max_memory is None or len(measured) < 2:
+            return False
+        previous, last = measured[-2:]
+        per_frame = max(0., (last.peak_memory - previous.peak_memory) /
+                        (last.batch_size - previous.batch_size))
+        return last.peak_memory + per_frame * (batch_size - last.batch_size) > self.max_memory
@@ -0,0 +1,306 @@
+"""Caché en disco de las detecciones de objetos, direccionada por contenido.
+
+Cada resultado se identifica por una clave calculada a partir de una huella del archivo de vídeo
+(tamaño y muestras de su contenido), el modelo (clase, tamaño de entrada, precisión, umbrales y,
+en modo local, la ruta y la fecha de modificación del archivo del modelo), la máscara, el paso
+entre frames y la etapa de movimiento. Las detecciones se guardan en segmentos de frames
+consecutivos con el formato binario de detecciones, en archivos::
+
+    <carpeta>/<clave>-<frame inicial>-<frame final (excluido)>.dets
+
+Al pedir un intervalo de frames, las partes que ya están en algún segmento se leen del disco y solo
+se calculan los intervalos que faltan, que se guardan como segmentos nuevos. Si la carpeta supera
+el tamaño máximo, se eliminan los segmentos usados hace más tiempo (LRU, según la fecha de
+modificación de los archivos, que se actualiza en cada uso).
+"""
+import hashlib
+import json
+import os
+import time
+from typing import Callable, List, NamedTuple, Optional, Tuple, TYPE_CHECKING, Union
+
+import numpy as np
+
+from simple_object_detection.detection_batch import DetectionBatch
+from simple_object_detection.detection_model import DetectionModel
+from simple_object_detection.exceptions import SimpleObjectDetectionException
+from simple_object_detection.typing import Image
+from simple_object_detection.utils.detections_file import load_detections, save_detections
+from simple_object_detection.utils.mask import MaskRegion
+from simple_object_detection.utils.motion import MotionGate
+
+if TYPE_CHECKING:
+    from simple_object_detection.utils.video.sequence import StreamSequence
+
+
+# Extensión de los segmentos de la caché.
+SEGMENT_EXTENSION = '.dets'
+
+# Umbrales del modelo que cambian sus detecciones: los de ``OpenCVDNNModel`` y
+# ``TorchScriptDetector``, y los de los modelos de torch-hub (``AutoShape``).
+_THRESHOLD_ATTRIBUTES = ('confidence_threshold', 'iou_threshold', 'max_detections',
+                         'conf', 'iou', 'max_det', 'classes')
+
+
+class DetectionsCacheStats(NamedTuple):
+    """Contadores de la caché de detecciones."""
+    # Frames servidos desde el disco.
+    hits: int
+    # Frames calculados con el modelo.
+    misses: int
+    # Segmentos eliminados por superar el tamaño máximo.
+    evictions: int
+    # Bytes ocupados por los segmentos.
+    size: int
+
+
+class _Segment(NamedTuple):
+    """Segmento de la caché: intervalo [start, stop) de frames del vídeo."""
+    path: str
+    start: int
+    stop: int
+
+
+def video_fingerprint(video_path: str, sample_size: int = 1 << 20) -> str:
+    """Huella del contenido de un archivo de vídeo.
+
+    Para no leer el archivo completo, se calcula con su tamaño y tres muestras de ``sample_size``
+    bytes (al principio, en el medio y al final).
+
+    :param video_path: ruta al archivo del vídeo.
+    :param sample_size: bytes de cada muestra.
+    :return: huella (hexadecimal) del archivo.
+    """
+    size = os.path.getsize(video_path)
+    digest = hashlib.sha1(str(size).encode())
+    with open(video_path, 'rb') as file:
+        for position in (0, max(0, size // 2 - sample_size // 2), max(0, size - sample_size)):
+            file.seek(position)
+            digest.update(file.read(sample_size))
+    return digest.hexdigest()
+
+
+def mask_fingerprint(mask: Union[Image, MaskRegion, None]) -> Optional[str]:
+    """Huella de una máscara (o de un ``MaskRegion``, que produce otras detecciones).
+
+    :param mask: máscara.
+    :return: huella (hexadecimal) de la máscara, o None si no hay máscara.
+    """
+    if mask is None:
+        return None
+    digest = hashlib.sha1()
+    if isinstance(mask, MaskRegion):
+        digest.update(f'region:{mask.shape}:{mask.offset}'.encode())
+        mask = mask.mask
+    array = np.ascontiguousarray(mask)
+    digest.update(f'{array.shape}:{array.dtype}'.encode())
+    digest.update(array.tobytes())
+    return digest.hexdigest()
+
+
+def model_fingerprint(network: DetectionModel) -> dict:
+    """Descripción de un modelo con los atributos que cambian sus detecciones.
+
+    Incluye la clase del modelo, su tamaño de entrada y precisión, los umbrales de puntuación y de
+    supresión de no máximos (del modelo o del detector que envuelve) y si se cargó en modo local.
+    En modo local se añaden la ruta, el tamaño y la fecha de modificación del archivo del modelo,
+    de forma que exportarlo de nuevo invalida las detecciones anteriores.
+
+    :param network: red utilizada para la detección de objetos.
+    :return: descripción del modelo (serializable en JSON).
+    """
+    model_class = type(network)
+    thresholds = {}
+    for source in (network, getattr(network, 'model', None)):
+        for name in _THRESHOLD_ATTRIBUTES:
+            value = getattr(source, name, None)
+            if isinstance(value, (int, float, list, tuple)):
+                thresholds[name] = value
+    local_model = None
+    offline_mode = getattr(network, 'offline_mode', None)
+    if offline_mode:
+        local_model = {'models_path': network.models_path}
+        if hasattr(network, 'local_model_path'):
+            path = os.path.abspath(network.local_model_path())
+            local_model['path'] = path
+            if os.path.isfile(path):
+                status = os.stat(path)
+                local_model['file'] = [status.st_size, status.st_mtime_ns]
+    return {
+        'class': f'{model_class.__module__}.{model_class.__qualname__}',
+        'size': getattr(network, 'size', None),
+        'precision': getattr(network, 'precision', None),
+        'thresholds': thresholds,
+        'offline_mode': offline_mode,
+        'local_model': local_model,
+    }
+
+
+class DetectionsCache:
+    """Caché en disco de las detecciones de objetos con un tamaño máximo.
+
+    Se utiliza pasándola a ``generate_detections`` (o a ``generate_objects_detections``), que solo
+    ejecuta el modelo sobre los frames que no están en la caché.
+    """
+    def __init__(self, folder: str, max_size: int = 10 * 1024 ** 3):
+        """
+
+        :param folder: carpeta donde se guardan los segmentos.
+        :param max_size: tamaño máximo (bytes) de los segmentos de la carpeta.
+        """
+        self.folder = folder
+        self.max_size = max_size
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        os.makedirs(folder, exist_ok=True)
+        self._evict()
+
+    @property
+    def stats(self) -> DetectionsCacheStats:
+        """Contadores de frames servidos y calculados, segmentos eliminados y tamaño ocupado.
+        """
+        size = sum(os.path.getsize(path) for path, _ in self._all_segments())
+        return DetectionsCacheStats(self._hits, self._misses, self._evictions, size)
+
+    @staticmethod
+    def key(network: DetectionModel,
+            sequence: 'StreamSequence',
+            mask: Union[Image, MaskRegion] = None,
+            motion_gate: MotionGate = None) -> str:
+        """Calcula la clave de las detecciones de una secuencia con un modelo.
+
+        :param network: red utilizada para la detección de objetos.
+        :param sequence: secuencia de vídeo (se utiliza su archivo y su paso entre frames).
+        :param mask: máscara aplicada en la detección.
+        :param motion_gate: etapa de movimiento utilizada en la detección.
+        :return: clave (hexadecimal).
+        """
+        gate = None
+        if motion_gate is not None:
+            gate = [motion_gate.threshold, motion_gate.pixel_threshold, motion_gate.width,
+                    motion_gate.max_skipped, mask_fingerprint(motion_gate.region)]
+        description = {
+            'video': video_fingerprint(sequence.video_path),
+            'model': model_fingerprint(network),
+            'mask': mask_fingerprint(mask),
+            # Con paso entre frames, los segmentos solo pueden reutilizarse con la misma fase.
+            'stride': [sequence.stride, sequence.start_frame % sequence.stride],
+            'motion_gate': gate,
+        }
+        return hashlib.sha1(json.dumps(description, sort_keys=True).encode()).hexdigest()
+
+    def get(self,
+            key: str,
+            start: int,
+            stop: int,
+            compute: Callable[[int, int], DetectionBatch]) -> DetectionBatch:
+        """Obtiene las detecciones de los frames [start, stop) del vídeo.
+
+        :param key: clave de las detecciones.
+        :param start: primer frame del vídeo.
+        :param stop: frame final (excluido).
+        :param compute: función que calcula las detecciones de los frames [inicio, fin) que no
+        están en la caché.
+        :return: detecciones de los frames del intervalo.
+        """
+        segments = self._segments(key)
+        pieces: List[DetectionBatch] = []
+        new_segments = 0
+        position = start
+        while position < stop:
+            segment = max((segment for segment in segments
+                           if segment.start <= position < segment.stop),
+                          key=lambda segment: segment.stop, default=None)
+            if segment is not None:
+                piece_stop = min(segment.stop, stop)
+                detections = load_detections(segment.path)
+                pieces.append(detections[position - segment.start:piece_stop - segment.start])
+                self._touch(segment.path)
+                self._hits += piece_stop - position
+            else:
+                piece_stop = min([segment.start for segment in segments
+                                  if segment.start > position] + [stop])
+                detections = compute(position, piece_stop)
+                if len(detections) != piece_stop - position:
+                    raise SimpleObjectDetectionException('Las detecciones calculadas no se '
+                                                         'corresponden con el intervalo.')
+                segments.append(self._store(key, position, piece_stop, detections))
+                pieces.append(detections)
+                new_segments += 1
+                self._misses += piece_stop - position
+            position = piece_stop
+        if not pieces:
+            return DetectionBatch.empty(0)
+        # Concatenar copia las detecciones, así que los segmentos ya pueden eliminarse.
+        result = DetectionBatch.concatenate(pieces)
+        if new_segments:
+            self._evict()
+        return result
+
+    def clear(self) -> None:
+        """Elimina todos los segmentos de la caché.
+        """
+        for path, _ in self._all_segments():
+            os.remove(path)
+
+    def _store(self, key: str, start: int, stop: int, detections: DetectionBatch) -> _Segment:
+        """Guarda un segmento de forma atómica (en un archivo temporal que después se renombra).
+        """
+        path = os.path.join(self.folder, f'{key}-{start}-{stop}{SEGMENT_EXTENSION}')
+        temporal_path = f'{path}.{os.getpid()}.tmp'
+        save_detections(detections, temporal_path)
+        os.replace(temporal_path, path)
+        return _Segment(path, start, stop)
+
+    def _segments(self, key: str) -> List[_Segment]:
+        """Segmentos guardados de una clave.
+        """
+        segments = []
+        for path, name in self._all_segments():
+            try:
+                segment_key, start, stop = name[:-len(SEGMENT_EXTENSION)].rsplit('-', 2)
+                start, stop = int(start), int(stop)
+            except ValueError:
+                # Archivo ajeno a la caché.
+                continue
+            if segment_key == key:
+                segments.append(_Segment(path, start, stop))
+        return segments
+
+    def _all_segments(self) -> List[Tuple[str, str]]:
+        """Ruta y nombre de todos los segmentos de la carpeta.
+        """
+        return [(os.path.join(self.folder, name), name) for name in os.listdir(self.folder)
+                if name.endswith(SEGMENT_EXTENSION)]
+
+    @staticmethod
+    def _touch(path: str) -> None:
+        """Marca un segmento como usado ahora.
+        """
+        now = time.time()
+        try:
+            os.utime(path, (now, now))
+        except OSError:
+            pass
+
+    def _evict(self) -> None:
+        """Elimina los segmentos usados hace más tiempo hasta no superar el tamaño máximo.
+        """
+        entries = []
+        for path, _ in self._all_segments():
+            try:
+                status = os.stat(path)
+            except OSError:
+                continue
+            entries.append((status.st_mtime, status.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            self._evictions += 1
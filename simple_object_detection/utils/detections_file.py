@@ -0,0 +1,328 @@
+"""Formato binario de archivos de detecciones.
+
+Las detecciones se guardan por columnas, igual que en ``DetectionBatch``, para poder abrir el
+archivo con ``np.memmap`` sin deserializarlo completo. Abrir un archivo solo lee la cabecera y
+acceder a ``detections[frame]`` solo lee las filas de ese frame.
+
+Estructura del archivo (little-endian)::
+
+    magic           8 bytes   b'SODDETS\\0'
+    version         uint32
+    reserved        uint32
+    num_frames      uint64    F
+    num_detections  uint64    N
+    names_length    uint64    longitud en bytes de los nombres de las clases
+    class_names     JSON (UTF-8) con la lista de nombres de las clases
+    offsets         int64     (F + 1,)
+    frames          int32     (N,)
+    xywh            int32     (N, 4)
+    scores          float32   (N,)
+    class_ids       int32     (N,)
+
+Cada sección comienza en una posición alineada a ``ALIGNMENT`` bytes.
+"""
+import json
+import os
+import pickle
+import shutil
+import struct
+from typing import Dict, List, Tuple, Union
+
+import numpy as np
+
+from simple_object_detection.constants import COCO_NAMES
+from simple_object_detection.detection_batch import DetectionBatch, merge_class_names
+from simple_object_detection.exceptions import SimpleObjectDetectionException
+from simple_object_detection.object import Object
+
+
+MAGIC = b'SODDETS\0'
+VERSION = 1
+ALIGNMENT = 64
+_HEADER = struct.Struct('<8sIIQQQ')
+# Nombre, tipo y número de columnas de cada sección tras la cabecera.
+_COLUMNS: List[Tuple[str, np.dtype, int]] = [
+    ('frames', np.dtype('<i4'), 1),
+    ('xywh', np.dtype('<i4'), 4),
+    ('scores', np.dtype('<f4'), 1),
+    ('class_ids', np.dtype('<i4'), 1),
+]
+
+
+def _align(position: int) -> int:
+    """Redondea la posición al siguiente múltiplo de ``ALIGNMENT``.
+    """
+    return (position + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def _layout(num_frames: int, num_detections: int, names_length: int) -> Dict[str, int]:
+    """Calcula la posición de inicio de cada sección del archivo.
+
+    :param num_frames: número de frames.
+    :param num_detections: número de detecciones.
+    :param names_length: longitud en bytes de los nombres de las clases.
+    :return: diccionario sección -> posición en bytes. Incluye la posición final ``end``.
+    """
+    position = _align(_HEADER.size + names_length)
+    sections = {'offsets': position}
+    position = _align(position + (num_frames + 1) * np.dtype('<i8').itemsize)
+    for name, dtype, columns in _COLUMNS:
+        sections[name] = position
+        position = _align(position + num_detections * columns * dtype.itemsize)
+    sections['end'] = position
+    return sections
+
+
+def _write_header(file, num_frames: int, num_detections: int, names: bytes) -> Dict[str, int]:
+    """Escribe la cabecera y los nombres de las clases al comienzo del archivo.
+
+    :param file: archivo abierto en modo binario.
+    :param num_frames: número de frames.
+    :param num_detections: número de detecciones.
+    :param names: nombres de las clases codificados.
+    :return: posición de inicio de cada sección.
+    """
+    file.seek(0)
+    file.write(_HEADER.pack(MAGIC, VERSION, 0, num_frames, num_detections, len(names)))
+    file.write(names)
+    return _layout(num_frames, num_detections, len(names))
+
+
+def _encode_class_names(class_names: List[str]) -> bytes:
+    return json.dumps(list(class_names), ensure_ascii=False).encode('utf-8')
+
+
+def is_detections_file(file_path: str) -> bool:
+    """Comprueba si un archivo tiene el formato binario de detecciones.
+
+    :param file_path: dirección al archivo.
+    :return: si el archivo comienza con la cabecera del formato.
+    """
+    with open(file_path, 'rb') as file:
+        return file.read(len(MAGIC)) == MAGIC
+
+
+def save_detections(detections: Union[DetectionBatch, List[List[Object]]],
+                    file_output: str) -> None:
+    """Guarda las detecciones de una secuencia en el formato binario.
+
+    Si el archivo existe, lo sobreescribe. Las otras propiedades (``other_properties``) de los
+    objetos no se guardan.
+
+    :param detections: detecciones indexadas por frame.
+    :param file_output: archivo donde se guardarán las detecciones.
+    """
+    if not isinstance(detections, DetectionBatch):
+        detections = DetectionBatch.from_objects(detections)
+    columns = {
+        'offsets': detections.offsets.astype('<i8', copy=False),
+        'frames': detections.frames.astype('<i4', copy=False),
+        'xywh': detections.xywh.astype('<i4', copy=False),
+        'scores': detections.scores.astype('<f4', copy=False),
+        'class_ids': detections.class_ids.astype('<i4', copy=False),
+    }
+    with open(file_output, 'wb') as file:
+        sections = _write_header(file, len(detections), detections.num_detections,
+                                 _encode_class_names(detections.class_names))
+        for name, column in columns.items():
+            file.seek(sections[name])
+            file.write(np.ascontiguousarray(column).tobytes())
+        file.truncate(sections['end'])
+
+
+def load_detections(file_path: str, mmap: bool = True) -> DetectionBatch:
+    """Carga las detecciones guardadas en el formato binario.
+
+    Con ``mmap`` las columnas se proyectan en memoria con ``np.memmap``: abrir el archivo tiene
+    coste constante y solo se leen del disco las filas de los frames a los que se accede.
+
+    :param file_path: dirección al archivo.
+    :param mmap: si proyectar el archivo en memoria en lugar de leerlo completo.
+    :return: detecciones indexadas por frame.
+    """
+    with open(file_path, 'rb') as file:
+        header = file.read(_HEADER.size)
+        if len(header) < _HEADER.size or header[:len(MAGIC)] != MAGIC:
+            raise SimpleObjectDetectionException(f'{file_path} no es un archivo de detecciones.')
+        _, version, _, num_frames, num_detections, names_length = _HEADER.unpack(header)
+        if version != VERSION:
+            raise SimpleObjectDetectionException(f'La versión {version} del archivo de '
+                                                 f'detecciones no está soportada.')
+        class_names = json.loads(file.read(names_length).decode('utf-8'))
+        sections = _layout(num_frames, num_detections, names_length)
+        shapes = {'offsets': (np.dtype('<i8'), (num_frames + 1,))}
+        for name, dtype, columns in _COLUMNS:
+            shape = (num_detections, columns) if columns > 1 else (num_detections,)
+            shapes[name] = (dtype, shape)
+        arrays = {}
+        for name, (dtype, shape) in shapes.items():
+            if mmap and shape[0] > 0:
+                arrays[name] = np.memmap(file_path, dtype=dtype, mode='r',
+                                         offset=sections[name], shape=shape)
+            else:
+                file.seek(sections[name])
+                count = int(np.prod(shape))
+                arrays[name] = np.fromfile(file, dtype=dtype, count=count).reshape(shape)
+    return DetectionBatch(arrays['frames'], arrays['xywh'], arrays['scores'],
+                          arrays['class_ids'], arrays['offsets'], class_names)
+
+
+def convert_objects_detections(file_path: str,
+                               file_output: str,
+                               encoding: str = 'ASCII') -> None:
+    """Convierte un archivo de detecciones guardado con pickle al formato binario.
+
+    :param file_path: dirección al archivo pickle (``save_objects_detections``).
+    :param file_output: archivo de salida en el formato binario.
+    :param encoding: codificación del archivo pickle.
+    """
+    with open(file_path, 'rb') as file:
+        objects_detections = pickle.load(file, encoding=encoding)
+    save_detections(objects_detections, file_output)
+
+
+class DetectionsWriter:
+    """Escritura incremental de detecciones en el formato binario con puntos de control.
+
+    Mientras la escritura está en curso, las columnas se añaden al final de unos archivos en la
+    carpeta ``<file_output>.partial`` y, tras cada lote, se guarda un punto de control con el
+    número de frames completados. Si el proceso se interrumpe, al crear de nuevo el escritor con
+    ``resume=True`` se descarta lo escrito tras el último punto de control y se continúa desde el
+    frame ``num_frames``.
+
+    Al cerrarlo, las columnas se copian por bloques al archivo final y se elimina la carpeta
+    temporal, por lo que la memoria utilizada no depende de la longitud de la secuencia.
+    """
+    _CHECKPOINT = 'checkpoint.json'
+    _COPY_ROWS = 1 << 20
+
+    def __init__(self, file_output: str, class_names: List[str] = COCO_NAMES,
+                 resume: bool = True, fingerprint: str = None):
+        """
+
+        :param file_output: archivo donde se guardarán las detecciones al cerrar el escritor.
+        :param class_names: nombres de las clases.
+        :param resume: si continuar desde el último punto de control, en caso de existir.
+        :param fingerprint: huella de los datos con los que se generan las detecciones (vídeo,
+        modelo, máscara...). Solo se continúa desde un punto de control con la misma huella.
+        """
+        self.file_output = file_output
+        self.class_names = list(class_names)
+        self.fingerprint = fingerprint
+        self._folder = f'{file_output}.partial'
+        self.num_frames = 0
+        self.num_detections = 0
+        checkpoint_path = os.path.join(self._folder, self._CHECKPOINT)
+        if resume and os.path.exists(checkpoint_path):
+            with open(checkpoint_path, 'r') as file:
+                checkpoint = json.load(file)
+            # El punto de control puede tener además las etiquetas que el modelo no declaraba.
+            if checkpoint['class_names'][:len(self.class_names)] != self.class_names:
+                raise SimpleObjectDetectionException('Los nombres de las clases no coinciden con '
+                                                     'los del punto de control.')
+            self.class_names = checkpoint['class_names']
+            if checkpoint.get('fingerprint') != fingerprint:
+                raise SimpleObjectDetectionException('El punto de control se generó con otros '
+                                                     'datos (vídeo, modelo, máscara o paso entre '
+                                                     'frames).')
+            self.num_frames = checkpoint['num_frames']
+            self.num_detections = checkpoint['num_detections']
+        else:
+            shutil.rmtree(self._folder, ignore_errors=True)
+            os.makedirs(self._folder)
+        # Abrir las columnas descartando lo escrito después del último punto de control.
+        self._files = {}
+        for name, dtype, columns in self._partial_columns():
+            path = os.path.join(self._folder, f'{name}.bin')
+            file = open(path, 'r+b' if os.path.exists(path) else 'w+b')
+            rows = self.num_frames if name == 'counts' else self.num_detections
+            file.truncate(rows * columns * dtype.itemsize)
+            file.seek(0, os.SEEK_END)
+            self._files[name] = file
+        self._write_checkpoint()
+
+    def __enter__(self) -> 'DetectionsWriter':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        # Si hubo un error se conserva el punto de control para poder continuar.
+        if exc_type is None:
+            self.close()
+        else:
+            self._close_files()
+
+    @staticmethod
+    def _partial_columns() -> List[Tuple[str, np.dtype, int]]:
+        return [('counts', np.dtype('<i8'), 1)] + _COLUMNS
+
+    def append(self, detections: DetectionBatch) -> None:
+        """Añade las detecciones de los frames siguientes y guarda un punto de control.
+
+        :param detections: detecciones de los frames a continuación de los ya escritos.
+        """
+        if detections.class_names != self.class_names:
+            # Las etiquetas nuevas se añaden al final de los nombres de las clases del escritor.
+            self.class_names = merge_class_names(self.class_names, detections.class_names)
+            detections = detections.relabel(self.class_names)
+        columns = {
+            'counts': np.diff(detections.offsets).astype('<i8'),
+            'frames': (detections.frames + self.num_frames).astype('<i4'),
+            'xywh': detections.xywh.astype('<i4', copy=False),
+            'scores': detections.scores.astype('<f4', copy=False),
+            'class_ids': detections.class_ids.astype('<i4', copy=False),
+        }
+        for name, column in columns.items():
+            file = self._files[name]
+            file.write(np.ascontiguousarray(column).tobytes())
+            file.flush()
+            os.fsync(file.fileno())
+        self.num_frames += len(detections)
+        self.num_detections += detections.num_detections
+        self._write_checkpoint()
+
+    def close(self) -> None:
+        """Escribe el archivo final de detecciones y elimina los archivos temporales.
+        """
+        temporal_output = f'{self.file_output}.tmp'
+        with open(temporal_output, 'wb') as output:
+            sections = _write_header(output, self.num_frames, self.num_detections,
+                                     _encode_class_names(self.class_names))
+            # Offsets a partir del número de detecciones de cada frame.
+            counts_file = self._files['counts']
+            counts_file.seek(0)
+            output.seek(sections['offsets'])
+            output.write(np.zeros(1, dtype='<i8').tobytes())
+            total = 0
+            for rows in range(0, self.num_frames, self._COPY_ROWS):
+                counts = np.fromfile(counts_file, dtype='<i8',
+                                     count=min(self._COPY_ROWS, self.num_frames - rows))
+                offsets = np.cumsum(counts) + total
+                total = int(offsets[-1])
+                output.write(offsets.astype('<i8').tobytes())
+            # Columnas de las detecciones.
+            for name, _, _ in _COLUMNS:
+                file = self._files[name]
+                file.seek(0)
+                output.seek(sections[name])
+                shutil.copyfileobj(file, output)
+            output.truncate(sections['end'])
+        os.replace(temporal_output, self.file_output)
+        self._close_files()
+        shutil.rmtree(self._folder, ignore_errors=True)
+
+    def _close_files(self) -> None:
+        for file in self._files.values():
+            file.close()
+
+    def _write_checkpoint(self) -> None:
+        """Guarda de forma atómica el número de frames y detecciones escritos.
+        """
+        checkpoint = {'version': VERSION,
+                      'class_names': self.class_names,
+                      'fingerprint': self.fingerprint,
+                      'num_frames': self.num_frames,
+                      'num_detections': self.num_detections}
+        checkpoint_path = os.path.join(self._folder, self._CHECKPOINT)
+        with open(f'{checkpoint_path}.tmp', 'w') as file:
+            json.dump(checkpoint, file)
+        os.replace(f'{checkpoint_path}.tmp', checkpoint_path)
@@ -1,7 +1,7 @@
 import numpy as np
 import cv2
 
-from typing import List
+from typing import List, Tuple
 
 from simple_object_detection.typing import Image
 from simple_object_detection.object import Object
@@ -45,3 +45,28 @@ def load_image(file_path: str) -> Image:
         raise SimpleObjectDetectionException('The image path doesn\'t exists.')
     img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
     return img
+
+
+def letterbox(image: Image,
+              new_shape: Tuple[int, int],
+              color: Tuple[int, int, int] = (114, 114, 114)
+              ) -> Tuple[Image, float, Tuple[int, int]]:
+    """Redimensiona una imagen a ``new_shape`` conservando su relación de aspecto y rellena con
+    ``color`` los bordes sobrantes, dejando la imagen centrada.
+
+    :param image: imagen.
+    :param new_shape: alto y ancho de la imagen resultante.
+    :param color: color del relleno.
+    :return: imagen redimensionada, factor de escala aplicado y desplazamiento (x, y) de la
+    imagen dentro del resultado.
+    """
+    height, width = image.shape[:2]
+    ratio = min(new_shape[0] / height, new_shape[1] / width)
+    resized_width, resized_height = int(round(width * ratio)), int(round(height * ratio))
+    if (resized_width, resized_height) != (width, height):
+        image = cv2.resize(image, (resized_width, resized_height), interpolation=cv2.INTER_LINEAR)
+    pad_width, pad_height = new_shape[1] - resized_width, new_shape[0] - resized_height
+    left, top = int(round(pad_width / 2 - 0.1)), int(round(pad_height / 2 - 0.1))
+    right, bottom = pad_width - left, pad_height - top
+    image = cv2.copyMakeBorder(image, top, bottom, left, right, cv2.BORDER_CONSTANT, value=color)
+    return image, ratio, (left, top)
@@ -0,0 +1,112 @@
+from typing import List, Tuple, Union
+
+import numpy as np
+
+from simple_object_detection.detection_batch import DetectionBatch
+from simple_object_detection.exceptions import SimpleObjectDetectionException
+from simple_object_detection.typing import Image
+
+
+class MaskRegion:
+    """Máscara de la zona de detección recortada a su rectángulo delimitador.
+
+    El rectángulo que contiene la zona de la máscara se calcula una sola vez. Al aplicarla, de cada
+    imagen solo se toma ese rectángulo (como vista, sin copiar) y se enmascara, de forma que la
+    red recibe imágenes más pequeñas. Las detecciones obtenidas se desplazan después a las
+    coordenadas de la imagen completa con ``restore``.
+
+    Si la zona de la máscara ocupa todo su rectángulo, el recorte es suficiente y no se aplica la
+    máscara a los píxeles.
+    """
+    def __init__(self, mask: Image):
+        """
+
+        :param mask: máscara (alto, ancho, 3) o (alto, ancho) con la zona donde se realizará la
+        detección distinta de 0.
+        """
+        region = mask.any(axis=2) if mask.ndim == 3 else mask.astype(bool)
+        rows, columns = np.flatnonzero(region.any(axis=1)), np.flatnonzero(region.any(axis=0))
+        if len(rows) == 0:
+            raise SimpleObjectDetectionException('La máscara no contiene ninguna zona.')
+        self.shape = mask.shape[:2]
+        self.top, self.bottom = int(rows[0]), int(rows[-1]) + 1
+        self.left, self.right = int(columns[0]), int(columns[-1]) + 1
+        crop = mask[self.top:self.bottom, self.left:self.right]
+        if crop.ndim == 2:
+            crop = np.repeat(crop[..., None], 3, axis=2)
+        self.mask = np.ascontiguousarray(crop)
+        # Si toda la zona del rectángulo pertenece a la máscara no es necesario aplicarla.
+        self.is_rectangle = bool(self.mask.all())
+
+    def __repr__(self) -> str:
+        return f'MaskRegion<x={self.left}, y={self.top}, width={self.width}, ' \
+               f'height={self.height}>'
+
+    @property
+    def width(self) -> int:
+        """Ancho del rectángulo de la máscara.
+        """
+        return self.right - self.left
+
+    @property
+    def height(self) -> int:
+        """Alto del rectángulo de la máscara.
+        """
+        return self.bottom - self.top
+
+    @property
+    def offset(self) -> Tuple[int, int]:
+        """Posición (x, y) de la esquina superior izquierda del rectángulo en la imagen.
+        """
+        return self.left, self.top
+
+    def to_image(self) -> Image:
+        """Máscara del tamaño de la imagen completa (alto, ancho, 3).
+        """
+        mask = np.zeros((*self.shape, 3), dtype=self.mask.dtype)
+        mask[self.top:self.bottom, self.left:self.right] = self.mask
+        return mask
+
+    def apply(self,
+              images: Union[List[Image], np.ndarray],
+              in_place: bool = False) -> Union[List[Image], np.ndarray]:
+        """Recorta las imágenes al rectángulo de la máscara y las enmascara.
+
+        :param images: lista de imágenes o array contiguo de forma (N, alto, ancho, 3).
+        :param in_place: si enmascarar directamente los píxeles de las imágenes (que se modifican)
+        en lugar de copiar el recorte.
+        :return: recortes enmascarados de las imágenes. Si ``images`` es un array, un array de
+        forma (N, alto del rectángulo, ancho del rectángulo, 3).
+        """
+        for image in images:
+            if image.shape[:2] != self.shape:
+                raise SimpleObjectDetectionException(f'El tamaño de la imagen {image.shape[:2]} '
+                                                     f'no coincide con el de la máscara '
+                                                     f'{self.shape}.')
+        if isinstance(images, np.ndarray):
+            crops = images[:, self.top:self.bottom, self.left:self.right]
+            if self.is_rectangle:
+                return crops
+            if not in_place:
+                return np.bitwise_and(crops, self.mask)
+            np.bitwise_and(crops, self.mask, out=crops)
+            return crops
+        crops = [image[self.top:self.bottom, self.left:self.right] for image in images]
+        if self.is_rectangle:
+            return crops
+        if not in_place:
+            return [np.bitwise_and(crop, self.mask) for crop in crops]
+        for crop in crops:
+            np.bitwise_and(crop, self.mask, out=crop)
+        return crops
+
+    def restore(self, detections: DetectionBatch) -> DetectionBatch:
+        """Desplaza (en el sitio) las detecciones de los recortes a las coordenadas de la imagen
+        completa.
+
+        :param detections: detecciones obtenidas en los recortes.
+        :return: las mismas detecciones, en coordenadas de la imagen completa.
+        """
+        detections.xywh[:, 0] += self.left
+        detections.xywh[:, 1] += self.top
+        return detections
@@ -0,0 +1,170 @@
+from typing import List, Optional, Union
+
+import numpy as np
+
+from simple_object_detection.detection_batch import DetectionBatch
+from simple_object_detection.detection_model import DetectionModel
+from simple_object_detection.typing import Image
+from simple_object_detection.utils.mask import MaskRegion
+
+
+class MotionGate:
+    """Etapa previa al modelo de detección que evita procesar los frames sin movimiento.
+
+    Cada frame se compara con el último frame procesado por el modelo, ambos reducidos a escala de
+    grises y a un ancho de ``width`` píxeles (y limitados a la zona de ``mask`` si se indica). Si
+    la proporción de píxeles que cambian más de ``pixel_threshold`` niveles no supera
+    ``threshold``, el frame se considera estático y se le asignan las detecciones del frame
+    anterior en lugar de procesarlo.
+
+    Está pensado para cámaras fijas, donde hay largos intervalos sin vehículos en movimiento. Los
+    contadores ``frames`` y ``skipped`` indican los frames comprobados y los que se han saltado.
+    """
+    def __init__(self,
+                 threshold: float = 0.002,
+                 pixel_threshold: int = 25,
+                 width: int = 160,
+                 mask: Union[Image, MaskRegion] = None,
+                 max_skipped: Optional[int] = None):
+        """
+
+        :param threshold: proporción de píxeles que deben cambiar para procesar el frame.
+        :param pixel_threshold: diferencia mínima (niveles de gris) para que un píxel cambie.
+        :param width: ancho al que se reducen los frames para compararlos.
+        :param mask: máscara con la zona donde se buscan cambios. Por defecto, todo el frame.
+        :param max_skipped: máximo de frames estáticos seguidos que se saltan. Si es None, no hay
+        límite.
+        """
+        self.threshold = threshold
+        self.pixel_threshold = pixel_threshold
+        self.width = width
+        self.region = mask if mask is None or isinstance(mask, MaskRegion) else MaskRegion(mask)
+        self.max_skipped = max_skipped
+        self.frames = 0
+        self.skipped = 0
+        # Frame reducido (escala de grises) del último frame procesado por el modelo.
+        self._reference: Optional[np.ndarray] = None
+        # Zona de la máscara en los frames reducidos.
+        self._zone: Optional[np.ndarray] = None
+        self._consecutive_skipped = 0
+        # Detecciones del último frame del lote anterior.
+        self._last_detections: Optional[DetectionBatch] = None
+
+    def __repr__(self) -> str:
+        return f'MotionGate<frames={self.frames}, skipped={self.skipped}>'
+
+    @property
+    def skipped_ratio(self) -> float:
+        """Proporción de los frames comprobados que se han saltado.
+        """
+        return self.skipped / self.frames if self.frames else 0.
+
+    def reset(self) -> None:
+        """Olvida el frame de referencia y las detecciones anteriores (por ejemplo, al empezar
+        otra secuencia). Los contadores se mantienen.
+        """
+        self._reference = None
+        self._consecutive_skipped = 0
+        self._last_detections = None
+
+    def select(self, frames: Union[List[Image], np.ndarray]) -> np.ndarray:
+        """Decide qué frames del lote debe procesar el modelo.
+
+        Los frames deben pasarse en orden, sin la máscara aplicada.
+
+        :param frames: lote de frames.
+        :return: máscara booleana con los frames que deben procesarse.
+        """
+        processed = np.ones(len(frames), dtype=bool)
+        for index, frame in enumerate(frames):
+            small = self._reduce(frame)
+            if self._reference is not None and self._is_static(small) and \
+                    (self.max_skipped is None or self._consecutive_skipped < self.max_skipped):
+                processed[index] = False
+                self._consecutive_skipped += 1
+            else:
+                self._reference = small
+                self._consecutive_skipped = 0
+        self.frames += len(frames)
+        self.skipped += int(len(frames) - processed.sum())
+        return processed
+
+    def fill(self, detections: DetectionBatch, processed: np.ndarray) -> DetectionBatch:
+        """Completa las detecciones del lote asignando a cada frame saltado las del frame anterior.
+
+        Los lotes deben pasarse en el mismo orden que a ``select``.
+
+        :param detections: detecciones de los frames procesados.
+        :param processed: máscara devuelta por ``select`` para el lote.
+        :return: detecciones de todos los frames del lote.
+        """
+        previous = self._last_detections
+        if previous is None:
+            previous = DetectionBatch.empty(1, detections.class_names)
+        # Índice 0: último frame del lote anterior. Índice i > 0: i-ésimo frame procesado.
+        sources = np.cumsum(processed)
+        batch = DetectionBatch.concatenate([previous, detections]).take(sources)
+        if len(batch):
+            self._last_detections = batch[len(batch) - 1:]
+        return batch
+
+    def detect(self,
+               network: DetectionModel,
+               frames: Union[List[Image], np.ndarray],
+               mask: Union[Image, MaskRegion] = None,
+               in_place: bool = False) -> DetectionBatch:
+        """Realiza las detecciones de un lote de frames procesando solo los frames con movimiento.
+
+        :param network: red utilizada para la detección de objetos.
+        :param frames: lote de frames, en orden.
+        :param mask: máscara para aplicar la zona donde se realizará la detección.
+        :param in_place: si aplicar la máscara directamente sobre los frames.
+        :return: detecciones de todos los frames del lote.
+        """
+        processed = self.select(frames)
+        selected = self.selected_frames(frames, processed)
+        if len(selected) == 0:
+            detections = DetectionBatch.empty(0, network.class_names)
+        else:
+            detections = network.get_images_detections(selected, mask, in_place)
+        return self.fill(detections, processed)
+
+    @staticmethod
+    def selected_frames(frames: Union[List[Image], np.ndarray],
+                        processed: np.ndarray) -> Union[List[Image], np.ndarray]:
+        """Frames del lote que deben procesarse.
+
+        :param frames: lote de frames.
+        :param processed: máscara devuelta por ``select`` para el lote.
+        :return: frames seleccionados (el mismo lote si se procesan todos).
+        """
+        if processed.all():
+            return frames
+        if isinstance(frames, np.ndarray):
+            return frames[processed]
+        return [frame for frame, keep in zip(frames, processed) if keep]
+
+    def _reduce(self, frame: Image) -> np.ndarray:
+        """Recorta el frame a la zona de la máscara, lo reduce y lo convierte a escala de grises.
+        """
+        import cv2
+        if self.region is not None:
+            frame = frame[self.region.top:self.region.bottom, self.region.left:self.region.right]
+        height, width = frame.shape[:2]
+        if width > self.width:
+            size = (self.width, max(1, round(height * self.width / width)))
+            frame = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+        small = cv2.cvtColor(np.ascontiguousarray(frame), cv2.COLOR_RGB2GRAY).astype(np.int16)
+        if self._zone is None and self.region is not None and not self.region.is_rectangle:
+            zone = self.region.mask[..., 0].astype(np.uint8)
+            self._zone = cv2.resize(zone, small.shape[::-1],
+                                    interpolation=cv2.INTER_NEAREST).astype(bool)
+        return small
+
+    def _is_static(self, small: np.ndarray) -> bool:
+        """Comprueba si el frame reducido apenas cambia respecto al de referencia.
+        """
+        changed = np.abs(small - self._reference) > self.pixel_threshold
+        if self._zone is not None:
+            return changed[self._zone].sum() <= self.threshold * max(1, self._zone.sum())
+        return changed.sum() <= self.threshold * changed.size
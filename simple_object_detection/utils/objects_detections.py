@@ -1,45 +1,402 @@
+import os
+from contextlib import contextmanager
 from math import ceil
 
 import numpy as np
 import pickle
 
-from typing import List, Any
-from tqdm import tqdm
+from typing import TYPE_CHECKING, Callable, Iterator, List, Optional, Tuple, Union
 
+from simple_object_detection.detection_batch import DetectionBatch
 from simple_object_detection.detection_model import DetectionModel
+from simple_object_detection.exceptions import SimpleObjectDetectionException
 from simple_object_detection.typing import Image
 from simple_object_detection.object import Object
-from simple_object_detection.utils.video import StreamSequence
+from simple_object_detection.utils.batch_size import AUTO_BATCH_SIZE, BatchSizeTuner
+from simple_object_detection.utils.mask import MaskRegion
+from simple_object_detection.utils.motion import MotionGate
+from simple_object_detection.utils.detections_cache import DetectionsCache
+from simple_object_detection.utils.detections_file import (DetectionsWriter, is_detections_file,
+                                                           load_detections)
+from simple_object_detection.utils.pipeline import Pipeline
+from simple_object_detection.utils.profiling import BATCH_STAGE
+
+if TYPE_CHECKING:
+    from simple_object_detection.utils.video.sequence import StreamSequence
 
 
 def generate_objects_detections(network: DetectionModel,
-                                sequence: StreamSequence,
-                                batch_size: int = 1,
-                                mask: Image = None,
-                                verbose: bool = False) -> List[List[Object]]:
+                                sequence: 'StreamSequence',
+                                batch_size: Union[int, str, BatchSizeTuner] = 1,
+                                mask: Union[Image, MaskRegion] = None,
+                                verbose: bool = False,
+                                stride: int = None,
+                                pipeline: Pipeline = None,
+                                motion_gate: MotionGate = None,
+                                cache: DetectionsCache = None) -> List[List[Object]]:
     """Genera las detecciones de objetos en cada frame de una secuencia de vídeo.
 
+    Es igual que ``generate_detections``, pero devuelve la lista de objetos de cada frame.
+
     :param network: red utilizada para la detección de objetos.
     :param sequence: video donde extraer los frames.
-    :param batch_size: tamaño de frames que se mandan procesar al modelo de detección.
+    :param batch_size: tamaño de frames que se mandan procesar al modelo de detección, o 'auto'.
     :param mask: máscara para aplicar la zona donde se realizará la detección en la secuencia.
     :param verbose: indica si se quiere mostrar la barra de progreso o no.
+    :param stride: paso entre frames. Si es None, se utiliza el de la secuencia.
+    :param pipeline: pipeline con el que ejecutar las etapas concurrentemente.
+    :param motion_gate: etapa que salta los frames sin movimiento.
+    :param cache: caché en disco de las detecciones.
     :return: lista con las detecciones por indexada por frame.
     """
-    frames_objects = []
-    iterations = ceil(len(sequence) / batch_size)
+    return generate_detections(network, sequence, batch_size, mask, verbose, stride, pipeline,
+                               motion_gate, cache).to_objects()
+
+
+def generate_detections(network: DetectionModel,
+                        sequence: 'StreamSequence',
+                        batch_size: Union[int, str, BatchSizeTuner] = 1,
+                        mask: Union[Image, MaskRegion] = None,
+                        verbose: bool = False,
+                        stride: int = None,
+                        pipeline: Pipeline = None,
+                        motion_gate: MotionGate = None,
+                        cache: DetectionsCache = None) -> DetectionBatch:
+    """Genera las detecciones de objetos en cada frame de una secuencia de vídeo almacenadas por
+    columnas en un ``DetectionBatch``, sin crear un ``Object`` por cada detección.
+
+    Si la secuencia tiene un paso entre frames (``stride``), solo se detectan objetos en uno de
+    cada ``stride`` frames, pero las detecciones conservan el número de frame original: el
+    resultado tiene un elemento por cada frame entre el frame inicial y el final, y los frames
+    saltados quedan vacíos.
+
+    Si se indica un ``pipeline``, la decodificación, el preprocesado, la inferencia y el
+    postprocesado de los lotes se ejecutan en etapas concurrentes, de forma que la red procesa un
+    lote mientras se decodifica el siguiente y se postprocesa el anterior. Al terminar,
+    ``pipeline.stats`` indica el tiempo de trabajo y de espera de cada etapa.
+
+    Con una ``cache``, los intervalos de frames ya calculados antes (con el mismo vídeo, modelo,
+    máscara y paso entre frames) se leen del disco y solo se ejecuta el modelo en los que faltan.
+
+    :param network: red utilizada para la detección de objetos.
+    :param sequence: video donde extraer los frames.
+    :param batch_size: tamaño de frames que se mandan procesar al modelo de detección. Con
+    'auto' (o un ``BatchSizeTuner``) se elige probando unos pocos lotes y se reduce si la memoria
+    del proceso supera el límite durante la ejecución.
+    :param mask: máscara para aplicar la zona donde se realizará la detección en la secuencia.
+    Con un ``MaskRegion`` la red solo procesa el rectángulo que contiene la zona de la máscara.
+    :param verbose: indica si se quiere mostrar la barra de progreso o no.
+    :param stride: paso entre frames. Si es None, se utiliza el de la secuencia.
+    :param pipeline: pipeline con el que ejecutar las etapas concurrentemente. Si es None, los
+    lotes se procesan de forma secuencial.
+    :param motion_gate: etapa que salta los frames sin movimiento, reutilizando las detecciones
+    del frame anterior. Al terminar, ``motion_gate.skipped`` indica los frames saltados.
+    :param cache: caché en disco de las detecciones.
+    :return: detecciones indexadas por frame.
+    """
+    with _sequence_stride(sequence, stride):
+        # Tamaño del lote y ajustador, elegidos en el primer intervalo que se calcula y
+        # reutilizados en el resto de intervalos que faltan en la caché.
+        tuned: List[Tuple[int, Optional[BatchSizeTuner]]] = []
+
+        def compute(range_start: int, range_stop: int) -> DetectionBatch:
+            """Detecciones de los frames [range_start, range_stop) relativos al frame inicial.
+            """
+            if not tuned:
+                tuned.append(_resolve_batch_size(network, sequence, batch_size, mask,
+                                                 ceil(range_start / sequence.stride)))
+            range_batch_size, tuner = tuned[0]
+            batches_detections, num_frames = [], 0
+            batches = _generate_batches_detections(network, sequence, range_batch_size, mask,
+                                                   verbose, start=range_start, pipeline=pipeline,
+                                                   motion_gate=motion_gate, tuner=tuner)
+            for detections in batches:
+                batches_detections.append(detections)
+                num_frames += len(detections)
+                if num_frames >= range_stop - range_start:
+                    break
+            batches.close()
+            if not batches_detections:
+                return DetectionBatch.empty(0, network.class_names)
+            return DetectionBatch.concatenate(batches_detections)[:range_stop - range_start]
+
+        span = _sequence_span(sequence)
+        if cache is None:
+            return compute(0, span)
+        first_frame = sequence.start_frame
+        return cache.get(cache.key(network, sequence, mask, motion_gate),
+                         first_frame, first_frame + span,
+                         lambda range_start, range_stop: compute(range_start - first_frame,
+                                                                 range_stop - first_frame))
+
+
+def generate_objects_detections_to_file(network: DetectionModel,
+                                        sequence: 'StreamSequence',
+                                        file_output: str,
+                                        batch_size: Union[int, str, BatchSizeTuner] = 1,
+                                        mask: Union[Image, MaskRegion] = None,
+                                        verbose: bool = False,
+                                        resume: bool = True,
+                                        stride: int = None,
+                                        pipeline: Pipeline = None,
+                                        motion_gate: MotionGate = None) -> DetectionBatch:
+    """Genera las detecciones de objetos en cada frame de una secuencia de vídeo y las va
+    guardando en un archivo en el formato binario de detecciones.
+
+    Las detecciones de cada lote se añaden al archivo según se obtienen, junto con un punto de
+    control del último frame completado, así que la memoria utilizada no crece con la longitud de
+    la secuencia. Si la ejecución se interrumpe, al llamar de nuevo a la función con ``resume``
+    se continúa desde el último frame completado. El punto de control guarda una huella del
+    vídeo, el modelo, la máscara, el paso entre frames y la etapa de movimiento, y no se continúa
+    (se lanza una excepción) si no coincide con la de los argumentos.
+
+    Si el archivo de salida ya existe y no hay una ejecución pendiente, no se repite la detección.
+
+    :param network: red utilizada para la detección de objetos.
+    :param sequence: video donde extraer los frames.
+    :param file_output: archivo donde se guardarán las detecciones.
+    :param batch_size: tamaño de frames que se mandan procesar al modelo de detección. Con
+    'auto' (o un ``BatchSizeTuner``) se elige probando unos pocos lotes y se reduce si la memoria
+    del proceso supera el límite durante la ejecución.
+    :param mask: máscara para aplicar la zona donde se realizará la detección en la secuencia.
+    Con un ``MaskRegion`` la red solo procesa el rectángulo que contiene la zona de la máscara.
+    :param verbose: indica si se quiere mostrar la barra de progreso o no.
+    :param resume: si continuar desde el último punto de control, en caso de existir.
+    :param stride: paso entre frames. Si es None, se utiliza el de la secuencia.
+    :param pipeline: pipeline con el que ejecutar las etapas concurrentemente. Si es None, los
+    lotes se procesan de forma secuencial.
+    :param motion_gate: etapa que salta los frames sin movimiento, reutilizando las detecciones
+    del frame anterior. Al terminar, ``motion_gate.skipped`` indica los frames saltados.
+    :return: detecciones indexadas por frame, proyectadas en memoria desde el archivo.
+    """
+    if resume and os.path.exists(file_output) and \
+            not os.path.exists(f'{file_output}.partial'):
+        return load_detections(file_output)
+    with _sequence_stride(sequence, stride), \
+            DetectionsWriter(file_output, network.class_names, resume=resume,
+                             fingerprint=_detections_fingerprint(network, sequence, mask,
+                                                                 motion_gate)) as writer:
+        if writer.num_frames > _sequence_span(sequence):
+            raise SimpleObjectDetectionException('El punto de control tiene más frames que la '
+                                                 'secuencia.')
+        for detections in _generate_batches_detections(network, sequence, batch_size, mask,
+                                                       verbose, start=writer.num_frames,
+                                                       pipeline=pipeline,
+                                                       motion_gate=motion_gate):
+            writer.append(detections)
+    return load_detections(file_output)
+
+
+def _generate_batches_detections(network: DetectionModel,
+                                 sequence: 'StreamSequence',
+                                 batch_size: Union[int, str, BatchSizeTuner],
+                                 mask: Union[Image, MaskRegion],
+                                 verbose: bool,
+                                 start: int = 0,
+                                 pipeline: Pipeline = None,
+                                 motion_gate: MotionGate = None,
+                                 tuner: BatchSizeTuner = None) -> Iterator[DetectionBatch]:
+    """Genera las detecciones de la secuencia lote a lote.
+
+    Las detecciones de cada lote se indexan con los números de frame originales (relativos al
+    frame inicial de la secuencia), incluyendo vacíos los frames saltados por el paso de la
+    secuencia. Los lotes son consecutivos y cubren hasta el frame final.
+
+    :param network: red utilizada para la detección de objetos.
+    :param sequence: video donde extraer los frames.
+    :param batch_size: tamaño de frames que se mandan procesar al modelo de detección. Con
+    'auto' (o un ``BatchSizeTuner``) se elige probando unos pocos lotes y se reduce si la memoria
+    del proceso supera el límite durante la ejecución.
+    :param mask: máscara para aplicar la zona donde se realizará la detección en la secuencia.
+    Con un ``MaskRegion`` la red solo procesa el rectángulo que contiene la zona de la máscara.
+    :param verbose: indica si se quiere mostrar la barra de progreso o no.
+    :param start: primer frame (relativo al frame inicial de la secuencia) que se procesa.
+    :param pipeline: pipeline con el que ejecutar las etapas concurrentemente.
+    :param motion_gate: etapa que salta los frames sin movimiento.
+    :param tuner: ajustador que ya eligió ``batch_size``. Se utiliza para reducir el tamaño del
+    lote si la memoria supera el límite, sin volver a probar tamaños.
+    :return: iterador de las detecciones de cada lote.
+    """
+    stride, span = sequence.stride, _sequence_span(sequence)
+    first_item = ceil(start / stride)
+    if tuner is None:
+        batch_size, tuner = _resolve_batch_size(network, sequence, batch_size, mask, first_item)
+    iterations = ceil((len(sequence) - first_item) / batch_size)
+    from tqdm import tqdm
     t = tqdm(total=iterations, desc='Generating objects detections', disable=not verbose)
-    for iteration in range(iterations):
-        start = iteration * batch_size
-        stop = start + batch_size
-        frames = [sequence[frame_id] for frame_id in range(start, stop) if frame_id < len(sequence)]
-        # frames = sequence[start:stop]  TODO: necesita implementar el slicing en sequence!
-        frames_objects += network.get_images_objects(frames, mask)
-        t.update()
-    return frames_objects
+    postfix = {}
+    if tuner is not None:
+        postfix['batch_size'] = batch_size
+        t.set_postfix(postfix)
+    if motion_gate is not None:
+        motion_gate.reset()
+
+    def locate(detections: DetectionBatch, item: int) -> DetectionBatch:
+        """Recoloca las detecciones del lote que empieza en el elemento ``item`` de la secuencia
+        en los números de frame originales.
+        """
+        range_start = start if item == first_item else item * stride
+        range_stop = min((item + len(detections)) * stride, span)
+        if stride > 1 or range_start != item * stride:
+            positions = [position * stride - range_start
+                         for position in range(item, item + len(detections))]
+            detections = detections.spread(positions, range_stop - range_start)
+        return detections
+
+    try:
+        if pipeline is None:
+            item = first_item
+            while item < len(sequence):
+                for frames in sequence.iter_batches(batch_size, item, reuse_buffer=True):
+                    # El lote es propio (se sobrescribe con el siguiente): se enmascara en el sitio.
+                    if motion_gate is None:
+                        detections = network.get_images_detections(frames, mask, in_place=True)
+                    else:
+                        detections = motion_gate.detect(network, frames, mask, in_place=True)
+                        postfix['skipped'] = motion_gate.skipped
+                    yield locate(detections, item)
+                    item += len(frames)
+                    t.update()
+                    if tuner is not None and batch_size > 1 and tuner.memory_pressure():
+                        # Continuar desde el frame actual con lotes más pequeños.
+                        batch_size //= 2
+                        t.total = t.n + ceil((len(sequence) - item) / batch_size)
+                        postfix['batch_size'] = batch_size
+                        break
+                    if postfix:
+                        t.set_postfix(postfix, refresh=False)
+                else:
+                    break
+        else:
+            for detections in pipeline.run(_numbered_batches(sequence, batch_size, first_item),
+                                           _detection_stages(network, mask, locate,
+                                                             len(sequence), motion_gate),
+                                           source_name='decode'):
+                yield detections
+                t.update()
+                postfix['bottleneck'] = pipeline.stats.bottleneck
+                if motion_gate is not None:
+                    postfix['skipped'] = motion_gate.skipped
+                t.set_postfix(postfix, refresh=False)
+    finally:
+        # También al cerrar el generador antes de terminar.
+        t.close()
+        if network.profiler is not None:
+            network.profiler.finish()
+
 
+def _resolve_batch_size(network: DetectionModel,
+                        sequence: 'StreamSequence',
+                        batch_size: Union[int, str, BatchSizeTuner],
+                        mask: Union[Image, MaskRegion],
+                        first_item: int) -> Tuple[int, Optional[BatchSizeTuner]]:
+    """Comprueba el tamaño del lote o, con 'auto' o un ``BatchSizeTuner``, lo elige probando
+    unos pocos lotes a partir del elemento ``first_item`` de la secuencia.
+
+    :param network: red utilizada para la detección de objetos.
+    :param sequence: video donde extraer los frames.
+    :param batch_size: tamaño del lote, 'auto' o ajustador.
+    :param mask: máscara para aplicar la zona donde se realizará la detección en la secuencia.
+    :param first_item: índice del primer frame de prueba.
+    :return: tamaño del lote y ajustador que lo eligió (None si el tamaño es fijo).
+    """
+    if batch_size == AUTO_BATCH_SIZE:
+        batch_size = BatchSizeTuner()
+    if isinstance(batch_size, BatchSizeTuner):
+        return batch_size.tune(network, sequence, mask, first_item), batch_size
+    if not isinstance(batch_size, int) or batch_size < 1:
+        raise SimpleObjectDetectionException(f'El tamaño del lote debe ser un entero mayor que 0 '
+                                             f'o \'{AUTO_BATCH_SIZE}\'.')
+    return batch_size, None
 
-def save_objects_detections(objects_detections: List[List[Object]],
+
+def _numbered_batches(sequence: 'StreamSequence',
+                      batch_size: int,
+                      first_item: int) -> Iterator[Tuple[int, np.ndarray]]:
+    """Itera sobre los lotes de frames junto con el índice de su primer frame.
+
+    Cada lote se decodifica en un array propio, ya que varios lotes pueden estar a la vez en las
+    distintas etapas del pipeline.
+    """
+    item = first_item
+    for frames in sequence.iter_batches(batch_size, first_item):
+        yield item, frames
+        item += len(frames)
+
+
+def _detection_stages(network: DetectionModel,
+                      mask: Union[Image, MaskRegion],
+                      locate,
+                      num_items: int,
+                      motion_gate: MotionGate = None) -> List[Tuple[str, Callable]]:
+    """Etapas del pipeline de detección: preprocesado (selección de los frames con movimiento y
+    máscara), inferencia de la red y postprocesado de las salidas.
+    """
+    def preprocess(batch):
+        item, frames = batch
+        stop, processed = item + len(frames), None
+        if motion_gate is not None:
+            processed = motion_gate.select(frames)
+            frames = motion_gate.selected_frames(frames, processed)
+        return item, stop, processed, network.preprocess(frames, mask, in_place=True)
+
+    def infer(batch):
+        item, stop, processed, images = batch
+        # Con el pipeline, el lote que se mide (y se captura) es su inferencia.
+        with network.profile(BATCH_STAGE, len(images)):
+            outputs = network.infer(images)
+        if network.profiler is not None and stop >= num_items:
+            # La captura del perfil debe cerrarse en el hilo de la inferencia.
+            network.profiler.finish()
+        return item, processed, images, outputs
+
+    def postprocess(batch):
+        item, processed, images, outputs = batch
+        detections = network.postprocess(outputs, images, mask)
+        if motion_gate is not None:
+            detections = motion_gate.fill(detections, processed)
+        return locate(detections, item)
+
+    return [('preprocess', preprocess), ('infer', infer), ('postprocess', postprocess)]
+
+
+def _detections_fingerprint(network: DetectionModel,
+                            sequence: 'StreamSequence',
+                            mask: Union[Image, MaskRegion],
+                            motion_gate: Optional[MotionGate]) -> str:
+    """Huella de los datos con los que se generan las detecciones de una secuencia: la clave de
+    ``DetectionsCache`` (vídeo, modelo, máscara, paso entre frames y etapa de movimiento) y el
+    frame inicial, al que se refieren los números de frame.
+    """
+    return f'{DetectionsCache.key(network, sequence, mask, motion_gate)}-{sequence.start_frame}'
+
+
+def _sequence_span(sequence: 'StreamSequence') -> int:
+    """Número de frames entre el frame inicial y el final de la secuencia, sin tener en cuenta el
+    paso entre frames.
+    """
+    return sequence.end_frame - sequence.start_frame + 1
+
+
+@contextmanager
+def _sequence_stride(sequence: 'StreamSequence', stride: Optional[int]) -> Iterator[None]:
+    """Establece temporalmente el paso entre frames de la secuencia.
+
+    :param sequence: secuencia de vídeo.
+    :param stride: paso entre frames. Si es None, no se modifica.
+    """
+    if stride is None:
+        yield
+        return
+    previous_stride = sequence.stride
+    sequence.set_stride(stride)
+    try:
+        yield
+    finally:
+        sequence.set_stride(previous_stride)
+
+
+def save_objects_detections(objects_detections: Union[DetectionBatch, List[List[Object]]],
                             file_output: str,
                             pickle_version: int = pickle.DEFAULT_PROTOCOL) -> None:
     """Guarda las detecciones de objetos en una secuencia.
@@ -54,13 +411,19 @@ def save_objects_detections(objects_detections: List[List[Object]],
         pickle.dump(objects_detections, output, pickle_version)
 
 
-def load_objects_detections(file_path: str, encoding: str = 'ASCII') -> List[Object]:
+def load_objects_detections(file_path: str,
+                            encoding: str = 'ASCII') -> Union[DetectionBatch, List[List[Object]]]:
     """Carga las detecciones guardadas en una archivo.
 
+    Si el archivo tiene el formato binario de detecciones (``save_detections``), se abre con
+    ``load_detections`` proyectado en memoria.
+
     :param file_path: dirección al archivo.
     :param encoding: codificación del archivo.
     :return: lista de detecciones de objetos en cada frame.
     """
+    if is_detections_file(file_path):
+        return load_detections(file_path)
     with open(file_path, 'rb') as file:
         return pickle.load(file, encoding=encoding)
 
@@ -104,34 +467,107 @@ def filter_objects_avoiding_duplicated(objects: List[Object],
     un duplicado.
     :return: lista de objetos filtrados.
     """
-    # Lista de las posiciones en 'objects' de los objetos eliminados.
-    removed_objects_id = list()
-    # Buscar los posibles candidatos para cada objeto.
-    for obj_id, obj_detection in enumerate(objects):
-        for candidate_id, candidate_detection in enumerate(objects):
-            # Ignorar el mismo objeto como posible candidato.
-            if obj_id == candidate_id:
-                continue
-            # Ignorar si alguno de los que se está comparando ha sido eliminado ya.
-            if obj_id in removed_objects_id or candidate_id in removed_objects_id:
+    centers = np.array([obj.center for obj in objects], dtype=np.float64).reshape(-1, 2)
+    scores = [obj.score for obj in objects]
+    keep = _avoid_duplicated(np.zeros(len(objects), dtype=np.int64), centers, scores,
+                             max_distance)
+    return [obj for obj, kept in zip(objects, keep) if kept]
+
+
+def filter_detections_avoiding_duplicated(detections: DetectionBatch,
+                                          max_distance: int = 20) -> DetectionBatch:
+    """Filtra las detecciones múltiples de todos los frames de una secuencia a la vez.
+
+    Aplica el mismo criterio que ``filter_objects_avoiding_duplicated`` en cada frame, pero
+    buscando los duplicados de todos los frames en una única operación vectorizada.
+
+    Los objetos de cada frame se vuelven a numerar tras el filtrado.
+
+    :param detections: detecciones indexadas por frame.
+    :param max_distance: máxima distancia entre centros para considerar que ese objeto puede ser
+    un duplicado.
+    :return: detecciones filtradas.
+    """
+    centers = np.asarray(detections.xywh[:, :2], dtype=np.float64)
+    keep = _avoid_duplicated(np.asarray(detections.frames, dtype=np.int64), centers,
+                             detections.scores.tolist(), max_distance)
+    return detections.select(keep)
+
+
+def _avoid_duplicated(groups: np.ndarray,
+                      centers: np.ndarray,
+                      scores: List[float],
+                      max_distance: float) -> np.ndarray:
+    """Calcula qué objetos sobreviven al filtrado de detecciones múltiples.
+
+    Los objetos solo se comparan con los de su mismo grupo (frame). Los conflictos se resuelven
+    recorriendo los pares cercanos ``(i, j)`` en orden lexicográfico, igual que la comparación de
+    todos contra todos: si ninguno ha sido eliminado todavía, se elimina ``j`` si ``i`` tiene
+    mayor puntuación y, si no, se elimina ``i``.
+
+    :param groups: grupo (frame) de cada objeto.
+    :param centers: centros de los objetos.
+    :param scores: puntuaciones de los objetos.
+    :param max_distance: máxima distancia entre centros para considerar un duplicado.
+    :return: máscara booleana de los objetos que se conservan.
+    """
+    removed = [False] * len(scores)
+    pairs_i, pairs_j = _find_close_pairs(groups, centers, max_distance)
+    for i, j in zip(pairs_i.tolist(), pairs_j.tolist()):
+        if removed[i] or removed[j]:
+            continue
+        if scores[i] > scores[j]:
+            removed[j] = True
+        else:
+            removed[i] = True
+    return ~np.array(removed, dtype=bool)
+
+
+def _find_close_pairs(groups: np.ndarray,
+                      centers: np.ndarray,
+                      max_distance: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Busca los pares ordenados de objetos distintos del mismo grupo cuyos centros están a una
+    distancia menor o igual que ``max_distance``.
+
+    Los centros se reparten en una rejilla uniforme de celdas de lado ``max_distance``, de forma
+    que solo se comparan los objetos de celdas vecinas.
+
+    :param groups: grupo (frame) de cada objeto.
+    :param centers: centros de los objetos.
+    :param max_distance: máxima distancia entre centros.
+    :return: índices ``i`` y ``j`` de los pares, en orden lexicográfico.
+    """
+    num_objects = len(centers)
+    if num_objects < 2 or max_distance < 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    # Celda de cada objeto, desplazada para que las celdas vecinas no sean negativas.
+    cells = np.floor(centers / max(max_distance, 1)).astype(np.int64)
+    cells -= cells.min(axis=0) - 1
+    width, height = cells[:, 0].max() + 2, cells[:, 1].max() + 2
+    keys = (groups * height + cells[:, 1]) * width + cells[:, 0]
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+    pairs_i, pairs_j = [], []
+    for dy in (-1, 0, 1):
+        for dx in (-1, 0, 1):
+            # Rango de objetos (en el orden de las celdas) de la celda vecina de cada objeto.
+            neighbour_keys = keys + dy * width + dx
+            low = np.searchsorted(sorted_keys, neighbour_keys, side='left')
+            high = np.searchsorted(sorted_keys, neighbour_keys, side='right')
+            counts = high - low
+            total = int(counts.sum())
+            if total == 0:
                 continue
-            # Calcular la distancia euclídea entre ambas detecciones.
-            p = np.array(obj_detection.center)
-            q = np.array(candidate_detection.center)
-            distance = np.linalg.norm(p - q)
-            # Si hay poca distancia, puede ser el mismo objeto.
-            if distance <= max_distance:
-                # Eliminar el que menos puntuación tiene.
-                if obj_detection.score > candidate_detection.score:
-                    removed_objects_id.append(candidate_id)
-                else:
-                    removed_objects_id.append(obj_id)
-    # Lista de los objetos que han pasado el filtro.
-    objects_filtered: List[Object] = list()
-    for obj_id, obj_detection in enumerate(objects):
-        if obj_id not in removed_objects_id:
-            objects_filtered.append(obj_detection)
-    return objects_filtered
+            starts = np.cumsum(counts) - counts
+            positions = np.arange(total) - np.repeat(starts - low, counts)
+            pairs_i.append(np.repeat(np.arange(num_objects), counts))
+            pairs_j.append(order[positions])
+    pairs_i, pairs_j = np.concatenate(pairs_i), np.concatenate(pairs_j)
+    distances = np.sqrt(np.sum((centers[pairs_i] - centers[pairs_j]) ** 2, axis=1))
+    close = (pairs_i != pairs_j) & (distances <= max_distance)
+    pairs_i, pairs_j = pairs_i[close], pairs_j[close]
+    pairs_order = np.lexsort((pairs_j, pairs_i))
+    return pairs_i[pairs_order], pairs_j[pairs_order]
 
 
 def filter_objects_inside_mask_region(objects: List[Object], mask: Image) -> List[Object]:
@@ -0,0 +1,216 @@
+import queue
+import threading
+import time
+from typing import Any, Callable, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from simple_object_detection.exceptions import SimpleObjectDetectionException
+
+
+class StageStats(NamedTuple):
+    """Contadores de una etapa del pipeline."""
+    name: str
+    # Elementos procesados por la etapa.
+    items: int
+    # Tiempo (segundos) que la etapa estuvo trabajando.
+    busy_time: float
+    # Tiempo (segundos) que la etapa estuvo esperando a la etapa anterior.
+    input_wait_time: float
+    # Tiempo (segundos) que la etapa estuvo bloqueada porque la cola de salida estaba llena.
+    output_wait_time: float
+    # Ocupación media de la cola de salida (muestreada al añadir cada elemento).
+    queue_occupancy: float
+    # Capacidad de la cola de salida.
+    queue_size: int
+
+
+class PipelineStats(NamedTuple):
+    """Contadores de una ejecución del pipeline."""
+    stages: List[StageStats]
+    # Tiempo total (segundos) de la ejecución.
+    elapsed: float
+
+    @property
+    def bottleneck(self) -> Optional[str]:
+        """Nombre de la etapa que más tiempo estuvo trabajando (el cuello de botella).
+        """
+        if not self.stages:
+            return None
+        return max(self.stages, key=lambda stage: stage.busy_time).name
+
+
+class _StageCounters:
+    """Contadores mutables de una etapa, actualizados únicamente por su hilo."""
+    def __init__(self, name: str, queue_size: int):
+        self.name = name
+        self.queue_size = queue_size
+        self.items = 0
+        self.busy_time = 0.
+        self.input_wait_time = 0.
+        self.output_wait_time = 0.
+        self.occupancy_sum = 0
+
+    def snapshot(self) -> StageStats:
+        occupancy = self.occupancy_sum / self.items if self.items else 0.
+        return StageStats(self.name, self.items, self.busy_time, self.input_wait_time,
+                          self.output_wait_time, occupancy, self.queue_size)
+
+
+class _StageError:
+    """Envuelve la excepción producida en una etapa para relanzarla en el consumidor.
+    """
+    def __init__(self, stage: str, exception: BaseException):
+        self.stage = stage
+        self.exception = exception
+
+
+# Marca el final de los elementos en las colas.
+_END = object()
+
+
+class Pipeline:
+    """Ejecuta una secuencia de etapas en hilos independientes comunicados por colas acotadas.
+
+    La primera etapa recorre un iterable (por ejemplo, la decodificación de los lotes de frames) y
+    cada una de las siguientes aplica una función al resultado de la anterior. Así, mientras una
+    etapa procesa un elemento, la anterior ya está preparando el siguiente. Las colas acotadas
+    (``queue_size``) limitan los elementos en espera y, por tanto, la memoria utilizada.
+
+    Los resultados se devuelven en el mismo orden que los elementos del iterable. Los errores de
+    cualquier etapa se relanzan en el consumidor.
+
+    Tras cada ejecución, ``stats`` contiene los tiempos de trabajo y de espera y la ocupación de
+    las colas de cada etapa, que indican cuál es el cuello de botella.
+    """
+    # Tiempo máximo (segundos) de espera de los hilos antes de comprobar si deben detenerse.
+    _POLL_INTERVAL = 0.1
+
+    def __init__(self, queue_size: int = 2):
+        """
+
+        :param queue_size: número máximo de elementos en espera entre dos etapas.
+        """
+        if queue_size < 1:
+            raise SimpleObjectDetectionException('El tamaño de las colas debe ser mayor que 0.')
+        self.queue_size = queue_size
+        self._counters: List[_StageCounters] = []
+        self._elapsed = 0.
+
+    @property
+    def stats(self) -> PipelineStats:
+        """Contadores de la última ejecución (o de la ejecución en curso).
+        """
+        return PipelineStats([counters.snapshot() for counters in self._counters], self._elapsed)
+
+    def run(self,
+            source: Iterable,
+            stages: Sequence[Tuple[str, Callable[[Any], Any]]],
+            source_name: str = 'source') -> Iterator[Any]:
+        """Ejecuta el pipeline sobre los elementos de ``source``.
+
+        :param source: iterable con los elementos de entrada. Se recorre en su propio hilo.
+        :param stages: nombre y función de cada etapa, en orden.
+        :param source_name: nombre de la etapa que recorre ``source``.
+        :return: iterador de los resultados de la última etapa.
+        """
+        start_time = time.perf_counter()
+        stop = threading.Event()
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in range(len(stages) + 1)]
+        self._counters = [_StageCounters(name, self.queue_size)
+                          for name in [source_name] + [name for name, _ in stages]]
+        threads = [threading.Thread(target=self._source,
+                                    args=(source, queues[0], self._counters[0], stop),
+                                    name=f'Pipeline-{source_name}', daemon=True)]
+        for index, (name, function) in enumerate(stages):
+            threads.append(threading.Thread(target=self._stage,
+                                            args=(function, queues[index], queues[index + 1],
+                                                  self._counters[index + 1], stop),
+                                            name=f'Pipeline-{name}', daemon=True))
+        for thread in threads:
+            thread.start()
+        try:
+            while True:
+                item = queues[-1].get()
+                if item is _END:
+                    break
+                if isinstance(item, _StageError):
+                    raise SimpleObjectDetectionException(f'Error en la etapa {item.stage} del '
+                                                         f'pipeline.') from item.exception
+                yield item
+        finally:
+            stop.set()
+            # Vaciar las colas por si algún hilo está esperando para añadir un elemento.
+            for thread in threads:
+                while thread.is_alive():
+                    for pending in queues:
+                        try:
+                            pending.get_nowait()
+                        except queue.Empty:
+                            pass
+                    thread.join(self._POLL_INTERVAL)
+            self._elapsed = time.perf_counter() - start_time
+
+    def _source(self, source: Iterable, output: queue.Queue, counters: _StageCounters,
+                stop: threading.Event) -> None:
+        """Bucle del hilo que recorre el iterable de entrada.
+        """
+        try:
+            iterator = iter(source)
+            while not stop.is_set():
+                start = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    break
+                counters.busy_time += time.perf_counter() - start
+                if not self._put(item, output, counters, stop):
+                    return
+            self._put(_END, output, None, stop)
+        except BaseException as exception:
+            self._put(_StageError(counters.name, exception), output, None, stop)
+
+    def _stage(self, function: Callable[[Any], Any], input_queue: queue.Queue,
+               output: queue.Queue, counters: _StageCounters, stop: threading.Event) -> None:
+        """Bucle del hilo de una etapa.
+        """
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                item = input_queue.get(timeout=self._POLL_INTERVAL)
+            except queue.Empty:
+                counters.input_wait_time += time.perf_counter() - start
+                continue
+            counters.input_wait_time += time.perf_counter() - start
+            if item is _END or isinstance(item, _StageError):
+                self._put(item, output, None, stop)
+                return
+            start = time.perf_counter()
+            try:
+                result = function(item)
+            except BaseException as exception:
+                self._put(_StageError(counters.name, exception), output, None, stop)
+                return
+            counters.busy_time += time.perf_counter() - start
+            if not self._put(result, output, counters, stop):
+                return
+
+    def _put(self, item: Any, output: queue.Queue, counters: Optional[_StageCounters],
+             stop: threading.Event) -> bool:
+        """Añade un elemento a la cola de salida esperando si está llena.
+
+        :return: False si se pidió detener el pipeline antes de poder añadirlo.
+        """
+        if counters is not None:
+            counters.items += 1
+            counters.occupancy_sum += output.qsize()
+        start = time.perf_counter()
+        try:
+            while not stop.is_set():
+                try:
+                    output.put(item, timeout=self._POLL_INTERVAL)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        finally:
+            if counters is not None:
+                counters.output_wait_time += time.perf_counter() - start
@@ -0,0 +1,248 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from simple_object_detection.exceptions import SimpleObjectDetectionException
+
+
+# Etapas de ``DetectionModel`` que se miden.
+MASK_STAGE = 'mask'
+INFERENCE_STAGE = 'inference'
+POSTPROCESS_STAGE = 'postprocess'
+OBJECTS_STAGE = 'objects'
+# Tiempo de cada lote completo.
+BATCH_STAGE = 'batch'
+
+# Herramientas para capturar un perfil detallado de algunos lotes.
+CAPTURE_TOOLS = ('torch', 'cprofile')
+
+# Función llamada al terminar cada etapa con su nombre, duración (segundos) y número de frames.
+StageCallback = Callable[[str, float, int], None]
+
+
+class StageLatency(NamedTuple):
+    """Latencia de una etapa en todos los lotes medidos (segundos)."""
+    name: str
+    count: int
+    total: float
+    mean: float
+    p50: float
+    p95: float
+    max: float
+
+
+class ProfileStats(NamedTuple):
+    """Estadísticas de una ejecución medida con ``StageProfiler``."""
+    stages: Dict[str, StageLatency]
+    batches: int
+    frames: int
+    boxes: int
+    # Segundos entre el comienzo de la primera etapa y el final de la última.
+    elapsed: float
+
+    @property
+    def frames_per_second(self) -> float:
+        return self.frames / self.elapsed if self.elapsed else 0.
+
+    @property
+    def boxes_per_second(self) -> float:
+        return self.boxes / self.elapsed if self.elapsed else 0.
+
+    def summary(self) -> str:
+        """Tabla con la latencia de cada etapa y el rendimiento.
+        """
+        lines = [f'{"etapa":>12} {"lotes":>7} {"total (s)":>10} {"p50 (ms)":>9} '
+                 f'{"p95 (ms)":>9} {"máx (ms)":>9}']
+        for stage in self.stages.values():
+            lines.append(f'{stage.name:>12} {stage.count:7d} {stage.total:10.3f} '
+                         f'{1000 * stage.p50:9.2f} {1000 * stage.p95:9.2f} '
+                         f'{1000 * stage.max:9.2f}')
+        lines.append(f'{self.frames} frames y {self.boxes} cajas en {self.elapsed:.3f} s: '
+                     f'{self.frames_per_second:.1f} frames/s, {self.boxes_per_second:.1f} cajas/s')
+        return '\n'.join(lines)
+
+
+class StageProfiler:
+    """Mide el tiempo de las etapas de ``DetectionModel``.
+
+    Se activa asignándolo al modelo (``network.profiler = StageProfiler()``). A partir de ese
+    momento, cada llamada a ``get_images_detections`` (y cada lote de
+    ``generate_objects_detections``, también con ``Pipeline``) mide la aplicación de la máscara
+    (``mask``), la inferencia de la red (``inference``), el postprocesado de las salidas
+    (``postprocess``) y el lote completo (``batch``), y ``get_images_objects`` mide además la
+    creación de los ``Object`` (``objects``). ``stats`` agrega las mediciones en latencias p50/p95
+    por etapa y en frames y cajas por segundo.
+
+    Las funciones de ``callbacks`` se llaman al terminar cada etapa, por ejemplo para enviar las
+    mediciones a un sistema de métricas.
+
+    Con ``capture`` se obtiene además un perfil detallado de los lotes ``capture_batches`` (un
+    intervalo [inicio, fin) de índices de lote) con ``torch.profiler`` ('torch') o con
+    ``cProfile`` ('cprofile'), que queda en ``captured`` y, si se indica, se guarda en
+    ``capture_output`` (traza de Chrome o estadísticas de ``pstats``). ``cProfile`` solo perfila
+    el hilo que ejecuta el lote (la inferencia, con ``Pipeline``). Si la ejecución termina antes
+    del final de la ventana, la captura se cierra con ``finish``, que debe llamarse desde el mismo
+    hilo (``generate_objects_detections`` lo hace al terminar).
+    """
+    def __init__(self,
+                 callbacks: Sequence[StageCallback] = (),
+                 timer: Callable[[], float] = time.perf_counter,
+                 synchronize: bool = False,
+                 capture: str = None,
+                 capture_batches: Tuple[int, int] = (0, 1),
+                 capture_output: str = None):
+        """
+
+        :param callbacks: funciones que se llaman al terminar cada etapa.
+        :param timer: reloj (segundos) con el que se miden las etapas.
+        :param synchronize: si esperar a que terminen las operaciones de CUDA antes de medir el
+        final de cada etapa (la ejecución en la GPU es asíncrona).
+        :param capture: herramienta con la que capturar un perfil detallado: 'torch', 'cprofile'
+        o None.
+        :param capture_batches: intervalo [inicio, fin) de índices de lote que se capturan.
+        :param capture_output: archivo donde guardar el perfil capturado.
+        """
+        if capture is not None and capture not in CAPTURE_TOOLS:
+            raise SimpleObjectDetectionException(f'La herramienta de captura {capture} no está '
+                                                 f'entre las disponibles {CAPTURE_TOOLS}.')
+        self.callbacks = list(callbacks)
+        self.timer = timer
+        self.synchronize = synchronize
+        self.capture = capture
+        self.capture_batches = capture_batches
+        self.capture_output = capture_output
+        # Perfil capturado (``torch.profiler.profile`` o ``pstats.Stats``).
+        self.captured: Any = None
+        self._lock = threading.Lock()
+        self._capture_session: Any = None
+        self._capture_thread: Optional[int] = None
+        self.reset()
+
+    def reset(self) -> None:
+        """Descarta las mediciones anteriores.
+        """
+        with self._lock:
+            self._durations: Dict[str, List[float]] = {}
+            self._batches = 0
+            self._frames = 0
+            self._boxes = 0
+            self._first_start: Optional[float] = None
+            self._last_end: Optional[float] = None
+
+    @contextmanager
+    def stage(self, name: str, num_frames: int = 0) -> Iterator[None]:
+        """Mide una etapa.
+
+        :param name: nombre de la etapa.
+        :param num_frames: frames que procesa la etapa (se pasa a los ``callbacks``).
+        """
+        start = self.timer()
+        try:
+            yield
+        finally:
+            self._synchronize()
+            end = self.timer()
+            self._record(name, start, end)
+            for callback in self.callbacks:
+                callback(name, end - start, num_frames)
+
+    @contextmanager
+    def batch(self, num_frames: int) -> Iterator[None]:
+        """Mide un lote completo y captura su perfil si está en la ventana de captura.
+
+        :param num_frames: número de frames del lote.
+        """
+        with self._lock:
+            index = self._batches
+            self._batches += 1
+            self._frames += num_frames
+        capturing = self.capture is not None and \
+            self.capture_batches[0] <= index < self.capture_batches[1]
+        if capturing and self._capture_session is None:
+            self._start_capture()
+        try:
+            with self.stage(BATCH_STAGE, num_frames):
+                yield
+        finally:
+            if capturing and index == self.capture_batches[1] - 1:
+                self._stop_capture()
+
+    def finish(self) -> None:
+        """Termina la captura del perfil detallado si sigue en curso y se comenzó en este hilo.
+        """
+        # Los perfiladores solo pueden detenerse desde el hilo en el que se iniciaron.
+        if self._capture_thread == threading.get_ident():
+            self._stop_capture()
+
+    def count_boxes(self, num_boxes: int) -> None:
+        """Suma las cajas detectadas en un lote.
+        """
+        with self._lock:
+            self._boxes += num_boxes
+
+    @property
+    def stats(self) -> ProfileStats:
+        """Latencia de cada etapa y rendimiento de las mediciones realizadas.
+        """
+        with self._lock:
+            stages = {}
+            for name, durations in self._durations.items():
+                values = np.array(durations)
+                stages[name] = StageLatency(name, len(values), float(values.sum()),
+                                            float(values.mean()),
+                                            float(np.percentile(values, 50)),
+                                            float(np.percentile(values, 95)),
+                                            float(values.max()))
+            elapsed = 0. if self._first_start is None else self._last_end - self._first_start
+            return ProfileStats(stages, self._batches, self._frames, self._boxes, elapsed)
+
+    def _record(self, name: str, start: float, end: float) -> None:
+        with self._lock:
+            self._durations.setdefault(name, []).append(end - start)
+            if self._first_start is None or start < self._first_start:
+                self._first_start = start
+            if self._last_end is None or end > self._last_end:
+                self._last_end = end
+
+    def _synchronize(self) -> None:
+        if not self.synchronize:
+            return
+        import torch
+        if torch.cuda.is_available():
+            torch.cuda.synchronize()
+
+    def _start_capture(self) -> None:
+        """Comienza la captura del perfil detallado.
+        """
+        if self.capture == 'torch':
+            import torch
+            session = torch.profiler.profile(record_shapes=True)
+            session.__enter__()
+        else:
+            import cProfile
+            session = cProfile.Profile()
+            session.enable()
+        self._capture_session = session
+        self._capture_thread = threading.get_ident()
+
+    def _stop_capture(self) -> None:
+        """Termina la captura del perfil detallado y lo guarda.
+        """
+        session, self._capture_session = self._capture_session, None
+        self._capture_thread = None
+        if session is None:
+            return
+        if self.capture == 'torch':
+            session.__exit__(None, None, None)
+            if self.capture_output is not None:
+                session.export_chrome_trace(self.capture_output)
+            self.captured = session
+        else:
+            import pstats
+            session.disable()
+            if self.capture_output is not None:
+                session.dump_stats(self.capture_output)
+            self.captured = pstats.Stats(session)
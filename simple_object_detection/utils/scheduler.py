@@ -0,0 +1,189 @@
+import multiprocessing
+import os
+import time
+import traceback
+from typing import List, NamedTuple, Optional, Sequence, Tuple, Type, Union
+
+from simple_object_detection.detection_model import DetectionModel
+from simple_object_detection.typing import Image
+from simple_object_detection.utils.mask import MaskRegion
+from simple_object_detection.utils.objects_detections import generate_objects_detections_to_file
+
+
+class DetectionJob(NamedTuple):
+    """Trabajo de detección de objetos en un vídeo con un modelo."""
+    # Ruta al archivo del vídeo.
+    video_path: str
+    # Clase del modelo de detección (debe poder importarse desde los procesos).
+    model_class: Type[DetectionModel]
+    # Archivo donde se guardan las detecciones (formato binario de detecciones).
+    file_output: str
+    # Tamaño de los lotes de frames, o 'auto' para elegirlo automáticamente.
+    batch_size: Union[int, str] = 1
+    # Paso entre frames. Si es None, se procesan todos los frames.
+    stride: Optional[int] = None
+    # Si cargar el modelo desde archivos locales.
+    use_local: bool = False
+    # Máscara de la zona donde se realizará la detección. Si es None, se usa el frame completo.
+    mask: Optional[Union[Image, MaskRegion]] = None
+
+
+class JobResult(NamedTuple):
+    """Resultado de un trabajo de detección."""
+    job: DetectionJob
+    # 'done', 'skipped' o 'failed'.
+    status: str
+    # Frames de las detecciones guardadas.
+    num_frames: int = 0
+    # Tiempo (segundos) del trabajo, sin contar la carga del modelo.
+    seconds: float = 0.
+    # Traza del error si el trabajo falló.
+    error: Optional[str] = None
+
+
+class SchedulerReport(NamedTuple):
+    """Informe consolidado de una ejecución de ``run_detection_jobs``."""
+    results: List[JobResult]
+    # Tiempo total (segundos) de la ejecución.
+    elapsed: float
+
+    def count(self, status: str) -> int:
+        """Número de trabajos con el estado indicado.
+
+        :param status: 'done', 'skipped' o 'failed'.
+        :return: número de trabajos.
+        """
+        return sum(1 for result in self.results if result.status == status)
+
+    @property
+    def failed(self) -> List[JobResult]:
+        """Trabajos que terminaron con un error.
+        """
+        return [result for result in self.results if result.status == 'failed']
+
+    def summary(self) -> str:
+        """Resumen en texto de la ejecución: un línea por trabajo y los totales.
+        """
+        lines = []
+        for result in self.results:
+            job = result.job
+            fps = result.num_frames / result.seconds if result.seconds > 0 else 0.
+            lines.append(f'{result.status:>7} {job.model_class.__name__:>10} '
+                         f'{result.num_frames:8d} frames {fps:8.1f} frames/s  {job.file_output}')
+        lines.append(f'{self.count("done")} terminados, {self.count("skipped")} omitidos, '
+                     f'{self.count("failed")} fallidos en {self.elapsed:.1f} s.')
+        return '\n'.join(lines)
+
+
+# Modelo cargado en el proceso trabajador, que se reutiliza entre trabajos.
+_worker_model: Optional[Tuple[Tuple[Type[DetectionModel], bool], DetectionModel]] = None
+
+
+def _init_worker(torch_threads: Optional[int]) -> None:
+    """Inicializa un proceso trabajador limitando los hilos de PyTorch.
+    """
+    if torch_threads is not None:
+        import torch
+        torch.set_num_threads(torch_threads)
+
+
+def _get_worker_model(model_class: Type[DetectionModel], use_local: bool) -> DetectionModel:
+    """Devuelve el modelo del proceso trabajador, cargándolo solo si cambia la clase del modelo.
+    """
+    global _worker_model
+    key = (model_class, use_local)
+    if _worker_model is None or _worker_model[0] != key:
+        # Liberar el modelo anterior antes de cargar el nuevo.
+        _worker_model = None
+        _worker_model = (key, model_class(use_local=use_local))
+    return _worker_model[1]
+
+
+def _run_job(indexed_job: Tuple[int, DetectionJob]) -> Tuple[int, JobResult]:
+    """Ejecuta un trabajo en el proceso trabajador.
+
+    :param indexed_job: posición del trabajo en la lista de trabajos y trabajo.
+    :return: posición del trabajo y resultado.
+    """
+    from simple_object_detection.utils.video.sequence import StreamSequence
+    index, job = indexed_job
+    try:
+        network = _get_worker_model(job.model_class, job.use_local)
+        start = time.perf_counter()
+        sequence = StreamSequence(job.video_path)
+        try:
+            detections = generate_objects_detections_to_file(network, sequence, job.file_output,
+                                                             batch_size=job.batch_size,
+                                                             mask=job.mask,
+                                                             stride=job.stride)
+        finally:
+            sequence.release()
+        return index, JobResult(job, 'done', len(detections), time.perf_counter() - start)
+    except Exception:
+        return index, JobResult(job, 'failed', error=traceback.format_exc())
+
+
+def is_job_finished(job: DetectionJob) -> bool:
+    """Comprueba si las detecciones del trabajo ya están guardadas por completo.
+
+    :param job: trabajo de detección.
+    :return: si existe el archivo de salida y no hay una ejecución pendiente de continuar.
+    """
+    return os.path.exists(job.file_output) and not os.path.exists(f'{job.file_output}.partial')
+
+
+def run_detection_jobs(jobs: Sequence[DetectionJob],
+                       num_workers: Optional[int] = None,
+                       torch_threads: Optional[int] = 1,
+                       verbose: bool = False,
+                       start_method: str = 'spawn') -> SchedulerReport:
+    """Ejecuta trabajos de detección independientes (vídeo, modelo, archivo de salida) en un
+    conjunto de procesos.
+
+    Cada proceso mantiene cargado su modelo entre trabajos, y los trabajos se reparten agrupados
+    por modelo para que cada proceso cargue el menor número de modelos posible. Los trabajos cuyo
+    archivo de salida ya está completo se omiten, y los interrumpidos se continúan desde su último
+    punto de control.
+
+    Los errores de un trabajo no detienen al resto: se recogen en el informe.
+
+    :param jobs: trabajos de detección.
+    :param num_workers: número de procesos. Por defecto, el número de CPUs dividido entre los
+    hilos de PyTorch de cada proceso.
+    :param torch_threads: hilos de PyTorch de cada proceso. Si es None, no se modifica.
+    :param verbose: indica si se quiere mostrar la barra de progreso o no.
+    :param start_method: método de inicio de los procesos de ``multiprocessing``.
+    :return: informe con el resultado de cada trabajo, en el orden de ``jobs``.
+    """
+    start = time.perf_counter()
+    results: List[Optional[JobResult]] = [None] * len(jobs)
+    pending = []
+    for index, job in enumerate(jobs):
+        if is_job_finished(job):
+            results[index] = JobResult(job, 'skipped')
+        else:
+            pending.append(index)
+    # Agrupar por modelo para reutilizar el modelo cargado en cada proceso.
+    pending.sort(key=lambda index: (jobs[index].model_class.__module__,
+                                    jobs[index].model_class.__qualname__,
+                                    jobs[index].use_local))
+    from tqdm import tqdm
+    t = tqdm(total=len(jobs), initial=len(jobs) - len(pending), desc='Detection jobs',
+             disable=not verbose)
+    if pending:
+        if num_workers is None:
+            num_workers = max(1, (os.cpu_count() or 1) // (torch_threads or 1))
+        num_workers = min(num_workers, len(pending))
+        context = multiprocessing.get_context(start_method)
+        with context.Pool(num_workers, initializer=_init_worker,
+                          initargs=(torch_threads,)) as pool:
+            indexed_jobs = [(index, jobs[index]) for index in pending]
+            for index, result in pool.imap_unordered(_run_job, indexed_jobs):
+                results[index] = result
+                t.update()
+                t.set_postfix(failed=sum(1 for result in results
+                                         if result is not None and result.status == 'failed'))
+            pool.close()
+            pool.join()
+    t.close()
+    return SchedulerReport(results, time.perf_counter() - start)
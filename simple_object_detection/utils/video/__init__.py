@@ -1 +1,17 @@
-from simple_object_detection.utils.video.sequence import StreamSequence, StreamSequenceWriter
+from simple_object_detection._lazy import lazy_exports
+
+# Los nombres se importan desde su módulo la primera vez que se utilizan, para no importar
+# OpenCV hasta que se necesita.
+_EXPORTS = {
+    'StreamSequence': 'simple_object_detection.utils.video.sequence',
+    'StreamSequenceWriter': 'simple_object_detection.utils.video.sequence',
+    'FramePrefetcher': 'simple_object_detection.utils.video.prefetch',
+    'PrefetchStats': 'simple_object_detection.utils.video.prefetch',
+    'FrameCache': 'simple_object_detection.utils.video.cache',
+    'LRUFrameCache': 'simple_object_detection.utils.video.cache',
+    'SLRUFrameCache': 'simple_object_detection.utils.video.cache',
+    'CacheStats': 'simple_object_detection.utils.video.cache',
+    'ParallelStreamSequence': 'simple_object_detection.utils.video.parallel',
+}
+__all__ = list(_EXPORTS)
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
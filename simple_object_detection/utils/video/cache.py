@@ -0,0 +1,212 @@
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+from simple_object_detection.typing import Image
+
+
+class CacheStats(NamedTuple):
+    """Contadores de una caché de frames."""
+    hits: int
+    misses: int
+    evictions: int
+    # Número de frames almacenados.
+    frames: int
+    # Bytes ocupados por los frames almacenados.
+    size_bytes: int
+    # Máximo de bytes que puede ocupar la caché.
+    max_bytes: int
+
+
+class FrameCache(ABC):
+    """Clase abstracta para las políticas de caché de frames de ``StreamSequence``.
+
+    La caché está acotada por un presupuesto de bytes (``max_bytes``) en lugar de por un número
+    de frames, de forma que el consumo de memoria no depende de la resolución del vídeo.
+    """
+    def __init__(self, max_bytes: int):
+        """
+
+        :param max_bytes: máximo de bytes que pueden ocupar los frames almacenados.
+        """
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, fid: int) -> Optional[Image]:
+        """Busca en la caché el frame especificado.
+
+        :param fid: número del frame.
+        :return: frame buscado si es encontrado, si no, None.
+        """
+        frame = self._get(fid)
+        if frame is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return frame
+
+    def put(self, fid: int, frame: Image) -> None:
+        """Añade un frame a la caché, expulsando los necesarios para no superar ``max_bytes``.
+
+        Los frames que por sí solos superan el presupuesto no se almacenan.
+
+        :param fid: número del frame.
+        :param frame: frame.
+        :return: None.
+        """
+        if frame.nbytes > self.max_bytes:
+            return
+        self._put(fid, frame)
+
+    @property
+    def admission_bytes(self) -> int:
+        """Bytes que pueden ocupar los frames añadidos a continuación sin que se expulsen entre
+        ellos.
+        """
+        return self.max_bytes
+
+    @property
+    def stats(self) -> CacheStats:
+        """Contadores de aciertos, fallos y expulsiones, y ocupación de la caché.
+        """
+        return CacheStats(self.hits, self.misses, self.evictions, len(self), self.size_bytes,
+                          self.max_bytes)
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """Número de frames almacenados."""
+
+    @abstractmethod
+    def __contains__(self, fid: int) -> bool:
+        """Comprueba si un frame está en la caché sin modificar su prioridad."""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Elimina todos los frames de la caché."""
+
+    @abstractmethod
+    def _get(self, fid: int) -> Optional[Image]:
+        """Devuelve el frame si está en la caché (actualizando su prioridad) o None."""
+
+    @abstractmethod
+    def _put(self, fid: int, frame: Image) -> None:
+        """Almacena el frame, que cabe en el presupuesto, expulsando los que sean necesarios."""
+
+
+class LRUFrameCache(FrameCache):
+    """Caché de frames que expulsa el frame usado hace más tiempo (Least Recently Used).
+    """
+    def __init__(self, max_bytes: int):
+        super().__init__(max_bytes)
+        self._frames: 'OrderedDict[int, Image]' = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    def __contains__(self, fid: int) -> bool:
+        return fid in self._frames
+
+    def clear(self) -> None:
+        self._frames.clear()
+        self.size_bytes = 0
+
+    def _get(self, fid: int) -> Optional[Image]:
+        frame = self._frames.get(fid)
+        if frame is not None:
+            self._frames.move_to_end(fid)
+        return frame
+
+    def _put(self, fid: int, frame: Image) -> None:
+        previous = self._frames.pop(fid, None)
+        if previous is not None:
+            self.size_bytes -= previous.nbytes
+        while self._frames and self.size_bytes + frame.nbytes > self.max_bytes:
+            _, evicted = self._frames.popitem(last=False)
+            self.size_bytes -= evicted.nbytes
+            self.evictions += 1
+        self._frames[fid] = frame
+        self.size_bytes += frame.nbytes
+
+
+class SLRUFrameCache(FrameCache):
+    """Caché de frames LRU segmentada (Segmented LRU), resistente a recorridos secuenciales.
+
+    Los frames nuevos entran en un segmento de prueba y solo pasan al segmento protegido cuando se
+    vuelven a utilizar. Así, una lectura secuencial de muchos frames que no se vuelven a utilizar
+    solo expulsa frames del segmento de prueba, y los frames más visitados se conservan.
+    """
+    def __init__(self, max_bytes: int, protected_ratio: float = 0.8):
+        """
+
+        :param max_bytes: máximo de bytes que pueden ocupar los frames almacenados.
+        :param protected_ratio: fracción de ``max_bytes`` reservada al segmento protegido.
+        """
+        super().__init__(max_bytes)
+        self.protected_max_bytes = int(max_bytes * protected_ratio)
+        self._probation: 'OrderedDict[int, Image]' = OrderedDict()
+        self._protected: 'OrderedDict[int, Image]' = OrderedDict()
+        self._protected_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._probation) + len(self._protected)
+
+    def __contains__(self, fid: int) -> bool:
+        return fid in self._probation or fid in self._protected
+
+    def clear(self) -> None:
+        self._probation.clear()
+        self._protected.clear()
+        self.size_bytes = 0
+        self._protected_bytes = 0
+
+    @property
+    def admission_bytes(self) -> int:
+        # Los frames nuevos entran en el segmento de prueba, que ocupa lo que deja el protegido.
+        return self.max_bytes - self._protected_bytes
+
+    def _get(self, fid: int) -> Optional[Image]:
+        frame = self._protected.get(fid)
+        if frame is not None:
+            self._protected.move_to_end(fid)
+            return frame
+        frame = self._probation.pop(fid, None)
+        if frame is not None:
+            # Segundo acceso: pasa al segmento protegido.
+            self._protected[fid] = frame
+            self._protected_bytes += frame.nbytes
+            self._shrink_protected()
+        return frame
+
+    def _put(self, fid: int, frame: Image) -> None:
+        for segment in (self._probation, self._protected):
+            previous = segment.pop(fid, None)
+            if previous is not None:
+                self.size_bytes -= previous.nbytes
+                if segment is self._protected:
+                    self._protected_bytes -= previous.nbytes
+        self._probation[fid] = frame
+        self.size_bytes += frame.nbytes
+        self._evict()
+
+    def _shrink_protected(self) -> None:
+        """Devuelve al segmento de prueba los frames protegidos que exceden su presupuesto.
+        """
+        while len(self._protected) > 1 and self._protected_bytes > self.protected_max_bytes:
+            demoted_fid, demoted = self._protected.popitem(last=False)
+            self._protected_bytes -= demoted.nbytes
+            self._probation[demoted_fid] = demoted
+        self._evict()
+
+    def _evict(self) -> None:
+        """Expulsa frames (primero del segmento de prueba) hasta no superar ``max_bytes``.
+        """
+        while self.size_bytes > self.max_bytes:
+            segment = self._probation if self._probation else self._protected
+            _, evicted = segment.popitem(last=False)
+            self.size_bytes -= evicted.nbytes
+            if segment is self._protected:
+                self._protected_bytes -= evicted.nbytes
+            self.evictions += 1
@@ -0,0 +1,268 @@
+import multiprocessing
+import os
+import queue
+import traceback
+from typing import Iterator, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from simple_object_detection.exceptions import SimpleObjectDetectionException
+from simple_object_detection.typing import Image
+from simple_object_detection.utils.video.cache import FrameCache
+from simple_object_detection.utils.video.sequence import StreamSequence
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:
+    # ``multiprocessing.shared_memory`` no existe en versiones anteriores a Python 3.8.
+    shared_memory = None
+
+
+# Tiempo máximo (segundos) de espera de los procesos antes de comprobar si deben detenerse.
+_POLL_INTERVAL = 0.1
+
+
+def _decode_chunks(video_path: str,
+                   chunks: List[Tuple[int, int]],
+                   stride: int,
+                   shared_memory_name: str,
+                   frame_shape: Tuple[int, int, int],
+                   ring_size: int,
+                   ready: multiprocessing.Queue,
+                   free_slots,
+                   stop) -> None:
+    """Proceso que decodifica varios bloques del vídeo en un buffer circular de memoria compartida.
+
+    Los bloques se decodifican en orden. Por cada frame espera a que haya un hueco libre en el
+    buffer (``free_slots``), decodifica el frame directamente sobre ese hueco y notifica al
+    consumidor por ``ready``. Si el vídeo termina antes del final de un bloque, lo notifica y
+    termina.
+
+    :param video_path: ruta al archivo del vídeo.
+    :param chunks: primer frame (en el vídeo) y número de frames de cada bloque.
+    :param stride: paso entre frames.
+    :param shared_memory_name: nombre de la memoria compartida del buffer circular.
+    :param frame_shape: forma de cada frame (alto, ancho, 3).
+    :param ring_size: número de huecos del buffer circular.
+    :param ready: cola donde se notifican los frames escritos, el final o los errores.
+    :param free_slots: semáforo con el número de huecos libres del buffer.
+    :param stop: evento para detener el proceso.
+    """
+    buffer = shared_memory.SharedMemory(name=shared_memory_name)
+    stream = None
+    ring = None
+    try:
+        ring = np.ndarray((ring_size,) + tuple(frame_shape), dtype=np.uint8, buffer=buffer.buf)
+        stream = cv2.VideoCapture(video_path)
+        if not stream.isOpened():
+            raise SimpleObjectDetectionException(f'The {video_path} can\'t be opened or doesn\'t '
+                                                 f'exists.')
+        # Siguiente frame del stream y número de frames escritos en el buffer.
+        next_frame, written = 0, 0
+        for first_frame, num_frames in chunks:
+            if first_frame != next_frame and \
+                    not stream.set(cv2.CAP_PROP_POS_FRAMES, float(first_frame)):
+                raise SimpleObjectDetectionException('Ocurrió un error al posicionar el número '
+                                                     'de frame.')
+            for position in range(num_frames):
+                # Saltar los frames intermedios sin decodificarlos.
+                if position > 0 and not all(stream.grab() for _ in range(stride - 1)):
+                    ready.put(('end', None))
+                    return
+                while not free_slots.acquire(timeout=_POLL_INTERVAL):
+                    if stop.is_set():
+                        return
+                if stop.is_set():
+                    return
+                slot = ring[written % ring_size]
+                ret, frame = stream.read(slot)
+                if not ret:
+                    ready.put(('end', None))
+                    return
+                if frame is not slot and frame.base is not slot.base:
+                    if frame.shape != slot.shape:
+                        raise SimpleObjectDetectionException(f'El frame decodificado tiene una '
+                                                             f'forma {frame.shape} distinta de '
+                                                             f'la esperada {slot.shape}.')
+                    slot[...] = frame
+                ready.put(('frame', written % ring_size))
+                written += 1
+            next_frame = first_frame + (num_frames - 1) * stride + 1
+    except BaseException:
+        ready.put(('error', traceback.format_exc()))
+    finally:
+        if stream is not None:
+            stream.release()
+        # Liberar la vista antes de cerrar la memoria compartida.
+        ring = None
+        buffer.close()
+
+
+class _ChunksDecoder:
+    """Proceso decodificador de varios bloques y su buffer circular de memoria compartida."""
+    def __init__(self, context, video_path: str, chunks: List[Tuple[int, int]], stride: int,
+                 frame_shape: Tuple[int, int, int], ring_size: int):
+        frame_bytes = int(np.prod(frame_shape))
+        self.shared_memory = shared_memory.SharedMemory(create=True,
+                                                        size=max(1, ring_size * frame_bytes))
+        self.ring = np.ndarray((ring_size,) + tuple(frame_shape), dtype=np.uint8,
+                               buffer=self.shared_memory.buf)
+        self.ready = context.Queue()
+        self.free_slots = context.Semaphore(ring_size)
+        self.stop = context.Event()
+        self.process = context.Process(target=_decode_chunks,
+                                       args=(video_path, chunks, stride,
+                                             self.shared_memory.name, frame_shape, ring_size,
+                                             self.ready, self.free_slots, self.stop),
+                                       daemon=True)
+        self.process.start()
+
+    def next_frame(self) -> Optional[Image]:
+        """Devuelve el siguiente frame decodificado por el proceso, o None si el vídeo terminó.
+
+        El frame es una vista sobre la memoria compartida. Su hueco debe liberarse con
+        ``release`` después de utilizarlo.
+        """
+        message, value = self._get()
+        if message == 'end':
+            return None
+        if message == 'error':
+            raise SimpleObjectDetectionException(f'Error al decodificar el vídeo en un '
+                                                 f'proceso:\n{value}')
+        return self.ring[value]
+
+    def release(self) -> None:
+        """Libera el hueco del buffer del último frame devuelto.
+        """
+        self.free_slots.release()
+
+    def close(self) -> None:
+        """Detiene el proceso y libera la memoria compartida.
+        """
+        self.stop.set()
+        self.process.join(10 * _POLL_INTERVAL)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
+        self.ready.close()
+        self.ring = None
+        self.shared_memory.close()
+        self.shared_memory.unlink()
+
+    def _get(self) -> Tuple[str, Optional[int]]:
+        while True:
+            try:
+                return self.ready.get(timeout=_POLL_INTERVAL)
+            except queue.Empty:
+                if not self.process.is_alive() and self.ready.empty():
+                    return 'error', f'El proceso terminó con código {self.process.exitcode}.'
+
+
+class ParallelStreamSequence(StreamSequence):
+    """Secuencia de vídeo que decodifica la lectura secuencial en varios procesos.
+
+    El rango de frames que se recorre se divide en bloques de ``chunk_size`` frames que se
+    reparten por turnos entre ``num_workers`` procesos, cada uno con su propio
+    ``cv2.VideoCapture``: el proceso ``k`` decodifica los bloques ``k``, ``k + num_workers``...
+    Los frames se decodifican directamente sobre un buffer circular en memoria compartida
+    (``multiprocessing.shared_memory``) por proceso, y el consumidor los recoge en orden
+    recorriendo los procesos por turnos, sin serializarlos. Mientras se consume un bloque, el
+    resto de procesos ya decodifican los siguientes, por lo que ``ring_size`` debe ser al menos
+    ``chunk_size`` para que no esperen. Cada proceso se posiciona al comienzo de cada uno de sus
+    bloques; con códecs con fotogramas intermedios (H.264...), posicionarse obliga a decodificar
+    desde el fotograma clave anterior, así que conviene que los bloques sean más largos que el
+    intervalo entre fotogramas clave.
+
+    Tiene la misma interfaz que ``StreamSequence``: la iteración, ``iter_batches`` (y por tanto
+    ``generate_objects_detections``) utilizan los procesos, mientras que el acceso por índice y el
+    slicing utilizan el stream y la caché de la clase base.
+
+    Necesita Python 3.8 o superior (``multiprocessing.shared_memory``).
+    """
+    def __init__(self,
+                 video_path: str,
+                 cache_size: int = 100,
+                 cache: Optional[FrameCache] = None,
+                 stride: int = 1,
+                 num_workers: Optional[int] = None,
+                 chunk_size: int = 16,
+                 ring_size: int = 32,
+                 start_method: str = 'spawn'):
+        """
+
+        :param video_path: ruta al archivo del vídeo.
+        :param cache_size: número de frames que se leen en bloque al producirse un fallo de
+        caché en el acceso por índice.
+        :param cache: política de caché de frames para el acceso por índice.
+        :param stride: paso entre los frames de la secuencia.
+        :param num_workers: número de procesos decodificadores. Por defecto, el número de CPUs.
+        :param chunk_size: número de frames de cada bloque que decodifica un proceso.
+        :param ring_size: número de frames del buffer circular de cada proceso.
+        :param start_method: método de inicio de los procesos de ``multiprocessing``.
+        """
+        if shared_memory is None:
+            raise SimpleObjectDetectionException('ParallelStreamSequence necesita Python 3.8 o '
+                                                 'superior (multiprocessing.shared_memory).')
+        if chunk_size < 1 or ring_size < 1:
+            raise SimpleObjectDetectionException('El tamaño de los bloques y del buffer debe ser '
+                                                 'mayor que 0.')
+        super().__init__(video_path, cache_size=cache_size, cache=cache, stride=stride)
+        self.num_workers = num_workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.ring_size = ring_size
+        self._context = multiprocessing.get_context(start_method)
+
+    def _iter_frames(self, start: int = 0,
+                     frame_buffer: Optional[np.ndarray] = None) -> Iterator[Image]:
+        """Decodifica en paralelo los frames desde el índice ``start`` hasta el frame final y los
+        devuelve en orden.
+
+        Los frames son vistas sobre la memoria compartida, válidas hasta que se pide el
+        siguiente. Si el vídeo termina antes de lo esperado, la iteración termina si ocurre en el
+        último bloque y, si no, se lanza una excepción (los frames siguientes no se
+        corresponderían con su número de frame).
+
+        :param start: índice del primer frame (relativo al frame inicial establecido).
+        :param frame_buffer: no se utiliza, los frames se decodifican en la memoria compartida.
+        :return: iterador de los frames (BGR).
+        """
+        if start >= self.num_frames:
+            return
+        chunks = self._split_chunks(start)
+        num_workers = min(self.num_workers, len(chunks))
+        frame_shape = (self.height, self.width, 3)
+        decoders: List[_ChunksDecoder] = []
+        try:
+            for worker in range(num_workers):
+                decoders.append(_ChunksDecoder(self._context, self.video_path,
+                                               chunks[worker::num_workers], self.stride,
+                                               frame_shape, self.ring_size))
+            for index, (first_frame, num_frames) in enumerate(chunks):
+                decoder = decoders[index % num_workers]
+                for position in range(num_frames):
+                    frame = decoder.next_frame()
+                    if frame is None:
+                        if index == len(chunks) - 1:
+                            return
+                        raise SimpleObjectDetectionException(
+                            f'El vídeo terminó en el frame '
+                            f'{first_frame + position * self.stride}, antes del final de la '
+                            f'secuencia.')
+                    try:
+                        yield frame
+                    finally:
+                        decoder.release()
+        finally:
+            for decoder in decoders:
+                decoder.close()
+
+    def _split_chunks(self, start: int) -> List[Tuple[int, int]]:
+        """Divide los frames desde el índice ``start`` en bloques consecutivos de ``chunk_size``
+        frames.
+
+        :param start: índice del primer frame.
+        :return: lista con el primer frame (en el vídeo) y el número de frames de cada bloque.
+        """
+        return [(self._calculate_frame_index(item), min(self.chunk_size, self.num_frames - item))
+                for item in range(start, self.num_frames, self.chunk_size)]
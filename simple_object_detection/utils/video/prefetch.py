@@ -0,0 +1,180 @@
+import atexit
+import queue
+import threading
+import time
+import weakref
+from typing import NamedTuple, Optional, Tuple
+
+import cv2
+
+from simple_object_detection.exceptions import SimpleObjectDetectionException
+from simple_object_detection.typing import Image
+
+
+class PrefetchStats(NamedTuple):
+    """Contadores de la lectura anticipada de frames."""
+    # Frames entregados al consumidor.
+    frames: int
+    # Veces que el consumidor tuvo que esperar al decodificador.
+    waits: int
+    # Tiempo total (segundos) que el consumidor estuvo esperando.
+    wait_time: float
+    # Veces que se reinició la lectura por un acceso no secuencial.
+    restarts: int
+
+
+class _PrefetchCounters:
+    """Contadores mutables compartidos por los sucesivos ``FramePrefetcher`` de una secuencia."""
+    def __init__(self):
+        self.frames = 0
+        self.waits = 0
+        self.wait_time = 0.
+        self.restarts = 0
+
+    def snapshot(self) -> PrefetchStats:
+        return PrefetchStats(self.frames, self.waits, self.wait_time, self.restarts)
+
+
+# Hilos de lectura anticipada activos. Se detienen al terminar el intérprete para que ningún hilo
+# quede decodificando mientras se finaliza el proceso.
+_active_prefetchers: 'weakref.WeakSet[FramePrefetcher]' = weakref.WeakSet()
+
+
+@atexit.register
+def _close_active_prefetchers() -> None:
+    for prefetcher in list(_active_prefetchers):
+        prefetcher.close()
+
+
+class _DecoderError:
+    """Envuelve la excepción producida en el hilo decodificador para relanzarla en el consumidor.
+    """
+    def __init__(self, exception: BaseException):
+        self.exception = exception
+
+
+class FramePrefetcher:
+    """Hilo que decodifica los frames de un vídeo por adelantado en un buffer acotado.
+
+    El hilo abre su propio ``cv2.VideoCapture``, se posiciona en ``start_frame`` y lee de forma
+    secuencial (cada ``stride`` frames) hasta ``end_frame`` (incluido), dejando los frames (en
+    BGR) en una cola de tamaño ``buffer_size``. Si la cola está llena, el hilo espera a que el
+    consumidor saque frames.
+
+    Los errores del hilo se relanzan en el consumidor al llamar a ``get``.
+    """
+    # Tiempo máximo (segundos) de espera del hilo antes de comprobar si debe detenerse.
+    _POLL_INTERVAL = 0.1
+
+    def __init__(self,
+                 video_path: str,
+                 start_frame: int,
+                 end_frame: int,
+                 buffer_size: int = 32,
+                 counters: _PrefetchCounters = None,
+                 stride: int = 1):
+        """
+
+        :param video_path: ruta al archivo del vídeo.
+        :param start_frame: primer frame que se decodifica.
+        :param end_frame: último frame que se decodifica (incluido).
+        :param buffer_size: número máximo de frames decodificados en espera.
+        :param counters: contadores donde se acumulan las estadísticas.
+        :param stride: paso entre frames. Los frames intermedios se saltan sin decodificarlos.
+        """
+        self.next_frame = start_frame
+        self._end_frame = end_frame
+        self._stride = stride
+        self._counters = counters if counters is not None else _PrefetchCounters()
+        self._queue: queue.Queue = queue.Queue(maxsize=buffer_size)
+        self._stop = threading.Event()
+        self._finished = False
+        self._thread = threading.Thread(target=self._decode,
+                                        args=(video_path, start_frame, end_frame, stride),
+                                        name='FramePrefetcher',
+                                        daemon=True)
+        self._thread.start()
+        _active_prefetchers.add(self)
+
+    def get(self) -> Tuple[int, Image]:
+        """Devuelve el siguiente frame decodificado y su número.
+
+        :return: número del frame y frame (BGR).
+        """
+        if self._finished:
+            raise IndexError('No quedan frames por leer.')
+        try:
+            item = self._queue.get_nowait()
+        except queue.Empty:
+            # El consumidor tiene que esperar al decodificador.
+            start = time.perf_counter()
+            item = self._queue.get()
+            self._counters.waits += 1
+            self._counters.wait_time += time.perf_counter() - start
+        if item is None:
+            self._finished = True
+            raise IndexError('No quedan frames por leer.')
+        if isinstance(item, _DecoderError):
+            self._finished = True
+            raise SimpleObjectDetectionException('Error al decodificar el vídeo.') \
+                from item.exception
+        fid, frame = item
+        self.next_frame = fid + self._stride
+        self._counters.frames += 1
+        return fid, frame
+
+    def close(self) -> None:
+        """Detiene el hilo decodificador y libera los frames del buffer.
+        """
+        self._stop.set()
+        # Vaciar la cola por si el hilo está esperando para añadir un frame.
+        while self._thread.is_alive():
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                pass
+            self._thread.join(self._POLL_INTERVAL)
+        self._finished = True
+        _active_prefetchers.discard(self)
+
+    def _decode(self, video_path: str, start_frame: int, end_frame: int, stride: int) -> None:
+        """Bucle del hilo decodificador.
+        """
+        stream: Optional[cv2.VideoCapture] = None
+        try:
+            stream = cv2.VideoCapture(video_path)
+            if not stream.isOpened():
+                raise SimpleObjectDetectionException(f'The {video_path} can\'t be opened or '
+                                                     f'doesn\'t exists.')
+            if start_frame > 0 and not stream.set(cv2.CAP_PROP_POS_FRAMES, float(start_frame)):
+                raise SimpleObjectDetectionException('Ocurrió un error al posicionar el número '
+                                                     'de frame.')
+            for fid in range(start_frame, end_frame + 1, stride):
+                # Saltar los frames intermedios sin decodificarlos.
+                if fid > start_frame and \
+                        not all(stream.grab() for _ in range(stride - 1)):
+                    break
+                ret, frame = stream.read()
+                if not ret:
+                    break
+                if not self._put((fid, frame)):
+                    return
+            self._put(None)
+        except BaseException as exception:
+            self._put(_DecoderError(exception))
+        finally:
+            if stream is not None:
+                stream.release()
+
+    def _put(self, item) -> bool:
+        """Añade un elemento a la cola esperando si está llena.
+
+        :return: False si se pidió detener el hilo antes de poder añadirlo.
+        """
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=self._POLL_INTERVAL)
+                return True
+            except queue.Full:
+                continue
+        return False
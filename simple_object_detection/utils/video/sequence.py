@@ -1,9 +1,13 @@
-from typing import List, Tuple, Optional
+from typing import Iterator, Optional, Union
 
 import cv2
+import numpy as np
 
 from simple_object_detection.exceptions import SimpleObjectDetectionException
 from simple_object_detection.typing import Image, VideoProperties
+from simple_object_detection.utils.video.cache import CacheStats, FrameCache, LRUFrameCache
+from simple_object_detection.utils.video.prefetch import (FramePrefetcher, PrefetchStats,
+                                                          _PrefetchCounters)
 
 
 class StreamSequence:
@@ -12,15 +16,35 @@ class StreamSequence:
     Se utiliza la notación de acceso a un objeto ``object[item]``. Así se puede ir cargando
     el vídeo poco a poco sin llegar a saturar la memoria RAM.
 
+    Con ``prefetch`` activado, un hilo en segundo plano va decodificando los frames siguientes en
+    un buffer acotado mientras se consumen los anteriores.
+
     TODO:
     - Ir marcando los que se han visto.
-    - Crear un hilo que vaya trayendo los nuevos a memoria.
     - Etc. Etc. Optimizar esto!
-    - Implementar __iter__. (PEP 234)
     - Configuración de espacio de color (RGB actualmente).
     """
-    def __init__(self, video_path: str, cache_size: int = 100):
+    def __init__(self,
+                 video_path: str,
+                 cache_size: int = 100,
+                 cache: Optional[FrameCache] = None,
+                 prefetch: bool = False,
+                 prefetch_size: int = 32,
+                 stride: int = 1):
+        """
+
+        :param video_path: ruta al archivo del vídeo.
+        :param cache_size: número de frames que se leen en bloque al producirse un fallo de
+        caché (como máximo, los que caben en la caché). Si no se indica ``cache``, la caché es LRU
+        con un presupuesto de bytes equivalente a ``cache_size`` frames.
+        :param cache: política de caché de frames (por ejemplo ``LRUFrameCache`` o
+        ``SLRUFrameCache``) con su presupuesto de bytes.
+        :param prefetch: si decodificar los frames siguientes en un hilo en segundo plano.
+        :param prefetch_size: número máximo de frames decodificados por adelantado.
+        :param stride: paso entre los frames de la secuencia (1 para utilizar todos los frames).
+        """
         # Abrir el stream con OpenCV.
+        self.video_path = video_path
         self.stream = self._open_video_stream(video_path)
         # Información del vídeo.
         self.width: int = int(self.stream.get(cv2.CAP_PROP_FRAME_WIDTH))
@@ -28,19 +52,41 @@ class StreamSequence:
         self._fps: float = float(self.stream.get(cv2.CAP_PROP_FPS))
         self._num_frames_available: int = int(self.stream.get(cv2.CAP_PROP_FRAME_COUNT))
         # Caching (Almacena el número del frame y la imagen).
-        self._cache: List[Tuple[int, Image]] = [(..., ...)] * cache_size
+        self._block_size = cache_size
+        if cache is None:
+            cache = LRUFrameCache(cache_size * self.width * self.height * 3)
+        self._cache: FrameCache = cache
+        # Siguiente frame que leerá el stream (None si es desconocido).
+        self._stream_position: Optional[int] = 0
         # Inicio y fin del vídeo.
         self._start_frame = 0
         self._end_frame = self._num_frames_available - 1
+        # Paso entre frames.
+        self._stride = 1
+        self.set_stride(stride)
+        # Lectura anticipada en segundo plano.
+        self._prefetch = prefetch
+        self._prefetch_size = prefetch_size
+        self._prefetcher: Optional[FramePrefetcher] = None
+        self._prefetch_counters = _PrefetchCounters()
 
     def __del__(self) -> None:
         """Libera el recurso del vídeo cargado y elimina el objeto también.
         """
+        self.release()
+        if hasattr(self, 'stream'):
+            del self.stream
+
+    def release(self) -> None:
+        """Detiene la lectura anticipada y libera el recurso del vídeo cargado.
+        """
+        if getattr(self, '_prefetcher', None) is not None:
+            self._prefetcher.close()
+            self._prefetcher = None
         if hasattr(self, 'stream') and self.stream.isOpened():
             self.stream.release()
-            del self.stream
 
-    def __getitem__(self, item: int) -> Image:
+    def __getitem__(self, item: Union[int, slice]) -> Image:
         """Obtiene el frame item-ésimo.
 
         Si se ha establecido un frame inicial o final distinto con los métodos ``set_start_frame``
@@ -48,11 +94,14 @@ class StreamSequence:
         superior, actuando como si el stream de vídeo introducido estuviese acotado por ellos y no
         por los originales.
 
+        Si ``item`` es un slice (``sequence[a:b:step]``), devuelve los frames en un único array
+        contiguo de forma (N, alto, ancho, 3). Ver ``get_frames``.
+
         TODO: Cachear. Cargar chunk. Etc. Etc. Mostrar rendimiento haciendo caching.
         https://medium.com/fintechexplained/advanced-python-how-to-implement-caching-in-python-application-9d0a4136b845
-        TODO: Añadir slicing:
-        https://www.geeksforgeeks.org/implementing-slicing-in-__getitem__/#:~:text=slice%20is%20a%20constructor%20in,can%20be%20defined%20inside%20it.&text=Parameter%3A,constructor%20to%20create%20slice%20object.
         """
+        if isinstance(item, slice):
+            return self.get_frames(*item.indices(len(self)))
         # Comprobación del ítem.
         if not isinstance(item, int):
             raise TypeError()
@@ -64,6 +113,94 @@ class StreamSequence:
         frame_rgb = cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2RGB)
         return frame_rgb
 
+    def __iter__(self) -> Iterator[Image]:
+        """Itera secuencialmente sobre los frames de la secuencia (entre los límites establecidos).
+
+        Los frames se decodifican de forma lineal, sin posicionar el stream en cada frame y sin
+        pasar por la caché.
+        """
+        for frame_bgr in self._iter_frames():
+            yield cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2RGB)
+
+    def iter_batches(self,
+                     batch_size: int,
+                     start: int = 0,
+                     reuse_buffer: bool = False) -> Iterator[np.ndarray]:
+        """Itera secuencialmente sobre la secuencia en lotes de ``batch_size`` frames.
+
+        Los frames se decodifican de forma lineal desde el frame ``start`` hasta el final de la
+        secuencia, posicionando el stream únicamente al comienzo. Cada lote es un array contiguo
+        de forma (N, alto, ancho, 3) en RGB. El último lote puede tener menos frames.
+
+        Con ``reuse_buffer`` todos los lotes se escriben en el mismo array, por lo que cada lote
+        solo es válido hasta que se pide el siguiente.
+
+        :param batch_size: número de frames de cada lote.
+        :param start: índice del primer frame (relativo al frame inicial establecido).
+        :param reuse_buffer: si reutilizar el mismo array para todos los lotes.
+        :return: iterador de los lotes de frames.
+        """
+        if batch_size < 1:
+            raise SimpleObjectDetectionException('El tamaño del lote debe ser mayor que 0.')
+        batch = self._allocate_frames(batch_size)
+        frame_buffer = np.empty_like(batch[0])
+        position = 0
+        for frame_bgr in self._iter_frames(start, frame_buffer):
+            self._convert_frame(frame_bgr, batch[position])
+            position += 1
+            if position == batch_size:
+                yield batch
+                position = 0
+                if not reuse_buffer:
+                    batch = self._allocate_frames(batch_size)
+        if position > 0:
+            yield batch[:position]
+
+    def get_frames(self, start: int, stop: int, step: int = 1,
+                   out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Obtiene los frames con índices ``range(start, stop, step)`` en un array contiguo.
+
+        Los frames se decodifican de forma lineal con el stream de la secuencia y se convierten a
+        RGB directamente en el array de salida, sin reservar memoria para cada frame. No se
+        utiliza la caché.
+
+        :param start: índice del primer frame.
+        :param stop: índice final (excluido).
+        :param step: paso entre frames.
+        :param out: array de salida de forma (N, alto, ancho, 3) y tipo uint8. Si es None, se
+        reserva uno nuevo.
+        :return: array con los frames (RGB).
+        """
+        frame_ids = range(start, stop, step)
+        if out is None:
+            out = self._allocate_frames(len(frame_ids))
+        elif out.shape != (len(frame_ids), self.height, self.width, 3) or out.dtype != np.uint8:
+            raise SimpleObjectDetectionException('El array de salida no tiene la forma o el tipo '
+                                                 'esperado.')
+        if len(frame_ids) == 0:
+            return out
+        # Decodificar siempre en orden ascendente.
+        positions = range(len(frame_ids)) if step > 0 else range(len(frame_ids) - 1, -1, -1)
+        fids = [self._calculate_frame_index(frame_ids[position]) for position in positions]
+        frame_buffer = np.empty_like(out[0])
+        if self._stream_position != fids[0]:
+            if not self.stream.set(cv2.CAP_PROP_POS_FRAMES, float(fids[0])):
+                raise Exception('Ocurrió un error al posicionar el número de frame.')
+            self._stream_position = fids[0]
+        for position, fid in zip(positions, fids):
+            # Avanzar sin decodificar hasta el frame buscado.
+            while self._stream_position < fid:
+                if not self.stream.grab():
+                    raise IndexError(f'No se pudo leer el frame {self._stream_position}.')
+                self._stream_position += 1
+            ret, frame_bgr = self.stream.read(frame_buffer)
+            if not ret:
+                self._stream_position = None
+                raise IndexError(f'No se pudo leer el frame {fid}.')
+            self._stream_position += 1
+            self._convert_frame(frame_bgr, out[position])
+        return out
+
     def __len__(self) -> int:
         """Devuelve el número de frames de la secuencia (usando los limites establecidos o
         iniciales)
@@ -87,6 +224,28 @@ class StreamSequence:
                                                  'al frame final.')
         self._start_frame = frame
 
+    def set_stride(self, stride: int) -> None:
+        """Establece el paso entre los frames de la secuencia.
+
+        Con un paso ``n``, el frame i-ésimo de la secuencia es el frame ``frame_inicial + i * n``
+        del vídeo. En la lectura secuencial, los frames intermedios se saltan sin decodificarlos.
+
+        :param stride: paso entre frames (mayor o igual que 1).
+        :return: None.
+        """
+        if stride < 1:
+            raise SimpleObjectDetectionException('El paso entre frames debe ser mayor o igual '
+                                                 'que 1.')
+        self._stride = stride
+
+    def frame_number(self, item: int) -> int:
+        """Número en el vídeo original del frame item-ésimo de la secuencia.
+
+        :param item: índice del frame en la secuencia.
+        :return: número del frame en el vídeo.
+        """
+        return self._calculate_frame_index(item)
+
     def set_end_frame(self, frame: int) -> None:
         """Establece el frame final.
 
@@ -112,20 +271,91 @@ class StreamSequence:
         :param fid:
         :return: índice calculado del frame.
         """
-        calculated_fid = self._start_frame + fid
+        calculated_fid = self._start_frame + fid * self._stride
         # Comprobar que está en el intervalo especificado.
         if not self._start_frame <= calculated_fid <= self._end_frame:
             raise IndexError(f'El frame {calculated_fid} está fuera del intervalo'
                              f'[{self._start_frame}, {self._end_frame}].')
         return calculated_fid
 
+    def _iter_frames(self, start: int = 0,
+                     frame_buffer: Optional[np.ndarray] = None) -> Iterator[Image]:
+        """Decodifica secuencialmente los frames desde el índice ``start`` hasta el frame final.
+
+        Utiliza un stream propio (o un hilo de lectura anticipada si está activado) para no
+        interferir con la caché ni con el acceso por índice.
+
+        :param start: índice del primer frame (relativo al frame inicial establecido).
+        :param frame_buffer: array donde decodificar cada frame. Si es None, se reserva memoria
+        para cada frame. No se utiliza con la lectura anticipada.
+        :return: iterador de los frames (BGR).
+        """
+        if start >= self.num_frames:
+            return
+        first_frame = self._calculate_frame_index(start)
+        if self._prefetch:
+            prefetcher = FramePrefetcher(self.video_path, first_frame, self._end_frame,
+                                         self._prefetch_size, self._prefetch_counters,
+                                         stride=self._stride)
+            try:
+                while True:
+                    try:
+                        _, frame = prefetcher.get()
+                    except IndexError:
+                        break
+                    yield frame
+            finally:
+                prefetcher.close()
+            return
+        stream = self._open_video_stream(self.video_path)
+        try:
+            if first_frame > 0 and not stream.set(cv2.CAP_PROP_POS_FRAMES, float(first_frame)):
+                raise Exception('Ocurrió un error al posicionar el número de frame.')
+            for position, _ in enumerate(range(first_frame, self._end_frame + 1, self._stride)):
+                # Saltar los frames intermedios sin decodificarlos.
+                if position > 0 and not self._skip_frames(stream, self._stride - 1):
+                    break
+                ret, frame = stream.read(frame_buffer)
+                if not ret:
+                    break
+                yield frame
+        finally:
+            stream.release()
+
+    @staticmethod
+    def _skip_frames(stream: cv2.VideoCapture, num_frames: int) -> bool:
+        """Avanza el stream ``num_frames`` frames con ``grab`` (sin decodificar la imagen).
+
+        :param stream: stream del vídeo.
+        :param num_frames: número de frames que se saltan.
+        :return: si se pudieron saltar todos los frames.
+        """
+        for _ in range(num_frames):
+            if not stream.grab():
+                return False
+        return True
+
+    def _allocate_frames(self, num_frames: int) -> np.ndarray:
+        """Reserva un array contiguo para ``num_frames`` frames RGB de la secuencia.
+        """
+        return np.empty((num_frames, self.height, self.width, 3), dtype=np.uint8)
+
+    def _convert_frame(self, frame_bgr: Image, out: np.ndarray) -> None:
+        """Convierte un frame de BGR a RGB escribiendo el resultado en ``out``.
+        """
+        if frame_bgr.shape != out.shape:
+            raise SimpleObjectDetectionException(f'El frame decodificado tiene una forma '
+                                                 f'{frame_bgr.shape} distinta de la esperada '
+                                                 f'{out.shape}.')
+        cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2RGB, dst=out)
+
     def _get_frame(self, fid: int) -> Image:
         """Extrae el frame fid-ésimo de la secuencia de vídeo.
 
         Primeramente busca si está en caché, si lo encuentra, lo devuelve.
 
-        Si se produce un *miss*, trae a caché el tamaño de bloque epecificado por ``cache_size`` y
-        devuelve el frame buscado.
+        Si se produce un *miss*, trae a caché el bloque de ``cache_size`` frames donde se encuentra
+        y devuelve el frame buscado.
 
         :param fid: número del frame.
         :return: frame.
@@ -136,6 +366,8 @@ class StreamSequence:
         # Buscar en caché primero.
         cached = self._search_in_cache(fid)
         if cached is None:
+            if self._prefetch:
+                return self._pull_from_prefetcher(fid)
             return self._pull_to_cache(fid)
         return cached
 
@@ -147,11 +379,7 @@ class StreamSequence:
         :param fid: número del frame.
         :return: frame buscado si es encontrado, si no, None.
         """
-        expected_index = fid % len(self._cache)
-        frame_id, frame = self._cache[expected_index]
-        if frame_id == fid:
-            return frame
-        return None
+        return self._cache.get(fid)
 
     def _pull_to_cache(self, fid: int) -> Image:
         """Trae a caché el lote de frames donde se encuentra el frame fid-ésimo. Además, devuelve el
@@ -160,27 +388,65 @@ class StreamSequence:
         :param fid: número del frame para traer a caché.
         :return: frame fid-ésimo.
         """
-        # Establecer en el frame que se busca.
-        retval = self.stream.set(cv2.CAP_PROP_POS_FRAMES, float(fid))
-        if not retval:
-            raise Exception('Ocurrió un error al posicionar el número de frame.')
-        # Iterar mientras haya frames disponibles.from
+        # Posicionar el stream solo si no está ya en el frame que se busca.
+        if self._stream_position != fid:
+            retval = self.stream.set(cv2.CAP_PROP_POS_FRAMES, float(fid))
+            if not retval:
+                raise Exception('Ocurrió un error al posicionar el número de frame.')
+            self._stream_position = fid
         actual_frame_id = fid
-        # Añadir los siguientes frames que quepan la caché.
+        requested_frame = None
+        # El bloque no puede tener más frames de los que caben en la caché: los últimos frames
+        # expulsarían al frame pedido y a sus vecinos antes de utilizarse.
+        max_frames = max(1, self._cache.admission_bytes // max(self.width * self.height * 3, 1))
+        read_frames = 0
+        # Añadir los siguientes frames del bloque (uno cada ``stride``) a la caché.
         while actual_frame_id < self.num_frames_available:
+            # Saltar los frames intermedios sin decodificarlos.
+            if actual_frame_id > fid and not self._skip_frames(self.stream, self._stride - 1):
+                self._stream_position = None
+                break
             # Capturar frame a frame.
-            actual_frame_id = int(self.stream.get(cv2.CAP_PROP_POS_FRAMES))
             ret, frame = self.stream.read()
             # Comprobar si se ha leído el frame correctamente.
             if not ret:
+                self._stream_position = None
                 break
             # Añadir a la caché
-            self._cache[actual_frame_id % len(self._cache)] = (actual_frame_id, frame)
-            # Comprobar si se ha rellenado la caché.
-            if (actual_frame_id + 1) % len(self._cache) == 0:
+            self._cache.put(actual_frame_id, frame)
+            if actual_frame_id == fid:
+                requested_frame = frame
+            self._stream_position = actual_frame_id + 1
+            actual_frame_id += self._stride
+            read_frames += 1
+            # Comprobar si se ha completado el bloque o si no caben más frames en la caché.
+            if (actual_frame_id - self._start_frame) // self._stride % self._block_size == 0 or \
+                    read_frames >= max_frames:
                 break
+        if requested_frame is None:
+            raise IndexError(f'No se pudo leer el frame {fid}.')
         # Devolver el frame que se buscaba.
-        return self._cache[fid % len(self._cache)][1]
+        return requested_frame
+
+    def _pull_from_prefetcher(self, fid: int) -> Image:
+        """Obtiene el frame fid-ésimo del hilo de lectura anticipada y lo añade a la caché.
+
+        Si el frame no es el siguiente que va a entregar el hilo (acceso no secuencial), se
+        reinicia la lectura anticipada a partir de él.
+
+        :param fid: número del frame.
+        :return: frame fid-ésimo.
+        """
+        if self._prefetcher is None or self._prefetcher.next_frame != fid:
+            if self._prefetcher is not None:
+                self._prefetcher.close()
+                self._prefetch_counters.restarts += 1
+            self._prefetcher = FramePrefetcher(self.video_path, fid, self.num_frames_available - 1,
+                                               self._prefetch_size, self._prefetch_counters,
+                                               stride=self._stride)
+        actual_frame_id, frame = self._prefetcher.get()
+        self._cache.put(actual_frame_id, frame)
+        return frame
 
     @staticmethod
     def _open_video_stream(video_path: str) -> cv2.VideoCapture:
@@ -233,20 +499,54 @@ class StreamSequence:
 
     @property
     def num_frames(self) -> int:
-        """Cálculo del número de frames teniendo en cuenta el frame inicial y final establecido.
+        """Cálculo del número de frames teniendo en cuenta el frame inicial y final establecido y
+        el paso entre frames.
+
+        :return: número de frames con los límites y el paso establecidos.
+        """
+        return (self._end_frame - self._start_frame) // self._stride + 1
+
+    @property
+    def start_frame(self) -> int:
+        """Frame inicial establecido."""
+        return self._start_frame
+
+    @property
+    def end_frame(self) -> int:
+        """Frame final establecido."""
+        return self._end_frame
+
+    @property
+    def stride(self) -> int:
+        """Paso entre los frames de la secuencia."""
+        return self._stride
+
+    @property
+    def cache_stats(self) -> CacheStats:
+        """Contadores de aciertos, fallos y expulsiones de la caché de frames, y su ocupación.
+
+        :return: estadísticas de la caché.
+        """
+        return self._cache.stats
+
+    @property
+    def prefetch_stats(self) -> PrefetchStats:
+        """Contadores de la lectura anticipada: frames entregados, veces y tiempo que se esperó al
+        decodificador y reinicios por accesos no secuenciales.
 
-        :return: número de frames con los límites establecidos.
+        :return: estadísticas de la lectura anticipada.
         """
-        return self._end_frame - self._start_frame + 1
+        return self._prefetch_counters.snapshot()
 
     def properties(self) -> VideoProperties:
         """Devuelve una tupla con las propiedades del vídeo.
 
-        La tupla tiene la estructura (width, height, fps, num_frames).
+        La tupla tiene la estructura (width, height, fps, num_frames). Si se ha establecido un paso
+        entre frames, los fps se dividen por el paso.
 
         :return: propiedades del vídeo.
         """
-        return VideoProperties(self.width, self.height, self.fps, self.num_frames)
+        return VideoProperties(self.width, self.height, self.fps / self._stride, self.num_frames)
 
 
 class StreamSequenceWriter:
@@ -298,9 +598,11 @@ class StreamSequenceWriter:
         :return: None.
         """
         # Si no se pasaron propiedades, obtenerlas de la secuencia
-        properties = sequence.properties()
+        if properties is None:
+            properties = sequence.properties()
         # Abrir el stream.
         output_stream = StreamSequenceWriter(file_output, properties)
-        # Guardar todos los frames de la secuencia.
+        # Guardar todos los frames de la secuencia (lectura secuencial, sin posicionar el stream).
         for frame in sequence:
             output_stream.write(frame)
+        output_stream.release()
@@ -0,0 +1 @@
+"""Unit test package for simple_object_detection."""
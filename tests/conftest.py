@@ -0,0 +1,14 @@
+import cv2
+import numpy as np
+import pytest
+
+
+@pytest.fixture(scope='session')
+def video_path(tmp_path_factory) -> str:
+    """Vídeo de 60 frames de 64x48 en el que cada frame tiene un color uniforme distinto."""
+    path = str(tmp_path_factory.mktemp('video') / 'video.avi')
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), 25, (64, 48))
+    for frame_id in range(60):
+        writer.write(np.full((48, 64, 3), 10 + 4 * frame_id, dtype=np.uint8))
+    writer.release()
+    return path
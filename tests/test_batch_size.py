@@ -0,0 +1,52 @@
+"""Tests de la elección automática del tamaño de lote."""
+import time
+
+import numpy as np
+
+from simple_object_detection.utils.batch_size import BatchSizeTuner
+
+
+class FrameSequence:
+    """Secuencia con ``num_frames`` frames negros."""
+    def __init__(self, num_frames: int):
+        self.num_frames = num_frames
+
+    def __len__(self) -> int:
+        return self.num_frames
+
+    def get_frames(self, start: int, stop: int) -> np.ndarray:
+        return np.zeros((min(stop, self.num_frames) - start, 4, 4, 3), dtype=np.uint8)
+
+
+class SlowNetwork:
+    """Red que tarda ``frame_delay`` segundos por frame y ``warmup_delay`` la primera vez que
+    recibe cada tamaño de lote."""
+    def __init__(self, frame_delay: float, warmup_delay: float = 0.):
+        self.frame_delay = frame_delay
+        self.warmup_delay = warmup_delay
+        self.calls = []
+
+    def get_images_detections(self, frames, mask=None):
+        if len(frames) not in self.calls:
+            time.sleep(self.warmup_delay)
+        self.calls.append(len(frames))
+        time.sleep(self.frame_delay * len(frames))
+
+
+def test_tune_warms_up_each_batch_size():
+    network = SlowNetwork(0.002, warmup_delay=0.2)
+    tuner = BatchSizeTuner(max_memory=None, candidates=(1, 2), trial_batches=2,
+                           min_improvement=1.)
+    tuner.tune(network, FrameSequence(8))
+    assert network.calls == [1, 1, 1, 2, 2, 2]
+    # Sin el lote de calentamiento, el primer lote medido tardaría más de 0.2 s.
+    assert all(trial.frames_per_second > 100 for trial in tuner.trials)
+
+
+def test_tune_counts_available_frames():
+    network = SlowNetwork(0.01)
+    tuner = BatchSizeTuner(max_memory=None, candidates=(4, 8), trial_batches=2)
+    assert tuner.tune(network, FrameSequence(3)) == 4
+    # Con 3 frames disponibles, el lote de 4 solo procesa 3 frames en cada prueba.
+    assert network.calls == [3, 3, 3]
+    assert tuner.trials[0].frames_per_second < 1 / 0.01
@@ -0,0 +1,52 @@
+"""Tests de la creación de las detecciones de ``DetectionModel``."""
+from typing import Any, List
+
+import numpy as np
+import torch
+
+from simple_object_detection.detection_model import PyTorchHubModel
+from simple_object_detection.typing import Image
+
+
+class FixedModel(PyTorchHubModel):
+    """Modelo sin red neuronal que devuelve las mismas cajas para cada imagen."""
+    size = 64
+
+    def _load_local(self) -> Any:
+        return 'local'
+
+    def _load_online(self) -> Any:
+        return 'online'
+
+    def _get_outputs(self, images: List[Image]) -> List[Any]:
+        return [torch.tensor([[10., 20., 4., 6., 0.9, 2.], [30., 40., 8., 2., 0.5, 0.]])
+                for _ in images]
+
+
+class CustomLabelModel(FixedModel):
+    def _calculate_label(self, object_output: Any, object_id: int, *args, **kwargs) -> str:
+        return 'custom'
+
+
+class ShiftedModel(FixedModel):
+    def _calculate_score(self, object_output: Any, object_id: int, *args, **kwargs) -> float:
+        return 1 - float(object_output[4])
+
+
+def test_vectorized_detections():
+    images = [np.zeros((64, 64, 3), dtype=np.uint8)] * 2
+    detections = FixedModel().get_images_detections(images)
+    np.testing.assert_array_equal(detections.xywh, [[10, 20, 4, 6], [30, 40, 8, 2]] * 2)
+    assert [detections.class_names[class_id] for class_id in detections.class_ids] == \
+        ['car', 'person'] * 2
+
+
+def test_overridden_calculations_are_used():
+    images = [np.zeros((64, 64, 3), dtype=np.uint8)] * 2
+    detections = CustomLabelModel().get_images_detections(images)
+    assert [detections.class_names[class_id] for class_id in detections.class_ids] == \
+        ['custom'] * 4
+    assert [obj.label for obj in CustomLabelModel().get_image_objects(images[0])] == \
+        ['custom'] * 2
+    np.testing.assert_allclose(ShiftedModel().get_images_detections(images).scores,
+                               [0.1, 0.5] * 2, rtol=1e-6)
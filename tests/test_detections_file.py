@@ -0,0 +1,132 @@
+"""Tests del formato binario de detecciones y de la generación con puntos de control."""
+import os
+from typing import Any, List
+
+import numpy as np
+import pytest
+import torch
+
+from simple_object_detection.detection_batch import DetectionBatch
+from simple_object_detection.detection_model import PyTorchHubModel
+from simple_object_detection.exceptions import SimpleObjectDetectionException
+from simple_object_detection.typing import Image
+from simple_object_detection.utils.detections_file import load_detections, save_detections
+from simple_object_detection.utils.objects_detections import generate_objects_detections_to_file
+from simple_object_detection.utils.video import StreamSequence
+
+
+class ColorModel(PyTorchHubModel):
+    """Modelo sin red neuronal cuyas detecciones dependen del color de cada frame."""
+    size = 64
+
+    def _load_local(self) -> Any:
+        return 'local'
+
+    def _load_online(self) -> Any:
+        return 'online'
+
+    def _get_outputs(self, images: List[Image]) -> List[Any]:
+        outputs = []
+        for image in images:
+            value = int(image[0, 0, 0])
+            outputs.append(torch.tensor([[value + j, value, 4 + j, 6, 0.5 + j / 10, j]
+                                         for j in range(1 + value % 3)],
+                                        dtype=torch.float32).reshape(-1, 6))
+        return outputs
+
+
+class FailingModel(ColorModel):
+    """``ColorModel`` que falla al procesar el lote ``fail_at``."""
+    fail_at = 3
+
+    def _get_outputs(self, images: List[Image]) -> List[Any]:
+        self.calls = getattr(self, 'calls', 0) + 1
+        if self.calls == self.fail_at:
+            raise RuntimeError('Interrupción')
+        return super()._get_outputs(images)
+
+
+class OtherModel(ColorModel):
+    pass
+
+
+def assert_same_detections(a: DetectionBatch, b: DetectionBatch) -> None:
+    assert len(a) == len(b)
+    assert a.class_names == b.class_names
+    for column in ('frames', 'xywh', 'scores', 'class_ids', 'offsets'):
+        np.testing.assert_array_equal(getattr(a, column), getattr(b, column))
+
+
+def test_save_load_round_trip(tmp_path):
+    rng = np.random.default_rng(0)
+    counts = rng.integers(0, 5, 20)
+    offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+    detections = DetectionBatch(np.repeat(np.arange(20, dtype=np.int32), counts),
+                                rng.integers(0, 1000, (offsets[-1], 4)).astype(np.int32),
+                                rng.random(offsets[-1]).astype(np.float32),
+                                rng.integers(0, 3, offsets[-1]).astype(np.int32),
+                                offsets, ['car', 'truck', 'bus'])
+    file_path = str(tmp_path / 'detections.sodd')
+    save_detections(detections, file_path)
+    for mmap in (True, False):
+        loaded = load_detections(file_path, mmap=mmap)
+        assert_same_detections(detections, loaded)
+    assert_same_detections(detections[5:9], load_detections(file_path)[5:9])
+    # Un archivo sin detecciones.
+    save_detections(DetectionBatch.empty(3, ['car']), file_path)
+    assert_same_detections(DetectionBatch.empty(3, ['car']), load_detections(file_path))
+
+
+def test_resume_after_interruption(tmp_path, video_path):
+    expected_path = str(tmp_path / 'expected.sodd')
+    expected = generate_objects_detections_to_file(ColorModel(), StreamSequence(video_path),
+                                                   expected_path, batch_size=8)
+    assert len(expected) == 60 and expected.num_detections > 0
+
+    file_output = str(tmp_path / 'detections.sodd')
+    network = FailingModel()
+    with pytest.raises(RuntimeError):
+        generate_objects_detections_to_file(network, StreamSequence(video_path), file_output,
+                                            batch_size=8)
+    # Se conservan los dos lotes completados y no existe todavía el archivo final.
+    assert not os.path.exists(file_output)
+    assert os.path.isdir(f'{file_output}.partial')
+
+    network.calls = 0
+    network.fail_at = None
+    detections = generate_objects_detections_to_file(network, StreamSequence(video_path),
+                                                     file_output, batch_size=8)
+    # Solo se procesan los frames que faltaban: 44 frames en lotes de 8.
+    assert network.calls == 6
+    assert not os.path.exists(f'{file_output}.partial')
+    assert_same_detections(expected, detections)
+    # El archivo ya está completo: no se repite la detección.
+    network.calls = 0
+    assert_same_detections(expected, generate_objects_detections_to_file(
+        network, StreamSequence(video_path), file_output, batch_size=8))
+    assert network.calls == 0
+
+
+@pytest.mark.parametrize('change', ['model', 'mask', 'stride'])
+def test_refuse_resume_with_other_inputs(tmp_path, video_path, change):
+    file_output = str(tmp_path / 'detections.sodd')
+    with pytest.raises(RuntimeError):
+        generate_objects_detections_to_file(FailingModel(), StreamSequence(video_path),
+                                            file_output, batch_size=8)
+    network, mask, stride = FailingModel(), None, None
+    network.fail_at = None
+    if change == 'model':
+        network = OtherModel()
+    elif change == 'mask':
+        mask = np.zeros((48, 64, 3), dtype=np.uint8)
+        mask[:24] = 255
+    else:
+        stride = 2
+    with pytest.raises(SimpleObjectDetectionException):
+        generate_objects_detections_to_file(network, StreamSequence(video_path), file_output,
+                                            batch_size=8, mask=mask, stride=stride)
+    # Sin continuar, se descarta el punto de control y se empieza de nuevo.
+    detections = generate_objects_detections_to_file(network, StreamSequence(video_path),
+                                                     file_output, batch_size=8, mask=mask,
+                                                     stride=stride, resume=False)
+    assert len(detections) == 60
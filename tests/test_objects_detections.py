@@ -0,0 +1,65 @@
+"""Tests del filtrado de detecciones múltiples."""
+from typing import List
+
+import numpy as np
+import pytest
+
+from simple_object_detection.detection_batch import DetectionBatch
+from simple_object_detection.object import Object
+from simple_object_detection.typing import Point2D
+from simple_object_detection.utils.objects_detections import (
+    filter_detections_avoiding_duplicated, filter_objects_avoiding_duplicated)
+
+
+def reference_avoiding_duplicated(objects: List[Object], max_distance: float) -> List[Object]:
+    """Algoritmo original de comparación de todos contra todos."""
+    removed_objects_id = list()
+    for obj_id, obj_detection in enumerate(objects):
+        for candidate_id, candidate_detection in enumerate(objects):
+            if obj_id == candidate_id:
+                continue
+            if obj_id in removed_objects_id or candidate_id in removed_objects_id:
+                continue
+            p = np.array(obj_detection.center)
+            q = np.array(candidate_detection.center)
+            distance = np.linalg.norm(p - q)
+            if distance <= max_distance:
+                if obj_detection.score > candidate_detection.score:
+                    removed_objects_id.append(candidate_id)
+                else:
+                    removed_objects_id.append(obj_id)
+    return [obj for obj_id, obj in enumerate(objects) if obj_id not in removed_objects_id]
+
+
+def random_objects(rng: np.random.Generator) -> List[Object]:
+    """Objetos con centros enteros en una zona pequeña (con centros y distancias repetidos) y
+    puntuaciones con empates, representables en float32 como en ``DetectionBatch``."""
+    num_objects = int(rng.integers(0, 25))
+    extent = int(rng.choice([5, 20, 60, 200]))
+    centers = rng.integers(-extent, extent, (num_objects, 2))
+    scores = rng.choice([0.25, 0.5, 0.75, 1.], num_objects) if rng.random() < 0.5 \
+        else rng.random(num_objects)
+    return [Object(index, Point2D(int(x), int(y)), 10, 10, float(np.float32(score)), 'car')
+            for index, ((x, y), score) in enumerate(zip(centers, scores))]
+
+
+@pytest.mark.parametrize('max_distance', [0, 1, 5, 20, 37.5])
+def test_filter_objects_matches_reference(max_distance):
+    rng = np.random.default_rng(int(max_distance * 10))
+    for _ in range(600):
+        objects = random_objects(rng)
+        expected = reference_avoiding_duplicated(objects, max_distance)
+        assert filter_objects_avoiding_duplicated(objects, max_distance) == expected
+
+
+@pytest.mark.parametrize('max_distance', [0, 5, 20])
+def test_filter_detections_matches_reference(max_distance):
+    rng = np.random.default_rng(max_distance)
+    for _ in range(100):
+        frames_objects = [random_objects(rng) for _ in range(int(rng.integers(1, 6)))]
+        detections = DetectionBatch.from_objects(frames_objects)
+        filtered = filter_detections_avoiding_duplicated(detections, max_distance).to_objects()
+        for objects, obtained in zip(frames_objects, filtered):
+            expected = reference_avoiding_duplicated(objects, max_distance)
+            assert [(obj.center, obj.score) for obj in obtained] == \
+                [(obj.center, obj.score) for obj in expected]
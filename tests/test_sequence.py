@@ -0,0 +1,22 @@
+"""Tests del acceso por índice de ``StreamSequence`` con caché."""
+import numpy as np
+import pytest
+
+from simple_object_detection.utils.video import StreamSequence
+from simple_object_detection.utils.video.cache import LRUFrameCache, SLRUFrameCache
+
+
+@pytest.mark.parametrize('cache_class', [LRUFrameCache, SLRUFrameCache])
+def test_block_fits_in_cache(video_path, cache_class):
+    frames = list(StreamSequence(video_path))
+    frame_bytes = frames[0].nbytes
+    # Presupuesto de 5 frames con bloques de 10 frames.
+    sequence = StreamSequence(video_path, cache_size=10, cache=cache_class(5 * frame_bytes))
+    for index in range(10):
+        np.testing.assert_array_equal(sequence[index], frames[index])
+    stats = sequence.cache_stats
+    # Cada frame se decodifica una sola vez: ninguno se expulsa antes de utilizarse.
+    assert stats.evictions + stats.frames == 10
+    if cache_class is LRUFrameCache:
+        assert (stats.hits, stats.misses) == (8, 2)
+    sequence.release()
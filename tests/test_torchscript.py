@@ -0,0 +1,69 @@
+"""Tests del modelo YOLOv5 local serializado con TorchScript."""
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+import torch
+
+from simple_object_detection.exceptions import SimpleObjectDetectionException
+from simple_object_detection.models.yolo import YOLOv5Model
+
+
+class TinyNetwork(torch.nn.Module):
+    """Red que devuelve siempre las mismas predicciones (cajas, 5 + clases) en formato xywh, en
+    píxeles de la entrada de 64x64, con la misma salida en tupla que YOLOv5."""
+    def __init__(self):
+        super().__init__()
+        self.predictions = torch.nn.Parameter(torch.tensor([
+            # Coche con la mayor puntuación.
+            [32., 32., 16., 8., 0.9, 1., 0.],
+            # Coche solapado con el anterior: se suprime.
+            [33., 32., 16., 8., 0.8, 1., 0.],
+            # Camión en la misma posición: la supresión es por clase, se conserva.
+            [33., 32., 16., 8., 0.7, 0., 1.],
+            # Por debajo del umbral de confianza.
+            [10., 10., 4., 4., 0.1, 1., 0.],
+        ]), requires_grad=False)
+
+    def forward(self, images: torch.Tensor):
+        zeros = images[:, 0, 0, 0].reshape(-1, 1, 1) * 0
+        return zeros + self.predictions, None
+
+
+class TinyYOLOv5(YOLOv5Model):
+    size = 64
+    hub_name = 'tiny'
+
+
+@pytest.fixture
+def exported_model(tmp_path, monkeypatch):
+    """Exporta ``TinyNetwork`` con ``TinyYOLOv5.export`` sin descargar nada de torch-hub."""
+    hub_model = SimpleNamespace(model=TinyNetwork(), names={0: 'car', 1: 'truck'},
+                                stride=torch.tensor([8., 16., 32.]))
+    monkeypatch.setattr(torch.hub, 'load', lambda repository, name: hub_model)
+    monkeypatch.setattr(TinyYOLOv5, 'models_path', str(tmp_path))
+    return TinyYOLOv5.export()
+
+
+def test_local_torchscript_model(tmp_path, exported_model):
+    assert exported_model == str(tmp_path / 'tiny.torchscript')
+    network = TinyYOLOv5(use_local=True)
+    assert network.class_names == ['car', 'truck']
+    # La imagen (64, 128) se reduce a la mitad y se centra en vertical: desplazamiento (0, 16).
+    images = [np.zeros((64, 128, 3), dtype=np.uint8)] * 2
+    detections = network.get_images_detections(images)
+
+    assert detections.offsets.tolist() == [0, 2, 4]
+    np.testing.assert_array_equal(detections.frames, [0, 0, 1, 1])
+    np.testing.assert_array_equal(detections.xywh, [[64, 32, 32, 16], [66, 32, 32, 16]] * 2)
+    np.testing.assert_allclose(detections.scores, [0.9, 0.7] * 2, rtol=1e-6)
+    assert [detections.class_names[class_id] for class_id in detections.class_ids] == \
+        ['car', 'truck'] * 2
+    objects = network.get_image_objects(images[0])
+    assert [obj.label for obj in objects] == ['car', 'truck']
+    assert objects[0].center.x == 64 and objects[0].center.y == 32
+
+
+def test_local_torchscript_model_rejects_int8(exported_model):
+    with pytest.raises(SimpleObjectDetectionException):
+        TinyYOLOv5(use_local=True, precision='int8')